@@ -1,10 +1,33 @@
+import math
 import os
+import random
+import time
+import zlib
+from email.utils import formatdate
 from random import randrange
 
-from flask import Flask
+from flask import Flask, jsonify, request
+
+from faults import Faults, load_config
 
 app = Flask(__name__)
 
+# Weather stand-in: data is a function of the seed, the location and the update
+# period, so runs with the same seed (and WEATHER_TIME) return the same values
+WEATHER_SEED = os.environ.get("WEATHER_SEED", "0")
+WEATHER_UPDATE_SECONDS = int(os.environ.get("WEATHER_UPDATE_SECONDS", 600))
+WEATHER_TIME = os.environ.get("WEATHER_TIME")  # fixed epoch seconds instead of the clock
+
+faults = Faults(load_config(), seed=int(os.environ.get("FAULT_SEED", 0)))
+
+
+@app.before_request
+def inject_faults():
+    result = faults.apply(request.path)
+    if result is not None:
+        status, body, headers = result
+        return jsonify(body), status, headers
+
 
 @app.route("/")
 def hello():
@@ -17,6 +40,91 @@ def get_random_value() -> dict:
     return {"value": random_number}
 
 
+@app.route("/faults")
+def get_faults() -> dict:
+    return dict(faults.config, default=faults.default)
+
+
+def convert(kelvin: float, units: str) -> float:
+    if units == "metric":
+        return round(kelvin - 273.15, 2)
+    if units == "imperial":
+        return round((kelvin - 273.15) * 9 / 5 + 32, 2)
+    return round(kelvin, 2)
+
+
+def current_weather(name: str, lat: float, lon: float, now: float, units: str) -> tuple:
+    """OpenWeatherMap-compatible current weather of a location and the start of its update period."""
+    key = name.lower()
+    period = int(now) // WEATHER_UPDATE_SECONDS
+    updated = period * WEATHER_UPDATE_SECONDS
+
+    climate = random.Random("{}:{}".format(WEATHER_SEED, key))
+    base_temp = climate.uniform(265.0, 305.0)
+    base_humidity = climate.uniform(30.0, 90.0)
+
+    rng = random.Random("{}:{}:{}".format(WEATHER_SEED, key, period))
+    hour = (updated % 86400) / 3600 + lon / 15
+    temp = base_temp + 6 * math.sin(2 * math.pi * (hour - 9) / 24) + rng.gauss(0, 0.5)
+    clouds = rng.randrange(0, 101)
+
+    return {
+        "coord": {"lon": round(lon, 4), "lat": round(lat, 4)},
+        "weather": [{"id": 800 if clouds < 20 else 803, "main": "Clear" if clouds < 20 else "Clouds"}],
+        "base": "stations",
+        "main": {
+            "temp": convert(temp, units),
+            "feels_like": convert(temp - rng.uniform(0, 2), units),
+            "temp_min": convert(temp - rng.uniform(0, 1.5), units),
+            "temp_max": convert(temp + rng.uniform(0, 1.5), units),
+            "pressure": rng.randrange(995, 1030),
+            "humidity": int(min(max(base_humidity + rng.gauss(0, 5), 0), 100)),
+        },
+        "wind": {"speed": round(rng.uniform(0, 12), 2), "deg": rng.randrange(0, 360)},
+        "clouds": {"all": clouds},
+        "dt": updated,
+        "id": zlib.crc32(key.encode()) % 10_000_000,
+        "name": name,
+        "cod": 200,
+    }, updated
+
+
+@app.route("/data/2.5/weather")
+def get_weather():
+    args = request.args
+    units = args.get("units", "standard")
+
+    try:
+        if "q" in args:
+            name = args["q"].split(",")[0].strip()
+            location = random.Random("{}:{}:location".format(WEATHER_SEED, name.lower()))
+            lat, lon = location.uniform(-60.0, 70.0), location.uniform(-180.0, 180.0)
+        elif "id" in args:
+            name = "City {}".format(int(args["id"]))
+            location = random.Random("{}:{}:location".format(WEATHER_SEED, name.lower()))
+            lat, lon = location.uniform(-60.0, 70.0), location.uniform(-180.0, 180.0)
+        elif "lat" in args and "lon" in args:
+            lat, lon = float(args["lat"]), float(args["lon"])
+            name = "{:.2f},{:.2f}".format(lat, lon)
+        else:
+            return jsonify({"cod": "400", "message": "Nothing to geocode"}), 400
+    except ValueError:
+        return jsonify({"cod": "400", "message": "wrong location"}), 400
+
+    now = float(WEATHER_TIME) if WEATHER_TIME else time.time()
+    body, updated = current_weather(name, lat, lon, now, units)
+
+    # Conditional requests: data only changes every WEATHER_UPDATE_SECONDS
+    etag = '"{}-{}-{}"'.format(body["id"], updated, units)
+    headers = {"ETag": etag, "Last-Modified": formatdate(updated, usegmt=True), "Cache-Control": "max-age={}".format(
+        max(int(updated + WEATHER_UPDATE_SECONDS - now), 0)
+    )}
+    if request.headers.get("If-None-Match") == etag:
+        return "", 304, headers
+
+    return jsonify(body), 200, headers
+
+
 if __name__ == "__main__":
     port = int(os.environ.get("PORT", 5000))
-    app.run(debug=True, host='0.0.0.0', port=port)
+    app.run(debug=True, host='0.0.0.0', port=port, threaded=True)
@@ -0,0 +1,159 @@
+"""
+Fault injection for the stand-in routes.
+
+Per-route latency, error rates and throttling are configured as JSON, from the
+FAULTS environment variable or the file named by FAULTS_FILE, e.g.:
+
+    {
+        "default": {"latency": {"distribution": "constant", "ms": 5}},
+        "/data/2.5/weather": {
+            "latency": {"distribution": "lognormal", "median_ms": 80, "sigma": 0.5},
+            "error_rate": 0.01,
+            "error_status": 503,
+            "throttle": {"rate": 60, "burst": 10}
+        }
+    }
+
+Latency distributions: constant (ms), uniform (min_ms, max_ms), normal
+(mean_ms, std_ms), lognormal (median_ms, sigma) and exponential (mean_ms).
+Throttled requests get 429 with a Retry-After header. Random draws come from
+FAULT_SEED, so a run can be repeated.
+"""
+
+import json
+import math
+import os
+import random
+import threading
+import time
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+
+def load_config() -> Dict[str, Any]:
+    """Fault configuration from FAULTS or FAULTS_FILE (empty if neither is set)."""
+
+    text = os.environ.get("FAULTS")
+    path = os.environ.get("FAULTS_FILE")
+
+    if text:
+        return json.loads(text)
+    if path:
+        with open(path) as file:
+            return json.load(file)
+
+    return {}
+
+
+class Throttle:
+    """Token bucket of one route."""
+
+    def __init__(self, rate: float, burst: float = 1.0) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def take(self) -> Optional[float]:
+        """Take a token, returning None if allowed or the seconds until one is available."""
+
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return None
+
+            return (1 - self.tokens) / self.rate
+
+
+class Faults:
+    """Latency, error and throttling decisions per route."""
+
+    def __init__(self, config: Mapping[str, Any], seed: Optional[int] = None) -> None:
+        self.config = dict(config)
+        self.default = self.config.pop("default", {})
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+
+        self.throttles = {}  # type: Dict[str, Throttle]
+        for route, settings in list(self.config.items()) + [("default", self.default)]:
+            throttle = settings.get("throttle")
+            if throttle:
+                self.throttles[route] = Throttle(throttle["rate"], throttle.get("burst", 1))
+
+    def route(self, path: str) -> Tuple[str, Mapping[str, Any]]:
+        """Configured route (or default) of a request path."""
+
+        if path in self.config:
+            return path, self.config[path]
+
+        return "default", self.default
+
+    def latency(self, settings: Mapping[str, Any]) -> float:
+        """Seconds to delay a response by."""
+
+        latency = settings.get("latency")
+        if not latency:
+            return 0.0
+
+        distribution = latency.get("distribution", "constant")
+
+        with self.lock:
+            rng = self.random
+            if distribution == "constant":
+                ms = latency.get("ms", 0.0)
+            elif distribution == "uniform":
+                ms = rng.uniform(latency.get("min_ms", 0.0), latency["max_ms"])
+            elif distribution == "normal":
+                ms = rng.gauss(latency["mean_ms"], latency.get("std_ms", 0.0))
+            elif distribution == "lognormal":
+                ms = rng.lognormvariate(math.log(latency["median_ms"]), latency.get("sigma", 0.5))
+            elif distribution == "exponential":
+                ms = rng.expovariate(1.0 / latency["mean_ms"])
+            else:
+                raise ValueError("Unknown latency distribution {!r}".format(distribution))
+
+        return max(ms, 0.0) / 1000.0
+
+    def error(self, settings: Mapping[str, Any]) -> Optional[int]:
+        """Status of an injected error, None if the request succeeds."""
+
+        rate = settings.get("error_rate", 0.0)
+        if not rate:
+            return None
+
+        with self.lock:
+            failed = self.random.random() < rate
+
+        return settings.get("error_status", 500) if failed else None
+
+    def apply(self, path: str) -> Optional[Tuple[int, Dict[str, Any], Dict[str, str]]]:
+        """
+        Delay a request and decide its fate.
+
+        Returns None to serve the request, or the status, JSON body and headers
+        of a throttled or failed response.
+        """
+
+        route, settings = self.route(path)
+
+        throttle = self.throttles.get(route)
+        if throttle is not None:
+            retry_after = throttle.take()
+            if retry_after is not None:
+                body = {"cod": 429, "message": "Your account is temporarily blocked due to exceeding the "
+                                               "requests limitation of your subscription type."}
+                return 429, body, {"Retry-After": str(max(int(math.ceil(retry_after)), 1))}
+
+        delay = self.latency(settings)
+        if delay:
+            time.sleep(delay)
+
+        status = self.error(settings)
+        if status is not None:
+            return status, {"cod": status, "message": "Injected error"}, {}
+
+        return None
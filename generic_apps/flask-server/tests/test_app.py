@@ -0,0 +1,102 @@
+"""
+Weather Stand-in Tests.
+"""
+
+from typing import Iterator
+
+import pytest
+from flask.testing import FlaskClient
+
+import app as server
+from faults import Faults
+
+WEATHER = "/data/2.5/weather"
+
+
+@pytest.fixture
+def client(monkeypatch: pytest.MonkeyPatch) -> Iterator[FlaskClient]:
+    """Test client with a fixed clock and no faults."""
+
+    monkeypatch.setattr(server, "WEATHER_TIME", "1700000000")
+    monkeypatch.setattr(server, "faults", Faults({}, seed=0))
+
+    with server.app.test_client() as client:
+        yield client
+
+
+def test_deterministic(client: FlaskClient, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that the same seed and location return the same body, and other seeds or locations others."""
+
+    first = client.get(WEATHER, query_string={"q": "Lisbon"})
+    second = client.get(WEATHER, query_string={"q": "lisbon"})
+    other = client.get(WEATHER, query_string={"q": "Porto"})
+
+    assert first.status_code == 200
+    assert first.json["name"] == "Lisbon"
+    assert dict(first.json, name=None) == dict(second.json, name=None)
+    assert other.json["main"] != first.json["main"]
+
+    monkeypatch.setattr(server, "WEATHER_SEED", "1")
+    assert client.get(WEATHER, query_string={"q": "Lisbon"}).json["main"] != first.json["main"]
+
+
+def test_update_period(client: FlaskClient, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that the data only changes with the update period."""
+
+    first = client.get(WEATHER, query_string={"q": "Lisbon"}).json
+
+    monkeypatch.setattr(server, "WEATHER_TIME", "1700000001")
+    assert client.get(WEATHER, query_string={"q": "Lisbon"}).json == first
+
+    monkeypatch.setattr(server, "WEATHER_TIME", str(1700000000 + server.WEATHER_UPDATE_SECONDS))
+    assert client.get(WEATHER, query_string={"q": "Lisbon"}).json["dt"] == first["dt"] + server.WEATHER_UPDATE_SECONDS
+
+
+def test_not_modified(client: FlaskClient) -> None:
+    """Test that a request with the current ETag gets 304 without a body."""
+
+    response = client.get(WEATHER, query_string={"q": "Lisbon"})
+    etag = response.headers["ETag"]
+
+    revalidated = client.get(WEATHER, query_string={"q": "Lisbon"}, headers={"If-None-Match": etag})
+    assert revalidated.status_code == 304
+    assert revalidated.data == b""
+    assert revalidated.headers["ETag"] == etag
+
+    changed = client.get(WEATHER, query_string={"q": "Lisbon", "units": "metric"}, headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+
+
+def test_bad_location(client: FlaskClient) -> None:
+    """Test that requests without a valid location get 400."""
+
+    assert client.get(WEATHER).status_code == 400
+    assert client.get(WEATHER, query_string={"id": "x"}).status_code == 400
+
+
+def test_throttled(client: FlaskClient, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that requests beyond the burst of a throttled route get 429 with Retry-After, other routes pass."""
+
+    monkeypatch.setattr(server, "faults", Faults({WEATHER: {"throttle": {"rate": 0.01, "burst": 2}}}, seed=0))
+
+    statuses = [client.get(WEATHER, query_string={"q": "Lisbon"}).status_code for _ in range(3)]
+    assert statuses == [200, 200, 429]
+
+    response = client.get(WEATHER, query_string={"q": "Lisbon"})
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+    assert response.json["cod"] == 429
+
+    assert client.get("/get-random-value").status_code == 200
+
+
+@pytest.mark.parametrize("error_rate, expected", [(1.0, {503}), (0.0, {200})])
+def test_error_rate(client: FlaskClient, monkeypatch: pytest.MonkeyPatch, error_rate: float, expected: set) -> None:
+    """Test that an error rate of 1 always fails and 0 never does."""
+
+    faults = Faults({WEATHER: {"error_rate": error_rate, "error_status": 503}}, seed=0)
+    monkeypatch.setattr(server, "faults", faults)
+
+    statuses = {client.get(WEATHER, query_string={"q": "Lisbon"}).status_code for _ in range(50)}
+
+    assert statuses == expected
@@ -0,0 +1,110 @@
+"""
+Fault Injection Tests.
+"""
+
+import json
+import statistics
+from pathlib import Path
+from typing import List
+
+import pytest
+
+import faults as module
+from faults import Faults, load_config
+
+
+@pytest.fixture
+def sleeps(monkeypatch: pytest.MonkeyPatch) -> List[float]:
+    """Delays slept by the fault injection (without sleeping)."""
+
+    sleeps = []  # type: List[float]
+    monkeypatch.setattr(module.time, "sleep", sleeps.append)
+
+    return sleeps
+
+
+@pytest.mark.parametrize("latency, low, high", [
+    ({"distribution": "constant", "ms": 5}, 0.005, 0.005),
+    ({"distribution": "uniform", "min_ms": 10, "max_ms": 20}, 0.010, 0.020),
+    ({"distribution": "exponential", "mean_ms": 50}, 0.0, float("inf")),
+])
+def test_latency_bounds(sleeps: List[float], latency: dict, low: float, high: float) -> None:
+    """Test that the sampled latencies stay within the distribution's range."""
+
+    faults = Faults({"/x": {"latency": latency}}, seed=0)
+
+    for _ in range(500):
+        assert faults.apply("/x") is None
+
+    assert len(sleeps) == 500
+    assert all(low <= delay <= high for delay in sleeps)
+
+
+@pytest.mark.parametrize("latency, center, measure", [
+    ({"distribution": "uniform", "min_ms": 10, "max_ms": 20}, 0.015, statistics.mean),
+    ({"distribution": "normal", "mean_ms": 100, "std_ms": 10}, 0.100, statistics.mean),
+    ({"distribution": "lognormal", "median_ms": 80, "sigma": 0.5}, 0.080, statistics.median),
+    ({"distribution": "exponential", "mean_ms": 50}, 0.050, statistics.mean),
+])
+def test_latency_distribution(sleeps: List[float], latency: dict, center: float, measure) -> None:
+    """Test that the sampled latencies are centred on the configured mean or median."""
+
+    faults = Faults({"/x": {"latency": latency}}, seed=0)
+
+    for _ in range(2000):
+        faults.apply("/x")
+
+    assert measure(sleeps) == pytest.approx(center, rel=0.1)
+
+
+def test_repeatable(sleeps: List[float]) -> None:
+    """Test that the same seed draws the same latencies and errors."""
+
+    config = {"/x": {"latency": {"distribution": "normal", "mean_ms": 100, "std_ms": 10}, "error_rate": 0.5}}
+
+    runs = []
+    for _ in range(2):
+        faults = Faults(config, seed=7)
+        results = [faults.apply("/x") for _ in range(20)]
+        runs.append(([result is None for result in results], sleeps[:]))
+        sleeps.clear()
+
+    assert runs[0] == runs[1]
+    assert 0 < sum(runs[0][0]) < 20
+
+
+def test_default_route(sleeps: List[float]) -> None:
+    """Test that unconfigured paths use the default settings."""
+
+    faults = Faults({"default": {"latency": {"ms": 5}}, "/x": {}}, seed=0)
+
+    assert faults.route("/y") == ("default", {"latency": {"ms": 5}})
+    faults.apply("/y")
+    faults.apply("/x")
+
+    assert sleeps == [0.005]
+
+
+def test_unknown_distribution() -> None:
+    """Test that an unknown latency distribution is rejected."""
+
+    faults = Faults({"/x": {"latency": {"distribution": "pareto"}}})
+
+    with pytest.raises(ValueError):
+        faults.apply("/x")
+
+
+def test_load_config(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    """Test configuration from FAULTS, then FAULTS_FILE."""
+
+    monkeypatch.delenv("FAULTS", raising=False)
+    monkeypatch.delenv("FAULTS_FILE", raising=False)
+    assert load_config() == {}
+
+    path = tmp_path / "faults.json"
+    path.write_text(json.dumps({"/x": {"error_rate": 0.5}}))
+    monkeypatch.setenv("FAULTS_FILE", str(path))
+    assert load_config() == {"/x": {"error_rate": 0.5}}
+
+    monkeypatch.setenv("FAULTS", json.dumps({"/y": {}}))
+    assert load_config() == {"/y": {}}
@@ -1,48 +1,112 @@
+from collections import deque
+from statistics import mean
+
 from kelvin.app import DataApplication
-import requests
+
+from .cache import ResponseCache, TokenBucket
+from .polling import BASE_URL, Location, Poller, kelvin_to_fahrenheit
 
 
 class App(DataApplication):
 
+    def init(self):
+        """
+        Set up the poller for the configured locations
+        """
+
+        locations = [Location.from_config(location) for location in self.config.locations or []]
+        if not locations:
+            locations = [Location("San Francisco", params={"q": "San Francisco"})]
+
+        polling = self.config.polling or {}
+
+        cache = self.config.cache or {}
+        ttl = cache.get('ttl', None)
+
+        rate_limit = self.config.rate_limit or {}
+        rate = rate_limit.get('rate', None)
+
+        self.poller = Poller(
+            locations,
+            app_id=self.config.app_id,
+            base_url=self.config.base_url or BASE_URL,
+            max_workers=polling.get('max_workers', None) or 16,
+            connect_timeout=polling.get('connect_timeout', None) or 3.05,
+            read_timeout=polling.get('read_timeout', None) or 5.0,
+            deadline=polling.get('deadline', None),
+            cache=ResponseCache(ttl) if ttl else None,
+            limiter=TokenBucket(rate, rate_limit.get('burst', None) or 1) if rate else None,
+        )
+
+        # Recent temp_f per location for avg_temp
+        self.temps = {location.name: deque(maxlen=self.config.average_samples or 10) for location in locations}
+
     def call_api(self):
         """
-        Call the openweathermap API and same the `temp_f` variable into our buffer
+        Poll the openweathermap API for every location and emit `temp_f` per location
         """
 
-        base_url = "http://api.openweathermap.org/data/2.5/weather"
-        params = {
-            "appid": "<replace_with_app_id>",
-            "q": "San Francisco"
-        }
+        results = self.poller.poll()
 
-        with requests.get(base_url, params=params) as response:
-            try:
-                temp_kelvin = response.json()['main']['temp']
-            except KeyError:
-                self.logger.warn(f'Not a valid request response, exiting. {response.json()}')
-                return
+        for result in results:
+            location = result.location
+            if result.error is not None:
+                self.logger.warn('poll failed', location=location.name, status=result.status, error=result.error,
+                                 stale=result.ok)
+            if not result.ok:
+                continue
 
-        self.logger.info('temp_kelvin', temp_kelvin=temp_kelvin)
-        temp_f = round(((9 / 5) * (temp_kelvin - 273) + 32), 1)
+            self.logger.info('temp_kelvin', location=location.name, temp_kelvin=result.temp_kelvin,
+                             elapsed=result.elapsed, source=result.source, age=result.age)
+            temp_f = kelvin_to_fahrenheit(result.temp_kelvin)
+            self.temps[location.name].append(temp_f)
 
-        self.make_message("raw.float32", 'temp_f', store=True, value=temp_f)
+            self.emit_for(location, 'temp_f', temp_f)
+
+        self.logger.info('poll', locations=len(results), failed=sum(not result.ok for result in results),
+                         slowest=max((result.elapsed for result in results), default=0.0))
+
+        self.output_poll_metrics(results)
+
+    def output_poll_metrics(self, results):
+        """
+        Emit the cache hit rate, upstream call count and staleness of the served values
+        """
+
+        metrics = self.poller.metrics()
+        self.logger.info('poll metrics', **metrics)
+
+        staleness = max((result.age for result in results if result.ok), default=0.0)
+        for name, value in (
+            ('cache_hit_rate', metrics['cache_hit_rate']),
+            ('upstream_calls', metrics['upstream_calls']),
+            ('staleness', staleness),
+        ):
+            self.emit(self.make_message("raw.float32", name=name, value=float(value)))
 
     def output_avg_temp(self):
         """
-        Calculate the mean temperature and emit the value
+        Calculate the mean temperature per location and emit the value
         """
 
-        # Check that we have enough data as defined in the `topics` section of our app.yaml
-        if self.data_status != {}:
-            self.logger.warning(f"DATA STATUS ERROR : {self.data_status}")
-            return
+        for location in self.poller.locations:
+            temps = self.temps[location.name]
+            if not temps:
+                self.logger.warning('DATA STATUS ERROR : no temp_f yet', location=location.name)
+                continue
+
+            mn = mean(temps)
+            self.logger.info(f'mean temp_f:{mn}', location=location.name)
+            self.emit_for(location, 'avg_temp', mn)
 
-        # compute mean
-        mn = self.data['temp_f'].series().mean()
-        self.logger.info(f'mean temp_f:{mn}')
+    def emit_for(self, location, name, value):
+        """
+        Create and emit a message for a location's asset
+        """
 
-        # Create and emit message
-        msg = self.make_message("raw.float32", name='avg_temp', value=mn)
+        msg = self.make_message("raw.float32", name=name, value=value)
+        if location.asset_name is not None:
+            msg._.target.asset_name = location.asset_name
         self.emit(msg)
 
     def process(self):
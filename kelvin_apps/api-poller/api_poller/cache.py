@@ -0,0 +1,155 @@
+"""
+Response cache and rate limiting.
+
+Responses are cached per request parameters. Within the TTL a cached value is
+served without a request; after it the entry is revalidated with a conditional
+request (If-None-Match/If-Modified-Since), which costs no quota when the
+upstream answers 304 Not Modified. When the upstream fails the last good value
+is served as stale.
+
+Upstream requests go through a token bucket, which spaces them evenly at the
+configured rate rather than letting a whole period's requests burst at once.
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Mapping, NamedTuple, Optional, Tuple
+
+
+class TokenBucket:
+    """Thread-safe token bucket rate limiter."""
+
+    def __init__(
+        self,
+        rate: float,
+        burst: float = 1.0,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        """
+        Create the bucket (initially full).
+
+        rate -- tokens (requests) per second
+        burst -- bucket size: requests allowed back to back before spacing applies
+        """
+
+        self.rate = rate
+        self.burst = burst
+        self.clock = clock
+        self.sleep = sleep
+
+        self._tokens = burst
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """
+        Take a token, waiting for one if necessary.
+
+        Waiting callers reserve their token up front so they are released one
+        interval apart. Returns False without waiting if no token would be
+        available within timeout seconds.
+        """
+
+        with self._lock:
+            now = self.clock()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+
+            wait = 0.0 if self._tokens >= 1 else (1 - self._tokens) / self.rate
+            if timeout is not None and wait > timeout:
+                return False
+            self._tokens -= 1
+
+        if wait > 0:
+            self.sleep(wait)
+
+        return True
+
+
+class CacheEntry(NamedTuple):
+    """A cached response value with its validators."""
+
+    value: Any
+    etag: Optional[str]
+    last_modified: Optional[str]
+    validated: float  # monotonic time the value was last confirmed by the upstream
+
+    def validators(self) -> Dict[str, str]:
+        """Conditional request headers."""
+
+        headers = {}
+        if self.etag is not None:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified is not None:
+            headers["If-Modified-Since"] = self.last_modified
+
+        return headers
+
+
+class ResponseCache:
+    """Cache of response values keyed by request parameters, with a TTL."""
+
+    def __init__(self, ttl: float, clock: Callable[[], float] = time.monotonic) -> None:
+        """
+        Create the cache.
+
+        ttl -- seconds a value is served without revalidation
+        """
+
+        self.ttl = ttl
+        self.clock = clock
+
+        self._entries: Dict[Hashable, CacheEntry] = {}
+        self._lock = threading.Lock()
+
+        self.hits = 0  # served from the cache within the TTL
+        self.misses = 0  # not cached or expired
+
+    @staticmethod
+    def key(params: Mapping[str, Any]) -> Tuple[Tuple[str, str], ...]:
+        """Cache key of request parameters (excluding credentials)."""
+
+        return tuple(sorted((name, str(value)) for name, value in params.items() if name != "appid"))
+
+    def lookup(self, key: Hashable) -> Tuple[Optional[CacheEntry], bool]:
+        """Entry for a key (None if not cached) and whether it is fresh, counting hits and misses."""
+
+        with self._lock:
+            entry = self._entries.get(key)
+            fresh = entry is not None and self.clock() - entry.validated < self.ttl
+            if fresh:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+        return entry, fresh
+
+    def store(self, key: Hashable, value: Any, etag: Optional[str] = None, last_modified: Optional[str] = None) -> None:
+        """Cache a value received from the upstream."""
+
+        with self._lock:
+            self._entries[key] = CacheEntry(value, etag, last_modified, self.clock())
+
+    def revalidated(self, key: Hashable) -> Optional[CacheEntry]:
+        """Mark an entry as confirmed by the upstream (304 Not Modified)."""
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry = self._entries[key] = entry._replace(validated=self.clock())
+
+        return entry
+
+    def age(self, entry: CacheEntry) -> float:
+        """Seconds since an entry was last confirmed by the upstream."""
+
+        return self.clock() - entry.validated
+
+    @property
+    def hit_rate(self) -> float:
+        """Fraction of lookups served within the TTL."""
+
+        total = self.hits + self.misses
+
+        return self.hits / total if total else 0.0
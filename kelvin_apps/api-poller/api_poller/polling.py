@@ -0,0 +1,229 @@
+"""
+Concurrent weather polling.
+
+Locations are polled in parallel by a bounded thread pool sharing one
+requests session, so connections are kept alive and reused between requests
+and periods. Every request has connect/read timeouts, and a poll as a whole
+has a deadline, so a slow upstream delays at most the locations it serves.
+Requests in flight at the deadline cannot be cancelled, so their timeouts are
+capped at the time left: they give up their connections at the deadline rather
+than up to a read timeout later.
+
+Optionally responses are cached and revalidated, and upstream requests are
+rate limited (see cache).
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Any, Dict, List, Mapping, NamedTuple, Optional, Sequence
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .cache import CacheEntry, ResponseCache, TokenBucket
+
+BASE_URL = "http://api.openweathermap.org/data/2.5/weather"
+
+
+class Location(NamedTuple):
+    """A polled location: its query parameters and the asset its values are emitted for."""
+
+    name: str
+    asset_name: Optional[str] = None
+    params: Mapping[str, Any] = {}
+
+    @classmethod
+    def from_config(cls, config: Mapping[str, Any]) -> "Location":
+        """Create a location from a locations configuration entry (name, asset_name, params)."""
+
+        name = config.get("name", None)
+        params = dict(config.get("params", None) or {})
+        params.setdefault("q", name)
+
+        return cls(name, config.get("asset_name", None), params)
+
+
+class PollResult(NamedTuple):
+    """Result of polling one location."""
+
+    location: Location
+    temp_kelvin: Optional[float]
+    status: Optional[int]  # HTTP status, None if no response
+    elapsed: float  # seconds
+    error: Optional[str] = None
+    source: str = "upstream"  # or cache (within TTL), revalidated (304) or stale (upstream failed)
+    age: float = 0.0  # seconds since the value was last confirmed by the upstream
+
+    @property
+    def ok(self) -> bool:
+        """Whether a temperature was received."""
+
+        return self.temp_kelvin is not None
+
+
+def kelvin_to_fahrenheit(temp_kelvin: float) -> float:
+    """Convert a temperature from kelvin to Fahrenheit (to 0.1)."""
+
+    return round(((9 / 5) * (temp_kelvin - 273) + 32), 1)
+
+
+class Poller:
+    """Poll the weather of many locations concurrently over a pooled session."""
+
+    def __init__(
+        self,
+        locations: Sequence[Location],
+        app_id: Optional[str] = None,
+        base_url: str = BASE_URL,
+        max_workers: int = 16,
+        connect_timeout: float = 3.05,
+        read_timeout: float = 5.0,
+        deadline: Optional[float] = None,
+        cache: Optional[ResponseCache] = None,
+        limiter: Optional[TokenBucket] = None,
+    ) -> None:
+        """
+        Create the poller.
+
+        max_workers -- maximum concurrent requests (and pooled connections)
+        connect_timeout, read_timeout -- per request timeouts (seconds)
+        deadline -- maximum seconds for a whole poll, locations not done by then fail
+            (requests not started are skipped, those in flight time out)
+        cache -- response cache, values within its TTL are served without a request
+        limiter -- rate limiter for upstream requests
+        """
+
+        self.locations = list(locations)
+        self.app_id = app_id
+        self.base_url = base_url
+        self.timeout = (connect_timeout, read_timeout)
+        self.deadline = deadline
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="poller")
+
+        self.cache = cache
+        self.limiter = limiter
+        self.counters = {"upstream_calls": 0, "not_modified": 0, "stale": 0, "failed": 0, "rate_limited": 0}
+        self._lock = threading.Lock()
+
+    def close(self) -> None:
+        """Stop the workers and close pooled connections."""
+
+        self.executor.shutdown(wait=False)
+        self.session.close()
+
+    def params(self, location: Location) -> Dict[str, Any]:
+        """Query parameters of a location's request."""
+
+        params = dict(location.params)
+        if self.app_id is not None:
+            params["appid"] = self.app_id
+
+        return params
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self.counters[name] += 1
+
+    def fetch(self, location: Location, until: Optional[float] = None) -> PollResult:
+        """
+        Poll one location, from the cache if fresh.
+
+        until -- monotonic time by which the request must be done (the poll deadline)
+        """
+
+        start = time.monotonic()
+        params = self.params(location)
+        cache = self.cache
+
+        key, entry = None, None
+        if cache is not None:
+            key = cache.key(params)
+            entry, fresh = cache.lookup(key)
+            if fresh:
+                return PollResult(location, entry.value, None, time.monotonic() - start, source="cache",
+                                  age=cache.age(entry))
+
+        if self.limiter is not None and not self.limiter.acquire(None if until is None else until - time.monotonic()):
+            self._count("rate_limited")
+            return self._fallback(location, entry, None, start, "rate limited")
+
+        timeout = self.timeout
+        if until is not None:
+            remaining = until - time.monotonic()
+            if remaining <= 0:
+                return self._fallback(location, entry, None, start, "deadline exceeded")
+            timeout = (min(timeout[0], remaining), min(timeout[1], remaining))
+
+        headers = entry.validators() if entry is not None else {}
+        status = None
+        self._count("upstream_calls")
+
+        try:
+            with self.session.get(self.base_url, params=params, headers=headers, timeout=timeout) as response:
+                status = response.status_code
+                if status == 304 and entry is not None:
+                    self._count("not_modified")
+                    entry = cache.revalidated(key)
+                    return PollResult(location, entry.value, status, time.monotonic() - start, source="revalidated")
+                body = response.json()
+                etag, last_modified = response.headers.get("ETag"), response.headers.get("Last-Modified")
+        except (requests.RequestException, ValueError) as e:
+            error = "invalid JSON response" if status is not None else f"{type(e).__name__}: {e}"
+            return self._fallback(location, entry, status, start, error)
+
+        try:
+            temp_kelvin = float(body["main"]["temp"])
+        except (KeyError, TypeError, ValueError):
+            return self._fallback(location, entry, status, start, f"not a valid response: {body}")
+
+        if cache is not None:
+            cache.store(key, temp_kelvin, etag, last_modified)
+
+        return PollResult(location, temp_kelvin, status, time.monotonic() - start)
+
+    def _fallback(
+        self, location: Location, entry: Optional[CacheEntry], status: Optional[int], start: float, error: str
+    ) -> PollResult:
+        """Result of a failed request: the last good value if cached."""
+
+        elapsed = time.monotonic() - start
+        if entry is None:
+            self._count("failed")
+            return PollResult(location, None, status, elapsed, error)
+
+        self._count("stale")
+        return PollResult(location, entry.value, status, elapsed, error, source="stale", age=self.cache.age(entry))
+
+    def metrics(self) -> Dict[str, float]:
+        """Cumulative upstream call counts and the cache hit rate."""
+
+        with self._lock:
+            metrics = dict(self.counters)
+        metrics["cache_hit_rate"] = self.cache.hit_rate if self.cache is not None else 0.0
+
+        return metrics
+
+    def poll(self) -> List[PollResult]:
+        """Poll every location, in location order."""
+
+        start = time.monotonic()
+        until = None if self.deadline is None else start + self.deadline
+        futures = [self.executor.submit(self.fetch, location, until) for location in self.locations]
+        wait(futures, timeout=self.deadline)
+
+        results = []
+        for location, future in zip(self.locations, futures):
+            if future.done():
+                results.append(future.result())
+            else:
+                future.cancel()
+                results.append(PollResult(location, None, None, time.monotonic() - start, "deadline exceeded"))
+
+        return results
@@ -0,0 +1,24 @@
+"""
+Test Fixtures.
+"""
+
+import threading
+from typing import Iterator
+
+import pytest
+
+from .weather_server import WeatherServer
+
+
+@pytest.fixture
+def server() -> Iterator[WeatherServer]:
+    """Local weather server fixture."""
+
+    server = WeatherServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    yield server
+
+    server.shutdown()
+    server.server_close()
@@ -0,0 +1,171 @@
+"""
+Cache Tests.
+"""
+
+import threading
+
+import pytest
+
+from api_poller.cache import ResponseCache, TokenBucket
+from api_poller.polling import Location, Poller
+
+from .weather_server import WeatherServer
+
+
+class Clock:
+    """Manual clock, advanced by sleeping."""
+
+    def __init__(self) -> None:
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def test_token_bucket_spacing() -> None:
+    """Test that requests beyond the burst are spaced one interval apart."""
+
+    clock = Clock()
+    bucket = TokenBucket(rate=2.0, burst=2, clock=clock, sleep=clock.sleep)
+
+    for _ in range(5):
+        assert bucket.acquire()
+
+    assert clock.sleeps == [0.5, 0.5, 0.5]
+
+    # Tokens refill while idle, up to the burst
+    clock.now += 10
+    clock.sleeps.clear()
+    for _ in range(3):
+        bucket.acquire()
+    assert clock.sleeps == [0.5]
+
+
+def test_token_bucket_timeout() -> None:
+    """Test that acquire gives up rather than waiting beyond its timeout."""
+
+    clock = Clock()
+    bucket = TokenBucket(rate=1.0, clock=clock, sleep=clock.sleep)
+
+    assert bucket.acquire(timeout=0)
+    assert not bucket.acquire(timeout=0.5)
+    assert bucket.acquire(timeout=1.0)
+    assert clock.sleeps == [1.0]
+
+
+def test_token_bucket_threads() -> None:
+    """Test that concurrent callers are released evenly."""
+
+    # Callers reserve their tokens before waiting: with the clock stopped each waits one interval more
+    sleeps = []
+    bucket = TokenBucket(rate=50.0, clock=lambda: 0.0, sleep=sleeps.append)
+
+    threads = [threading.Thread(target=bucket.acquire) for _ in range(10)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(sleeps) == pytest.approx([i / 50.0 for i in range(1, 10)])
+
+
+def test_response_cache() -> None:
+    """Test TTL, revalidation and the hit rate."""
+
+    clock = Clock()
+    cache = ResponseCache(ttl=60, clock=clock)
+    key = cache.key({"q": "Lisbon", "appid": "secret"})
+    assert key == (("q", "Lisbon"),)
+
+    assert cache.lookup(key) == (None, False)
+
+    cache.store(key, 290.0, etag='"a"')
+    entry, fresh = cache.lookup(key)
+    assert fresh and entry.value == 290.0
+    assert entry.validators() == {"If-None-Match": '"a"'}
+
+    clock.now += 61
+    entry, fresh = cache.lookup(key)
+    assert not fresh and cache.age(entry) == 61
+
+    cache.revalidated(key)
+    assert cache.lookup(key)[1]
+    assert cache.hit_rate == 0.5
+
+
+def test_poller_cache(server: WeatherServer) -> None:
+    """Test cache hits, 304 revalidation and new data against the local server."""
+
+    locations = [Location(f"city-{i}", params={"q": f"city-{i}"}) for i in range(3)]
+    clock = Clock()
+    cache = ResponseCache(ttl=60, clock=clock)
+    poller = Poller(locations, base_url=server.url, cache=cache)
+
+    assert {result.source for result in poller.poll()} == {"upstream"}
+    assert {result.source for result in poller.poll()} == {"cache"}
+    assert server.requests == 3
+
+    clock.now += 61
+    results = poller.poll()
+    assert {result.source for result in results} == {"revalidated"}
+    assert results[0].temp_kelvin == 273.0 + len("city-0")
+    assert server.not_modified == 3
+
+    clock.now += 61
+    server.version = 2
+    results = poller.poll()
+    poller.close()
+    assert {result.source for result in results} == {"upstream"}
+    assert results[0].temp_kelvin == 274.0 + len("city-0")
+
+    metrics = poller.metrics()
+    assert metrics["upstream_calls"] == 9
+    assert metrics["not_modified"] == 3
+    assert metrics["cache_hit_rate"] == pytest.approx(3 / 12)
+
+
+def test_poller_stale_fallback(server: WeatherServer) -> None:
+    """Test that the last good value is served when the upstream fails."""
+
+    locations = [Location("city-0", params={"q": "city-0"}), Location("city-1", params={"q": "city-1"})]
+    cache = ResponseCache(ttl=0.0)
+    poller = Poller(locations[:1], base_url=server.url, cache=cache)
+    poller.poll()
+
+    server.status = 503
+    poller.locations = locations
+    first, second = poller.poll()
+    poller.close()
+
+    assert first.ok and first.source == "stale" and first.status == 503
+    assert first.temp_kelvin == 273.0 + len("city-0")
+    assert first.age > 0
+    assert not second.ok
+    assert poller.metrics()["stale"] == 1
+    assert poller.metrics()["failed"] == 1
+
+
+def test_poller_rate_limited(server: WeatherServer) -> None:
+    """Test that upstream requests are spread by the rate limiter."""
+
+    locations = [Location(f"city-{i}", params={"q": f"city-{i}"}) for i in range(5)]
+    sleeps = []
+    limiter = TokenBucket(rate=20.0, clock=lambda: 0.0, sleep=sleeps.append)
+    poller = Poller(locations, base_url=server.url, max_workers=5, limiter=limiter)
+
+    assert all(result.ok for result in poller.poll())
+    assert sorted(sleeps) == pytest.approx([0.05, 0.1, 0.15, 0.2])
+
+    # Without time before the deadline to wait for a token, requests are not sent
+    poller.deadline = 0.01
+    results = poller.poll()
+    poller.close()
+
+    assert not any(result.ok for result in results)
+    assert poller.metrics()["rate_limited"] == 5
+    assert server.requests == 5
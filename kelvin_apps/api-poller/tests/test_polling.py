@@ -0,0 +1,117 @@
+"""
+Polling Tests.
+"""
+
+import threading
+import time
+
+from api_poller.polling import Location, Poller, kelvin_to_fahrenheit
+
+from .weather_server import WeatherServer
+
+
+def locations(count: int) -> list:
+    """Locations named city-0, city-1, ..."""
+
+    return [Location(f"city-{i}", params={"q": f"city-{i}"}) for i in range(count)]
+
+
+def test_concurrent_polling(server: WeatherServer) -> None:
+    """Test that locations are polled concurrently, bounded by max_workers."""
+
+    # Responses wait until 10 requests are in flight together
+    server.barrier = threading.Barrier(10)
+    poller = Poller(locations(40), base_url=server.url, max_workers=10)
+
+    results = poller.poll()
+    poller.close()
+
+    assert all(result.ok for result in results)
+    assert [result.location.name for result in results] == [f"city-{i}" for i in range(40)]
+    assert results[12].temp_kelvin == 273.0 + len("city-12")
+    assert server.max_active == 10
+
+
+def test_connections_reused(server: WeatherServer) -> None:
+    """Test that pooled connections are kept alive across polls."""
+
+    poller = Poller(locations(20), base_url=server.url, max_workers=4)
+
+    for _ in range(5):
+        assert all(result.ok for result in poller.poll())
+    poller.close()
+
+    assert server.requests == 100
+    assert len(server.connections) <= 4
+
+
+def test_slow_location_times_out(server: WeatherServer) -> None:
+    """Test that a slow upstream only fails its own location."""
+
+    server.held.add("city-3")
+    poller = Poller(locations(6), base_url=server.url, max_workers=6, read_timeout=0.3)
+
+    results = poller.poll()
+    poller.close()
+    server.release.set()
+
+    assert [result.ok for result in results] == [True, True, True, False, True, True]
+    assert "Timeout" in results[3].error
+
+
+def test_deadline(server: WeatherServer) -> None:
+    """Test that locations not done by the poll deadline fail, and their requests time out at it."""
+
+    server.held.update(["city-1", "city-2"])
+    poller = Poller(locations(4), base_url=server.url, max_workers=3, read_timeout=60, deadline=1.0)
+
+    results = poller.poll()
+
+    # Failed at the deadline, by the poll or by their own capped timeouts (whichever came first)
+    assert [result.ok for result in results] == [True, False, False, True]
+    assert all(result.error == "deadline exceeded" or "Timeout" in result.error for result in results[1:3])
+
+    # The requests in flight give up at the deadline rather than waiting for the response
+    poller.executor.shutdown(wait=True)
+    server.release.set()
+
+    assert poller.metrics()["upstream_calls"] == 4
+    assert poller.metrics()["failed"] == 2
+
+    # A request starting after the deadline is not sent
+    result = poller.fetch(Location("city-5", params={"q": "city-5"}), until=time.monotonic())
+    poller.close()
+
+    assert result.error == "deadline exceeded"
+    assert poller.metrics()["upstream_calls"] == 4
+
+
+def test_errors(server: WeatherServer) -> None:
+    """Test invalid responses and unreachable servers."""
+
+    poller = Poller([Location("nowhere", params={"q": "nowhere"})], base_url=server.url, app_id="key")
+    result, = poller.poll()
+    poller.close()
+
+    assert not result.ok
+    assert result.status == 404
+    assert result.error.startswith("not a valid response")
+
+    poller = Poller(locations(1), base_url="http://127.0.0.1:1/", connect_timeout=0.5)
+    result, = poller.poll()
+    poller.close()
+
+    assert not result.ok
+    assert result.status is None
+
+
+def test_location_from_config() -> None:
+    """Test location configuration and the default query."""
+
+    location = Location.from_config({"name": "Lisbon", "asset_name": "lisbon"})
+    assert location == Location("Lisbon", "lisbon", {"q": "Lisbon"})
+
+    location = Location.from_config({"name": "Porto", "params": {"id": 2735943}})
+    assert location.params == {"id": 2735943, "q": "Porto"}
+
+    assert kelvin_to_fahrenheit(273.0) == 32.0
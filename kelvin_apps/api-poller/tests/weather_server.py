@@ -0,0 +1,91 @@
+"""
+Local Weather API Server.
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Set, Tuple
+from urllib.parse import parse_qs, urlparse
+
+
+class WeatherServer(ThreadingHTTPServer):
+    """Local weather API stand-in with injected latency per location."""
+
+    daemon_threads = True
+
+    def __init__(self) -> None:
+        super().__init__(("127.0.0.1", 0), WeatherHandler)
+        self.latency: Dict[str, float] = {}
+        self.default_latency = 0.0
+        self.connections: Set[Tuple[str, int]] = set()
+        self.requests = 0
+        self.active = 0
+        self.max_active = 0
+        self.not_modified = 0
+        self.status: Optional[int] = None  # error status to respond with
+        self.version = 1  # changing it changes the data and its ETag
+        self.held: Set[str] = set()  # locations whose responses wait for release
+        self.release = threading.Event()
+        self.barrier: Optional[threading.Barrier] = None  # requests wait for each other when set
+        self.lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/data/2.5/weather"
+
+
+class WeatherHandler(BaseHTTPRequestHandler):
+    """Respond with a temperature derived from the location name (and ETag), after its latency."""
+
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def do_GET(self) -> None:
+        server = self.server
+        query = parse_qs(urlparse(self.path).query)
+        location = query.get("q", [""])[0]
+
+        with server.lock:
+            server.connections.add(self.client_address)
+            server.requests += 1
+            server.active += 1
+            server.max_active = max(server.max_active, server.active)
+
+        try:
+            if server.barrier is not None:
+                server.barrier.wait(timeout=10)
+            if location in server.held:
+                server.release.wait(timeout=10)
+            time.sleep(server.latency.get(location, server.default_latency))
+            etag = f'"{location}-{server.version}"'
+            if server.status is not None:
+                status, body = server.status, {"cod": str(server.status), "message": "error"}
+            elif location == "nowhere":
+                status, body = 404, {"cod": "404", "message": "city not found"}
+            elif self.headers.get("If-None-Match") == etag:
+                with server.lock:
+                    server.not_modified += 1
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            else:
+                status, body = 200, {"name": location, "main": {"temp": 273.0 + len(location) + server.version - 1}}
+            data = json.dumps(body).encode()
+
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            if status == 200:
+                self.send_header("ETag", etag)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+        finally:
+            with server.lock:
+                server.active -= 1
+
+    def log_message(self, format, *args) -> None:
+        pass
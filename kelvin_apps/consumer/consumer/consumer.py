@@ -4,10 +4,11 @@ Data Application.
 
 from kelvin.app import DataApplication
 from kelvin.icd import Message
-from kelvin.message.raw import Float32
-from kelvin.message.raw import Int32
 from typing import Sequence
 
+from .converters import build_registry, convert_batch
+from .log_sink import LogSink
+
 
 class App(DataApplication):
 
@@ -23,46 +24,34 @@ class App(DataApplication):
         print('\nComplete app configuration: ' + str(self.app_configuration))
         print('\nData: ' + str(self.data))
 
+        # Resolve the conversions once from the declared interface
+        self.converters = build_registry(self.interface.inputs, self.interface.outputs)
+        self.discarded = 0
+        print('\nConverters: ' + str(self.converters))
 
-    def process_data(self, data: Sequence[Message]) -> None:
-        # Process input messages
-        for msg in data:
-            print('[ Received:')
-            print('[ ' + msg._.type + ' -> timestamp: ' + str(msg._.time_of_validity * 1e-9))
-            print('[ name: ' + msg._.name)
-            print('[ value: ' + str(msg.value))
+        # Sampled, rate limited logging off the process loop
+        log_config = self.config.logging
+        self.log_sink = LogSink(
+            sample_every=log_config.sample_every or 1,
+            rate_limit=log_config.rate_limit,
+        ) if log_config else LogSink()
 
-            # Check for specific Inputs and generate new metrics
-            if 'temperature_in_celsius' in msg._.name:
-                temperature_in_fahrenheit = (msg.value * 9 / 5) + 32
-                if isinstance(msg, Float32):
-                    name = "temperature_in_fahrenheit"
-                    value = round(temperature_in_fahrenheit, 2)
-                    self.make_message("raw.float32", name, value, emit=True)
-                elif isinstance(msg, Int32):
-                    name = "temperature_in_fahrenheit_int"
-                    value = int(temperature_in_fahrenheit)
-                    self.make_message("raw.int32", name, value, emit=True)
-                else:
-                    print('Unsupported message type: ' + str(msg.type))
-                    return
-            elif 'measure_in_cm' in msg._.name:
-                measure_in_inches = msg.value / 2.54
-                if isinstance(msg, Float32):
-                    name = "measure_in_inches"
-                    value = round(measure_in_inches, 2)
-                    self.make_message("raw.float32", name, value, emit=True)
-                elif isinstance(msg, Int32):
-                    name = "measure_in_inches_int"
-                    value = int(measure_in_inches)
-                    self.make_message("raw.int32", name, value, emit=True)
-                else:
-                    print('Unsupported message type: ' + str(msg.type))
-                    return
-            else:
-                print('Discarding message: ' + str(msg._.name))
-                return
 
-            print('[ Published:')
-            print('[ name: ' + name)
-            print('[ value: ' + str(value))
+    def process_data(self, data: Sequence[Message]) -> None:
+        for msg in data:
+            self.log_sink.log('received', key=msg._.name, type=msg._.type, name=msg._.name,
+                              timestamp=msg._.time_of_validity * 1e-9, value=msg.value)
+
+        # Convert the whole batch, grouped by input
+        batches, unknown = convert_batch(self.converters, [msg._.name for msg in data], [msg.value for msg in data])
+
+        for batch in batches:
+            converter = batch.converter
+            for value in batch.values.tolist():
+                self.make_message(converter.output_type, converter.output_name, value, emit=True)
+            self.log_sink.log('published', key=converter.output_name, name=converter.output_name,
+                              count=len(batch.indices), value=batch.values[-1].item())
+
+        if unknown:
+            self.discarded += unknown
+            self.log_sink.log('discarded', count=unknown, total=self.discarded)
@@ -0,0 +1,104 @@
+"""
+Unit conversion registry.
+
+Conversions are resolved once from the declared inputs and outputs, so the
+per-message work is reduced to a dictionary lookup and batches of values are
+converted in a single NumPy operation per input.
+"""
+
+from typing import Dict, Iterable, List, Mapping, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+# Base input name -> (base output name, multiplier, divisor, offset)
+# Multiplier and divisor are kept apart (rather than folded into one scale) so
+# the results match value * multiplier / divisor + offset exactly, e.g. 254 cm
+# is 100 inches, not 99.99999999999999 truncated to 99
+CONVERSIONS: Dict[str, Tuple[str, float, float, float]] = {
+    "temperature_in_celsius": ("temperature_in_fahrenheit", 9.0, 5.0, 32.0),
+    "measure_in_cm": ("measure_in_inches", 1.0, 2.54, 0.0),
+}
+
+# Suffix used for the integer variants of inputs and outputs
+INT_SUFFIX = "_int"
+
+# Decimal places used for floating point outputs
+FLOAT_DECIMALS = 2
+
+
+class Converter(NamedTuple):
+    """Precompiled conversion from one input to one output."""
+
+    output_name: str
+    output_type: str
+    multiplier: float
+    divisor: float
+    offset: float
+    decimals: Optional[int]  # None truncates towards zero (integer outputs)
+
+    def convert(self, values: np.ndarray) -> np.ndarray:
+        """Convert a batch of values."""
+
+        result = values * self.multiplier / self.divisor + self.offset
+        if self.decimals is None:
+            return np.trunc(result).astype(np.int64)
+
+        return np.round(result, self.decimals)
+
+
+def build_registry(inputs: Mapping, outputs: Mapping) -> Dict[str, Converter]:
+    """Build the input name to converter registry from the app interface."""
+
+    registry: Dict[str, Converter] = {}
+
+    for name in inputs:
+        base, suffix = (name[: -len(INT_SUFFIX)], INT_SUFFIX) if name.endswith(INT_SUFFIX) else (name, "")
+        if base not in CONVERSIONS:
+            continue
+
+        output_base, multiplier, divisor, offset = CONVERSIONS[base]
+        output_name = output_base + suffix
+        if output_name not in outputs:
+            continue
+
+        output_type = outputs[output_name].data_type
+        decimals = None if output_type.startswith("raw.int") else FLOAT_DECIMALS
+        registry[name] = Converter(output_name, output_type, multiplier, divisor, offset, decimals)
+
+    return registry
+
+
+class Batch(NamedTuple):
+    """Converted values for one output, with the positions of their inputs."""
+
+    converter: Converter
+    indices: List[int]
+    values: np.ndarray
+
+
+def convert_batch(
+    registry: Mapping[str, Converter], names: Iterable[str], values: Iterable[float]
+) -> Tuple[List[Batch], int]:
+    """
+    Group values by input name and convert each group in one pass.
+
+    Returns the converted batches and the number of values with unknown names.
+    """
+
+    groups: Dict[str, List[int]] = {}
+    unknown = 0
+
+    for i, name in enumerate(names):
+        if name in registry:
+            groups.setdefault(name, []).append(i)
+        else:
+            unknown += 1
+
+    values = np.asarray(values if isinstance(values, np.ndarray) else list(values), dtype=np.float64)
+
+    batches = [
+        Batch(registry[name], indices, registry[name].convert(values[indices]))
+        for name, indices in groups.items()
+    ]
+
+    return batches, unknown
@@ -0,0 +1,146 @@
+"""
+Non-blocking structured log sink.
+
+Records are appended to a deque by the caller and formatted/written in batches
+by a background thread, so logging never waits on stdout. Records can be
+sampled (1 in N per key) and rate limited (records per second per key) before
+they are queued.
+"""
+
+import atexit
+import json
+import sys
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional, TextIO, Tuple
+
+Record = Tuple[float, str, Dict[str, Any]]
+
+
+class LogSink:
+    """Queue records to a background writer thread."""
+
+    def __init__(
+        self,
+        stream: Optional[TextIO] = None,
+        sample_every: int = 1,
+        rate_limit: Optional[float] = None,
+        max_queue: int = 10000,
+        flush_interval: float = 0.1,
+    ) -> None:
+        """
+        Create the sink and start its writer thread.
+
+        sample_every -- keep one record in every N for each key
+        rate_limit -- maximum records per second for each key
+        max_queue -- records queued beyond this are dropped
+        flush_interval -- seconds between writes of the queued records
+        """
+
+        self.stream = stream if stream is not None else sys.stdout
+        self.sample_every = max(int(sample_every), 1)
+        self.rate_limit = rate_limit
+        self.max_queue = max_queue
+        self.flush_interval = flush_interval
+
+        self.stats = {"written": 0, "sampled": 0, "limited": 0, "dropped": 0}
+
+        self._counts: Dict[str, int] = {}
+        self._buckets: Dict[str, List[float]] = {}
+        self._queue: "deque[Record]" = deque()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="log-sink", daemon=True)
+        self._thread.start()
+
+        atexit.register(self.close)
+
+    def log(self, event: str, key: Optional[str] = None, **fields: Any) -> bool:
+        """
+        Queue a record, returning whether it was accepted.
+
+        Sampling and rate limiting are applied per key (defaults to the event).
+        """
+
+        key = event if key is None else key
+
+        if self.sample_every > 1:
+            count = self._counts.get(key, 0)
+            self._counts[key] = count + 1
+            if count % self.sample_every:
+                self.stats["sampled"] += 1
+                return False
+
+        now = time.time()
+
+        if self.rate_limit is not None and not self._take(key, now):
+            self.stats["limited"] += 1
+            return False
+
+        if len(self._queue) >= self.max_queue:
+            self.stats["dropped"] += 1
+            return False
+
+        self._queue.append((now, event, fields))
+
+        return True
+
+    def _take(self, key: str, now: float) -> bool:
+        """Take a token from the key's bucket."""
+
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = [self.rate_limit, now]
+
+        tokens, last = bucket
+        tokens = min(self.rate_limit, tokens + (now - last) * self.rate_limit)
+        bucket[1] = now
+
+        if tokens < 1.0:
+            bucket[0] = tokens
+            return False
+
+        bucket[0] = tokens - 1.0
+        return True
+
+    def close(self) -> None:
+        """Write remaining records and stop the writer thread."""
+
+        if not self._thread.is_alive():
+            return
+
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        """Writer loop: drain the queue in batches and write them at once."""
+
+        while not self._stop.wait(self.flush_interval):
+            self._write()
+
+        self._write()
+
+    def _write(self) -> None:
+        """Format and write all queued records."""
+
+        lines = []
+        popleft = self._queue.popleft
+        while self._queue:
+            lines.append(self._format(*popleft()))
+
+        if not lines:
+            return
+
+        try:
+            self.stream.write("".join(lines))
+            self.stream.flush()
+        except ValueError:  # stream closed during interpreter shutdown
+            return
+
+        self.stats["written"] += len(lines)
+
+    @staticmethod
+    def _format(timestamp: float, event: str, fields: Dict[str, Any]) -> str:
+        """Format a record as a compact JSON line."""
+
+        return json.dumps({"ts": round(timestamp, 6), "event": event, **fields}, separators=(",", ":"), default=str) + "\n"
@@ -0,0 +1,96 @@
+"""
+Converter Registry Tests.
+"""
+
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from consumer.converters import build_registry, convert_batch
+
+
+def metrics(**data_types: str) -> dict:
+    """Build an interface mapping of metric name to metric."""
+
+    return {name: SimpleNamespace(name=name, data_type=data_type) for name, data_type in data_types.items()}
+
+
+@pytest.fixture
+def registry() -> dict:
+    """Registry fixture matching the app.yaml interface."""
+
+    inputs = metrics(
+        temperature_in_celsius="raw.float32",
+        temperature_in_celsius_int="raw.int32",
+        measure_in_cm="raw.float32",
+        measure_in_cm_int="raw.int32",
+    )
+    outputs = metrics(
+        temperature_in_fahrenheit="raw.float32",
+        temperature_in_fahrenheit_int="raw.int32",
+        measure_in_inches="raw.float32",
+        measure_in_inches_int="raw.int32",
+    )
+
+    return build_registry(inputs, outputs)
+
+
+def test_build_registry(registry: dict) -> None:
+    """Test that every declared input resolves to its declared output."""
+
+    assert {name: converter.output_name for name, converter in registry.items()} == {
+        "temperature_in_celsius": "temperature_in_fahrenheit",
+        "temperature_in_celsius_int": "temperature_in_fahrenheit_int",
+        "measure_in_cm": "measure_in_inches",
+        "measure_in_cm_int": "measure_in_inches_int",
+    }
+    assert registry["temperature_in_celsius_int"].output_type == "raw.int32"
+    assert registry["temperature_in_celsius_int"].decimals is None
+
+
+def test_build_registry_skips_undeclared_outputs() -> None:
+    """Test that inputs without a declared output are not registered."""
+
+    registry = build_registry(metrics(measure_in_cm="raw.float32", pressure="raw.float32"), metrics())
+
+    assert registry == {}
+
+
+def test_convert_batch(registry: dict) -> None:
+    """Test conversion of a mixed batch."""
+
+    names = ["temperature_in_celsius", "measure_in_cm_int", "unknown", "temperature_in_celsius", "other"]
+    values = [21.5, 100.0, 1.0, -40.0, 2.0]
+
+    batches, unknown = convert_batch(registry, names, values)
+
+    assert unknown == 2
+    results = {batch.converter.output_name: (batch.indices, batch.values.tolist()) for batch in batches}
+    assert results == {
+        "temperature_in_fahrenheit": ([0, 3], [70.7, -40.0]),
+        "measure_in_inches_int": ([1], [39]),
+    }
+
+
+def test_convert_batch_matches_scalar(registry: dict) -> None:
+    """Test that vectorised conversion matches the per-message arithmetic."""
+
+    values = np.random.default_rng(0).uniform(-50, 50, 1000)
+
+    (float_batch,), _ = convert_batch(registry, ["temperature_in_celsius"] * len(values), values)
+    (int_batch,), _ = convert_batch(registry, ["measure_in_cm_int"] * len(values), values)
+
+    assert float_batch.values.tolist() == pytest.approx([round((v * 9 / 5) + 32, 2) for v in values])
+    assert int_batch.values.tolist() == [int(v / 2.54) for v in values]
+
+
+def test_convert_exact_multiples(registry: dict) -> None:
+    """Test that integer inputs that are multiples of 2.54 convert exactly, as int(value / 2.54) does."""
+
+    values = [254.0, 127.0, 508.0, 2540.0, -254.0]
+
+    (batch,), _ = convert_batch(registry, ["measure_in_cm_int"] * len(values), values)
+
+    assert batch.values.tolist() == [100, 50, 200, 1000, -100]
+    assert batch.values.tolist() == [int(v / 2.54) for v in values]
@@ -0,0 +1,129 @@
+"""
+Log Sink Tests.
+"""
+
+import io
+import json
+import os
+import time
+from pathlib import Path
+
+import pytest
+
+from consumer.log_sink import LogSink
+
+# Apps are packaged on their own, so each one that logs through the sink ships a copy of this module
+MODULE = Path(__file__).parent.parent / "consumer" / "log_sink.py"
+APPS = MODULE.parent.parent.parent
+
+
+def read_records(stream: io.StringIO) -> list:
+    """Parse the JSON lines written to a stream."""
+
+    return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+
+def test_log() -> None:
+    """Test that records are written as compact JSON lines."""
+
+    stream = io.StringIO()
+    sink = LogSink(stream)
+
+    assert sink.log("published", name="temperature", value=21.5)
+    sink.close()
+
+    (record,) = read_records(stream)
+    assert record["event"] == "published"
+    assert record["name"] == "temperature"
+    assert record["value"] == 21.5
+    assert " " not in stream.getvalue().strip()
+    assert sink.stats["written"] == 1
+
+
+def test_sample_every() -> None:
+    """Test that one record in every N is kept for each key."""
+
+    stream = io.StringIO()
+    sink = LogSink(stream, sample_every=10)
+
+    for i in range(100):
+        sink.log("received", key="a", i=i)
+        sink.log("received", key="b", i=i)
+    sink.close()
+
+    records = read_records(stream)
+    assert [record["i"] for record in records if record["event"] == "received"] == [i for i in range(0, 100, 10) for _ in "ab"]
+    assert sink.stats["sampled"] == 180
+
+
+def test_rate_limit() -> None:
+    """Test that each key is limited to its burst within a second."""
+
+    stream = io.StringIO()
+    sink = LogSink(stream, rate_limit=5)
+
+    accepted = [sink.log("received", key=key) for key in "ab" for _ in range(20)]
+    sink.close()
+
+    assert sum(accepted) == 10
+    assert sink.stats["limited"] == 30
+
+
+def test_dropped_when_full() -> None:
+    """Test that logging never blocks when the queue is full."""
+
+    class SlowStream(io.StringIO):
+        def write(self, s: str) -> int:
+            time.sleep(0.1)
+            return super().write(s)
+
+    sink = LogSink(SlowStream(), max_queue=10, flush_interval=0.01)
+
+    start = time.perf_counter()
+    for i in range(1000):
+        sink.log("received", i=i)
+    elapsed = time.perf_counter() - start
+    sink.close()
+
+    assert elapsed < 0.1
+    assert sink.stats["dropped"] > 0
+
+
+def test_copies_identical() -> None:
+    """Test that the copies of the module shipped by the other apps are identical to this one."""
+
+    copies = [path for path in APPS.glob("**/log_sink.py") if path.resolve() != MODULE.resolve()]
+
+    assert copies
+    for path in copies:
+        assert path.read_text() == MODULE.read_text(), f"{path} differs from {MODULE}"
+
+
+@pytest.fixture
+def devnull():
+    """Null output stream."""
+
+    with open(os.devnull, "w") as stream:
+        yield stream
+
+
+def test_benchmark_print(benchmark, devnull) -> None:
+    """Benchmark the synchronous print() calls being replaced."""
+
+    def run() -> None:
+        print("[ Published:", file=devnull)
+        print("[ raw.float32 -> timestamp: 1600000000.0", file=devnull)
+        print("[ name: temperature_in_celsius", file=devnull)
+        print("[ value: 21.5", file=devnull)
+
+    benchmark(run)
+
+
+@pytest.mark.parametrize("sample_every", [1, 100])
+def test_benchmark_log(benchmark, devnull, sample_every: int) -> None:
+    """Benchmark queueing a record with and without sampling."""
+
+    sink = LogSink(devnull, sample_every=sample_every, max_queue=1000000, flush_interval=0.01)
+
+    benchmark(sink.log, "published", key="temperature_in_celsius", type="raw.float32", timestamp=1600000000.0, value=21.5)
+    sink.close()
@@ -0,0 +1,430 @@
+"""
+Historical label backfill.
+
+Applies the labeling rules to historical data, with the same semantics as the
+live rule engine evaluated at every row: metric values are carried forward
+between rows, hysteresis, duration and interval coalescing are evaluated per
+rule with vectorised operations over whole chunks, and the closed intervals are
+written to the label outbox in bulk, from where they are sent by the app (or
+directly, with --send).
+
+Data is read in chunks from CSV, Parquet (with pyarrow installed) or a SQLite
+table, one column per rule metric and a timestamp column. After each chunk the
+rule state and the number of rows processed are written to a checkpoint file,
+so an interrupted backfill resumes after the last completed chunk (labels of a
+chunk written again are deduplicated by the outbox).
+
+Usage:
+
+    label-backfill data/history.csv --config app.yaml
+    label-backfill data/history.sqlite --table metrics --timestamp-column time --send
+"""
+
+import argparse
+import json
+import os
+import sys
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .intervals import NANOSECONDS, Interval
+from .outbox import Outbox
+from .rules import NONE, OPERATORS, Rule
+from .submitter import Label
+
+
+class RuleState(NamedTuple):
+    """State of a rule between chunks (times in nanoseconds since the epoch)."""
+
+    holding: bool = False  # condition holds (with hysteresis)
+    since: Optional[int] = None  # since when it holds
+    open_start: Optional[int] = None  # open interval
+    open_end: Optional[int] = None
+    inactive_since: Optional[int] = None  # first inactive row after the open interval
+
+
+class Summary(NamedTuple):
+    """Summary counts of a backfill."""
+
+    rows: int  # rows processed, including those of previous runs
+    labels: int  # labels of the intervals closed in this run
+    stored: int  # labels new to the outbox
+
+
+def _ffill(values: np.ndarray, initial: float) -> np.ndarray:
+    """Carry the last non-NaN value (starting from initial) forward over NaN values."""
+
+    values = np.concatenate([[initial], values])
+    index = np.where(np.isnan(values), 0, np.arange(len(values)))
+    np.maximum.accumulate(index, out=index)
+
+    return values[index][1:]
+
+
+def evaluate_rule(
+    rule: Rule, times: np.ndarray, values: np.ndarray, state: RuleState
+) -> Tuple[List[Interval], RuleState]:
+    """
+    Evaluate a rule at every row of a chunk, returning the intervals closed and the state after it.
+
+    times -- nanoseconds since the epoch, increasing
+    values -- metric value at each row, NaN before the first value
+    """
+
+    if not len(times):
+        return [], state
+
+    function = OPERATORS[rule.operator]
+    exit_threshold = rule.threshold if rule.exit_threshold is None else rule.exit_threshold
+    duration = int(rule.duration * NANOSECONDS)
+    min_gap = int(rule.min_gap * NANOSECONDS)
+
+    # Hysteresis: holds from entering until it no longer stays, otherwise unchanged
+    valid = ~np.isnan(values)
+    with np.errstate(invalid="ignore"):
+        enter = function(values, rule.threshold) & valid
+        stay = function(values, exit_threshold) & valid
+    holding = _ffill(np.where(enter, 1.0, np.where(stay, np.nan, 0.0)), float(state.holding)) > 0
+
+    # Active once holding for the duration
+    previous = np.concatenate([[state.holding], holding[:-1]])
+    starts = np.where(holding & ~previous, times, NONE)
+    initial = state.since if state.holding and state.since is not None else NONE
+    since = np.maximum.accumulate(np.concatenate([[initial], starts]))[1:]
+    active = holding & (times - since >= duration)
+
+    closed = []
+    open_start, open_end, inactive_since = state.open_start, state.open_end, state.inactive_since
+    rows = np.flatnonzero(active)
+
+    if len(rows):
+        # An active row starts a new interval after min_gap from the first inactive row before it
+        previous_rows = np.concatenate([[-1], rows[:-1]])
+        gap = rows > previous_rows + 1
+        first_inactive = times[previous_rows + 1]
+        if inactive_since is not None:
+            gap[0], first_inactive[0] = True, inactive_since
+        breaks = gap & (times[rows] - first_inactive >= min_gap)
+
+        if open_start is None:
+            breaks[0] = True
+        elif breaks[0]:
+            closed.append(Interval(open_start, open_end))
+
+        positions = np.flatnonzero(breaks)
+        continued = not breaks[0]
+        if continued:
+            positions = np.concatenate([[0], positions])
+        interval_starts = since[rows[positions]]
+        if continued:
+            interval_starts[0] = open_start
+        interval_ends = times[rows[np.concatenate([positions[1:] - 1, [len(rows) - 1]])]]
+
+        intervals = [Interval(start, end) for start, end in zip(interval_starts.tolist(), interval_ends.tolist())]
+        closed += intervals[:-1]
+        open_start, open_end = intervals[-1]
+
+        last = rows[-1] + 1
+        inactive_since = int(times[last]) if last < len(times) else None
+    elif open_start is not None and inactive_since is None:
+        inactive_since = int(times[0])
+
+    # Close the open interval min_gap after it became inactive
+    if open_start is not None and inactive_since is not None and times[-1] - inactive_since >= min_gap:
+        closed.append(Interval(open_start, open_end))
+        open_start = open_end = None
+    if open_start is None:
+        inactive_since = None
+
+    state = RuleState(
+        holding=bool(holding[-1]),
+        since=int(since[-1]) if holding[-1] else None,
+        open_start=open_start,
+        open_end=open_end,
+        inactive_since=inactive_since,
+    )
+
+    return closed, state
+
+
+class Backfill:
+    """Evaluate rules over consecutive chunks of historical data."""
+
+    def __init__(self, rules: Sequence[Rule]) -> None:
+        for rule in rules:
+            rule.validate()
+
+        self.rules = list(rules)
+        self.metrics = sorted({rule.metric for rule in self.rules})
+        self.values: Dict[str, float] = {name: np.nan for name in self.metrics}  # last value of each metric
+        self.states = [RuleState() for _ in self.rules]
+        self.rows = 0
+
+    def process(self, chunk: pd.DataFrame) -> List[Tuple[Rule, Interval]]:
+        """Evaluate a chunk indexed by nanoseconds since the epoch, returning the intervals closed."""
+
+        times = chunk.index.to_numpy(np.int64)
+        values = {name: _ffill(chunk[name].to_numpy(np.float64), self.values[name]) for name in self.metrics}
+        closed = []
+
+        for i, rule in enumerate(self.rules):
+            intervals, self.states[i] = evaluate_rule(rule, times, values[rule.metric], self.states[i])
+            closed += [(rule, interval) for interval in intervals]
+
+        if len(times):
+            self.values = {name: float(value[-1]) for name, value in values.items()}
+        self.rows += len(times)
+
+        return sorted(closed, key=lambda item: item[1].start)
+
+    def flush(self) -> List[Tuple[Rule, Interval]]:
+        """Close and return every open interval."""
+
+        closed = []
+        for i, (rule, state) in enumerate(zip(self.rules, self.states)):
+            if state.open_start is not None:
+                closed.append((rule, Interval(state.open_start, state.open_end)))
+            self.states[i] = state._replace(open_start=None, open_end=None, inactive_since=None)
+
+        return closed
+
+    def checkpoint(self) -> Dict[str, Any]:
+        """Progress and rule state as JSON-serialisable data."""
+
+        return {
+            "rows": self.rows,
+            "rules": [list(rule) for rule in self.rules],
+            "values": {name: None if np.isnan(value) else value for name, value in self.values.items()},
+            "states": [state._asdict() for state in self.states],
+        }
+
+    def restore(self, checkpoint: Dict[str, Any]) -> None:
+        """Resume from a checkpoint of the same rules."""
+
+        if [Rule(*rule) for rule in checkpoint["rules"]] != self.rules:
+            raise ValueError("Checkpoint was written for different rules")
+
+        self.rows = checkpoint["rows"]
+        self.values = {name: np.nan if value is None else value for name, value in checkpoint["values"].items()}
+        self.states = [RuleState(**state) for state in checkpoint["states"]]
+
+
+def read_chunks(
+    path: str,
+    metrics: Sequence[str],
+    timestamp_column: str = "timestamp",
+    chunk_size: int = 100_000,
+    start: int = 0,
+    table: Optional[str] = None,
+) -> Iterator[pd.DataFrame]:
+    """
+    Read metric columns in chunks from row start, indexed by nanoseconds since the epoch.
+
+    timestamp_column -- column of epoch seconds or ISO 8601 timestamps (in time order)
+    table -- SQLite table to read, path is then a SQLite database
+    """
+
+    columns = [timestamp_column, *metrics]
+
+    if table is not None:
+        import sqlite3
+
+        quoted = ", ".join('"{}"'.format(column.replace('"', '""')) for column in columns)
+        query = f'SELECT {quoted} FROM "{table}" ORDER BY 1 LIMIT -1 OFFSET ?'
+        connection = sqlite3.connect(path)
+        try:
+            chunks = pd.read_sql_query(query, connection, params=(start,), chunksize=chunk_size)
+            yield from _index(chunks, timestamp_column)
+        finally:
+            connection.close()
+    elif path.endswith(".parquet"):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Reading Parquet requires pyarrow") from None
+        yield from _index(_skip(
+            (batch.to_pandas() for batch in pq.ParquetFile(path).iter_batches(chunk_size, columns=columns)), start
+        ), timestamp_column)
+    else:
+        chunks = pd.read_csv(path, usecols=columns, chunksize=chunk_size, skiprows=range(1, start + 1))
+        yield from _index(chunks, timestamp_column)
+
+
+def _skip(chunks: Iterator[pd.DataFrame], rows: int) -> Iterator[pd.DataFrame]:
+    """Skip the first rows of chunks."""
+
+    for chunk in chunks:
+        if rows >= len(chunk):
+            rows -= len(chunk)
+            continue
+        yield chunk.iloc[rows:]
+        rows = 0
+
+
+def _index(chunks: Iterator[pd.DataFrame], timestamp_column: str) -> Iterator[pd.DataFrame]:
+    """Index chunks by their timestamps in nanoseconds since the epoch."""
+
+    for chunk in chunks:
+        timestamps = chunk.pop(timestamp_column)
+        if pd.api.types.is_numeric_dtype(timestamps):
+            index = np.round(timestamps.to_numpy(np.float64) * NANOSECONDS).astype(np.int64)
+        else:
+            index = pd.to_datetime(timestamps, utc=True).to_numpy("datetime64[ns]").astype(np.int64)
+
+        chunk.index = pd.Index(index, name="time")
+        yield chunk.astype(np.float64)
+
+
+def load_checkpoint(path: str) -> Optional[Dict[str, Any]]:
+    """Read a checkpoint, if one was written."""
+
+    if not os.path.exists(path):
+        return None
+
+    with open(path) as file:
+        return json.load(file)
+
+
+def save_checkpoint(path: str, checkpoint: Dict[str, Any]) -> None:
+    """Write a checkpoint atomically."""
+
+    temporary = f"{path}.tmp"
+    with open(temporary, "w") as file:
+        json.dump(checkpoint, file)
+    os.replace(temporary, path)
+
+
+def run(
+    path: str,
+    rules: Sequence[Rule],
+    outbox: Outbox,
+    checkpoint: Optional[str] = None,
+    timestamp_column: str = "timestamp",
+    chunk_size: int = 100_000,
+    table: Optional[str] = None,
+) -> Summary:
+    """Backfill labels of a data source into the outbox, resuming from the checkpoint file if there is one."""
+
+    backfill = Backfill(rules)
+
+    state = load_checkpoint(checkpoint) if checkpoint else None
+    if state is not None:
+        if state["source"] != os.path.abspath(path):
+            raise ValueError(f"Checkpoint {checkpoint} was written for {state['source']}")
+        backfill.restore(state)
+
+    labels = stored = 0
+
+    def store(closed: List[Tuple[Rule, Interval]]) -> None:
+        nonlocal labels, stored
+        batch = [Label.from_interval(rule.label_name, interval, rule.metric_key or "") for rule, interval in closed]
+        labels += len(batch)
+        stored += len(outbox.put(batch)) if batch else 0
+        # Labels are in the outbox before the progress is recorded
+        if checkpoint:
+            save_checkpoint(checkpoint, dict(backfill.checkpoint(), source=os.path.abspath(path)))
+
+    chunks = read_chunks(path, backfill.metrics, timestamp_column, chunk_size, backfill.rows, table)
+    for chunk in chunks:
+        store(backfill.process(chunk))
+    store(backfill.flush())
+
+    return Summary(backfill.rows, labels, stored)
+
+
+def send(outbox: Outbox, create: Any, batch_size: int = 50) -> int:
+    """Send the labels in the outbox oldest first, stopping at the first failure; returns the labels sent."""
+
+    sent = 0
+
+    while True:
+        rows = outbox.peek(batch_size)
+        if not rows:
+            return sent
+
+        done = []
+        try:
+            for i, label in rows:
+                create(label)
+                done.append(i)
+        except Exception as e:
+            print(f"Unable to create Datalabel {label.label_name}. Error: {str(e)}", file=sys.stderr)
+            outbox.failed([i])
+            return sent + len(done)
+        finally:
+            outbox.ack(done)
+
+        sent += len(done)
+
+
+def load_rules(config: Optional[str]) -> List[Rule]:
+    """Rules of an app.yaml configuration, or the single rule from the environment."""
+
+    rules = []
+    if config is not None:
+        import yaml
+
+        with open(config) as file:
+            app = yaml.safe_load(file)
+        configuration = ((app or {}).get("app") or {}).get("kelvin", {}).get("configuration") or {}
+        rules = [Rule.from_config(rule) for rule in configuration.get("rules") or []]
+
+    return rules or [Rule.from_environment(os.environ)]
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Command line entry point."""
+
+    parser = argparse.ArgumentParser(description="Backfill data labels from historical data")
+    parser.add_argument("path", help="CSV, Parquet or SQLite file with a column per rule metric")
+    parser.add_argument("--config", default="app.yaml", help="app.yaml with the rules (default: METRIC_* environment)")
+    parser.add_argument("--timestamp-column", default="timestamp", help="epoch seconds or ISO 8601 column")
+    parser.add_argument("--table", help="table of a SQLite database")
+    parser.add_argument("--chunk-size", type=int, default=100_000, help="rows read at once")
+    parser.add_argument("--checkpoint", help="progress file (default: <path>.backfill.json)")
+    parser.add_argument("--outbox", default=os.environ.get("OUTBOX_PATH") or "data/outbox.sqlite", help="label outbox")
+    parser.add_argument("--send", action="store_true", help="create the labels (URL, DLSUSER, DLPASSWORD)")
+    args = parser.parse_args(argv)
+
+    rules = load_rules(args.config if os.path.exists(args.config) else None)
+    outbox = Outbox(args.outbox, max_rows=int(os.environ.get("OUTBOX_MAX_ROWS", 100000)))
+
+    try:
+        summary = run(
+            args.path,
+            rules,
+            outbox,
+            checkpoint=args.checkpoint or f"{args.path}.backfill.json",
+            timestamp_column=args.timestamp_column,
+            chunk_size=args.chunk_size,
+            table=args.table,
+        )
+        print(f"Processed {summary.rows} rows: {summary.labels} labels, {summary.stored} new in {args.outbox}")
+
+        if args.send:
+            from kelvin.sdk.client import Client
+
+            from .data_labeling_app import create_data_label
+
+            environ = os.environ
+            client = Client.from_file(url=environ.get("URL", "fallback"), username=environ.get("DLSUSER", "fallback"))
+            client.login(password=environ.get("DLPASSWORD", "fallback"))
+            sent = send(outbox, lambda label: create_data_label(
+                client,
+                label,
+                environ.get("ACP_NAME", "fallback"),
+                environ.get("METRIC_SOURCE", "fallback"),
+                environ.get("METRIC_KEY", "fallback"),
+                environ.get("METRIC_TYPE", "fallback"),
+            ))
+            print(f"Created {sent} Datalabels, {len(outbox)} pending")
+    finally:
+        outbox.close()
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
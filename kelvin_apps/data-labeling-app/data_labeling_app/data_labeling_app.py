@@ -2,14 +2,51 @@
 Data Application.
 """
 
+import atexit
 import os
-from typing import Any
-from datetime import datetime
+from typing import Any, Sequence
 from kelvin.app import DataApplication
+from kelvin.icd import Message
 from kelvin.sdk.client import Client
 from kelvin.sdk.client.model.requests import Type
 from kelvin.sdk.client.model.requests import DataLabelCreate, DataLabelSource, Metric
 
+from .outbox import Outbox
+from .rules import Rule, RuleEngine
+from .submitter import Label, LabelSubmitter
+
+
+def create_data_label(
+    client: Client, label: Label, acp_name: str, metric_source: str, metric_key: str, metric_type: str
+) -> None:
+    """Create a data label on the platform for a metric (raises on failure)."""
+    metrics = [
+        Metric(
+                acp_name=acp_name,
+                source=metric_source,
+                key=label.metric or metric_key,
+                type=metric_type
+        )
+    ]
+
+    source = DataLabelSource(
+        type=Type.workload,
+        info={
+            'name': metric_source
+        }
+    )
+
+    label_create = DataLabelCreate(
+        label_name=label.label_name,
+        end_date=label.end_date,
+        start_date=label.start_date,
+        source=source,
+        metrics=metrics
+    )
+    client.data_label.create_data_label(
+        data=label_create
+    )
+
 
 class App(DataApplication):
     """Application."""
@@ -19,7 +56,7 @@ class App(DataApplication):
     metric_source: str
     metric_key: str
     metric_type: str
-    threshold: float
+    engine: RuleEngine
     label_name: str
 
     def on_initialize(self, *args: Any, **kwargs: Any) -> bool:
@@ -27,6 +64,11 @@ class App(DataApplication):
         self.init()
         return True
 
+    def on_shutdown(self, *args: Any, **kwargs: Any) -> Any:
+        self.close()
+        on_shutdown = getattr(super(), 'on_shutdown', None)
+        return on_shutdown(*args, **kwargs) if on_shutdown is not None else None
+
     def init(self) -> None:
         """
         Initialisation method
@@ -44,8 +86,16 @@ class App(DataApplication):
         #The label that the Datalabel will be associated to
         self.label_name = os.environ.get("LABEL_NAME", 'fallback')
 
-        #Threshold to evaluate the metric
-        self.threshold = float(os.environ.get("METRIC_THRESHOLD", 'fallback'))
+        #Rules from the configuration, all evaluated together at each sample time of a batch of inputs
+        rules = [Rule.from_config(rule) for rule in self.config.rules or []]
+        if not rules:
+            #Single rule on input_metric from the environment: METRIC_THRESHOLD, the lower
+            #METRIC_EXIT_THRESHOLD below which an exceedance ends, and MIN_GAP_SECONDS within
+            #which exceedances are merged into one label
+            rules = [Rule.from_environment(os.environ)]
+
+        self.engine = RuleEngine(rules)
+        print(f"Evaluating {len(rules)} rules on {', '.join(self.engine.metrics)}")
 
         #Environment to authenticate in
         self.url = os.environ.get("URL", 'fallback')
@@ -65,58 +115,79 @@ class App(DataApplication):
         except Exception as e:
             print(f"Unable to authenticate. Error: {str(e)}")
 
-        return True
-    
-    def create_data_label(self, start_date):
-        try:
-            metrics = [
-                Metric(
-                        acp_name=self.acp_name,
-                        source=self.metric_source,
-                        key=self.metric_key,
-                        type=self.metric_type
-                )
-            ]
-            
-            source = DataLabelSource(
-                type=Type.workload,
-                info={
-                    'name': self.metric_source
-                }
-            )
+        #Pending labels are kept on disk until created, surviving outages and restarts
+        outbox_path = os.environ.get("OUTBOX_PATH", "data/outbox.sqlite")
+        self.outbox = Outbox(
+            outbox_path,
+            max_rows=int(os.environ.get("OUTBOX_MAX_ROWS", 100000)),
+            max_attempts=int(os.environ.get("OUTBOX_MAX_ATTEMPTS", 100)),
+        ) if outbox_path else None
+        if self.outbox is not None and len(self.outbox):
+            print(f"Replaying {len(self.outbox)} pending Datalabels from {outbox_path}")
+
+        #Labels are created by a background worker in batches, retrying with backoff
+        self.submitter = LabelSubmitter(
+            self.create_data_label,
+            batch_size=int(os.environ.get("LABEL_BATCH_SIZE", 50)),
+            max_retries=int(os.environ.get("LABEL_MAX_RETRIES", 5)),
+            on_failure=self.on_label_failure,
+            outbox=self.outbox,
+        )
+
+        #Open intervals are submitted on shutdown rather than lost
+        self.closed = False
+        atexit.register(self.close)
 
-            label_create = DataLabelCreate(
-                label_name=self.label_name,
-                end_date=start_date,
-                start_date=start_date,
-                source=source,
-                metrics=metrics
-            )
-            self.client.data_label.create_data_label(
-                data=label_create
-            )
-        except Exception as e:
-            print(f"Unable to create Datalabel. Error: {str(e)}")
-
-    def process(self) -> None:
-        """Process data."""
-
-        #Get input value
-        input_metric = self.data.input_metric.value if self.data.get("input_metric", None) else None
+        return True
 
-        if not input_metric:
-            print("Metric Value does not exist")
+    def close(self) -> None:
+        """Submit the intervals still open and send (or store) the queued labels."""
+        if self.closed:
+            return
+        self.closed = True
+
+        for rule, interval in self.engine.flush():
+            label = Label.from_interval(rule.label_name, interval, rule.metric_key or "")
+            print(f"{rule.label_name} from {label.start_date} to {label.end_date} open at shutdown. Queueing Data Label...")
+            self.submitter.submit(label)
+
+        self.submitter.close()
+        if self.outbox is not None:
+            self.outbox.close()
+
+    def create_data_label(self, label: Label):
+        """Create a data label on the platform (raises on failure)."""
+        create_data_label(
+            self.client, label, self.acp_name, self.metric_source, self.metric_key, self.metric_type
+        )
+
+    def on_label_failure(self, labels):
+        for label in labels:
+            print(f"Unable to create Datalabel {label.label_name} from {label.start_date} to {label.end_date}.")
+
+    def process_data(self, data: Sequence[Message]) -> None:
+        """Evaluate the rules at every sample of a batch of inputs."""
+
+        #Samples of the rule metrics
+        index = self.engine.index
+        names, times, values = [], [], []
+        for msg in data:
+            if msg._.name in index and msg.value is not None:
+                names.append(msg._.name)
+                times.append(msg._.time_of_validity)
+                values.append(msg.value)
+
+        if not names:
             return
 
-        #Evaluate if a datalabel will be emitted 
-        if input_metric >= self.threshold:
-            print(f"Metric value {input_metric} is above threshold of {self.threshold}. Creating Data Label...")
-            current_date = datetime.now()
-            self.create_data_label(
-                start_date=current_date
-            )
-        else:
-            print(f"Metric value {input_metric} is below threshold of {self.threshold}.")
-            
+        #Evaluate every rule in one pass per sample time, a label is queued once a rule's interval closes
+        for rule, interval in self.engine.process(names, times, values):
+            label = Label.from_interval(rule.label_name, interval, rule.metric_key or "")
+            print(f"{rule.label_name} from {label.start_date} to {label.end_date} closed. Queueing Data Label...")
+            self.submitter.submit(label)
 
+    def process(self) -> None:
+        """Process data (rules are evaluated as batches of inputs arrive)."""
 
+        if self.engine.latest is None:
+            print("Metric Value does not exist")
@@ -0,0 +1,17 @@
+"""
+Threshold exceedance intervals.
+
+Intervals are found by the rule engine (see rules.RuleEngine) live and by the
+backfill offline.
+"""
+
+from typing import NamedTuple
+
+NANOSECONDS = 1_000_000_000
+
+
+class Interval(NamedTuple):
+    """An exceedance interval, nanoseconds since the epoch."""
+
+    start: int
+    end: int  # time of the last active sample
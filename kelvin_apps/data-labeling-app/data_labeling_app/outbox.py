@@ -0,0 +1,152 @@
+"""
+Durable label outbox.
+
+Labels are written to a small SQLite table (in WAL mode) before they are sent
+and deleted once the platform has accepted them, so labels survive API outages
+and restarts: whatever is left in the outbox is replayed, oldest first, when
+connectivity returns.
+
+Each label has an idempotency key, so a label queued twice is stored once.
+Disk usage is bounded by a maximum row count (the oldest labels are dropped
+beyond it), and labels failing more than max_attempts times are given up so a
+rejected label cannot block the ones behind it.
+"""
+
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Sequence, Tuple
+
+from .submitter import Label
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    key TEXT NOT NULL UNIQUE,
+    label_name TEXT NOT NULL,
+    metric TEXT NOT NULL,
+    start INTEGER NOT NULL,
+    end INTEGER NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    created REAL NOT NULL
+)
+"""
+
+
+class Outbox:
+    """SQLite-backed queue of labels pending submission."""
+
+    def __init__(self, path: str, max_rows: int = 100_000, max_attempts: int = 100) -> None:
+        """
+        Open (or create) the outbox.
+
+        max_rows -- maximum pending labels, the oldest are dropped beyond it
+        max_attempts -- failed sends after which a label is given up
+        """
+
+        self.path = path
+        self.max_rows = max_rows
+        self.max_attempts = max_attempts
+
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(SCHEMA)
+        self._lock = threading.Lock()
+
+        self.stats: Dict[str, int] = {"stored": 0, "duplicates": 0, "acked": 0, "dropped": 0, "given_up": 0}
+        self._count = self._connection.execute("SELECT COUNT(*) FROM outbox").fetchone()[0]
+
+    def close(self) -> None:
+        """Checkpoint the WAL and close the database."""
+
+        with self._lock:
+            self._connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            self._connection.close()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def put(self, labels: Sequence[Label]) -> List[Tuple[int, Label]]:
+        """Store labels (ignoring ones already stored), returning the (id, label) of the new rows."""
+
+        now = time.time()
+        stored = []
+
+        with self._lock:
+            connection = self._connection
+            connection.execute("BEGIN")
+            for label in labels:
+                cursor = connection.execute(
+                    "INSERT OR IGNORE INTO outbox (key, label_name, metric, start, end, created) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (label.key, label.label_name, label.metric, label.start, label.end, now),
+                )
+                if cursor.rowcount:
+                    stored.append((cursor.lastrowid, label))
+            inserted = len(stored)
+            self._count += inserted
+
+            excess = self._count - self.max_rows
+            if excess > 0:
+                connection.execute(
+                    "DELETE FROM outbox WHERE id IN (SELECT id FROM outbox ORDER BY id LIMIT ?)", (excess,)
+                )
+                self._count -= excess
+                self.stats["dropped"] += excess
+                first = connection.execute("SELECT MIN(id) FROM outbox").fetchone()[0]
+                stored = [(i, label) for i, label in stored if first is not None and i >= first]
+            connection.execute("COMMIT")
+
+        self.stats["stored"] += inserted
+        self.stats["duplicates"] += len(labels) - inserted
+
+        return stored
+
+    def peek(self, limit: int) -> List[Tuple[int, Label]]:
+        """Oldest pending labels and their ids."""
+
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT id, label_name, start, end, metric FROM outbox ORDER BY id LIMIT ?", (limit,)
+            ).fetchall()
+
+        return [(row[0], Label(*row[1:])) for row in rows]
+
+    def ack(self, ids: Sequence[int]) -> None:
+        """Delete labels accepted by the platform."""
+
+        if not ids:
+            return
+
+        with self._lock:
+            connection = self._connection
+            connection.execute("BEGIN")
+            deleted = connection.executemany("DELETE FROM outbox WHERE id = ?", [(i,) for i in ids]).rowcount
+            connection.execute("COMMIT")
+            self._count -= deleted
+
+        self.stats["acked"] += deleted
+
+    def failed(self, ids: Sequence[int]) -> List[Label]:
+        """Count a failed send of labels, returning the labels given up after max_attempts."""
+
+        if not ids:
+            return []
+
+        with self._lock:
+            connection = self._connection
+            connection.execute("BEGIN")
+            connection.executemany("UPDATE outbox SET attempts = attempts + 1 WHERE id = ?", [(i,) for i in ids])
+            marks = ",".join("?" * len(ids))
+            rows = connection.execute(
+                f"SELECT id, label_name, start, end, metric FROM outbox WHERE id IN ({marks}) AND attempts >= ?",
+                (*ids, self.max_attempts),
+            ).fetchall()
+            connection.executemany("DELETE FROM outbox WHERE id = ?", [(row[0],) for row in rows])
+            connection.execute("COMMIT")
+            self._count -= len(rows)
+
+        self.stats["given_up"] += len(rows)
+
+        return [Label(*row[1:]) for row in rows]
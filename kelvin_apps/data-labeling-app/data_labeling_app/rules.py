@@ -0,0 +1,222 @@
+"""
+Threshold rule engine.
+
+A table of rules (metric, operator, threshold, duration, label name) is
+compiled into arrays so that every rule is evaluated against the latest
+values in one vectorised pass per evaluation, with the per-rule hysteresis,
+duration and interval coalescing state also held in arrays. A batch of inputs
+is evaluated at each of its sample times, so no sample between ticks is missed.
+
+A rule is active once its condition has held for its duration; the label
+interval starts when the condition started to hold. With an exit threshold the
+condition keeps holding until the value crosses the exit threshold instead
+(hysteresis), and inactivity shorter than min_gap extends the open interval.
+"""
+
+from typing import Any, Dict, Iterable, List, Mapping, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .intervals import NANOSECONDS, Interval
+
+OPERATORS = {
+    ">": np.greater,
+    ">=": np.greater_equal,
+    "<": np.less,
+    "<=": np.less_equal,
+    "==": np.equal,
+    "!=": np.not_equal,
+}
+
+NONE = np.iinfo(np.int64).min  # no time
+
+
+class Rule(NamedTuple):
+    """A threshold rule."""
+
+    metric: str
+    operator: str
+    threshold: float
+    label_name: str
+    duration: float = 0.0  # seconds the condition must hold
+    exit_threshold: Optional[float] = None  # hysteresis
+    min_gap: float = 0.0  # seconds of inactivity merged into an interval
+    metric_key: Optional[str] = None  # platform metric the label applies to
+
+    @classmethod
+    def from_config(cls, config: Mapping[str, Any]) -> "Rule":
+        """Create a rule from a rules configuration entry."""
+
+        exit_threshold = config.get("exit_threshold", None)
+
+        return cls(
+            metric=config.get("metric", None),
+            operator=config.get("operator", None) or ">=",
+            threshold=float(config.get("threshold", None)),
+            label_name=config.get("label_name", None),
+            duration=float(config.get("duration", None) or 0.0),
+            exit_threshold=None if exit_threshold is None else float(exit_threshold),
+            min_gap=float(config.get("min_gap", None) or 0.0),
+            metric_key=config.get("metric_key", None),
+        )
+
+    @classmethod
+    def from_environment(cls, environ: Mapping[str, str]) -> "Rule":
+        """Single rule on input_metric from the METRIC_* environment variables."""
+
+        threshold = float(environ.get("METRIC_THRESHOLD", "fallback"))
+
+        return cls(
+            metric="input_metric",
+            operator=">=",
+            threshold=threshold,
+            label_name=environ.get("LABEL_NAME", "fallback"),
+            exit_threshold=float(environ.get("METRIC_EXIT_THRESHOLD", threshold)),
+            min_gap=float(environ.get("MIN_GAP_SECONDS", 0)),
+            metric_key=environ.get("METRIC_KEY", "fallback"),
+        )
+
+    def validate(self) -> None:
+        """Check the rule is consistent."""
+
+        if self.operator not in OPERATORS:
+            raise ValueError(f"Unknown operator {self.operator!r}, expected one of {', '.join(OPERATORS)}")
+        if not self.metric or not self.label_name:
+            raise ValueError("Rules need a metric and a label_name")
+        if self.exit_threshold is not None:
+            if self.operator in ("==", "!="):
+                raise ValueError(f"exit_threshold is not available for {self.operator!r}")
+            rising = self.operator in (">", ">=")
+            if (self.exit_threshold > self.threshold) if rising else (self.exit_threshold < self.threshold):
+                raise ValueError(f"exit_threshold {self.exit_threshold} is inside the threshold of {self}")
+
+
+class RuleEngine:
+    """Vectorised evaluation of a rule table."""
+
+    def __init__(self, rules: Sequence[Rule]) -> None:
+        for rule in rules:
+            rule.validate()
+
+        self.rules = list(rules)
+        self.metrics = sorted({rule.metric for rule in self.rules})
+        self.index: Dict[str, int] = {name: i for i, name in enumerate(self.metrics)}
+
+        size = len(self.rules)
+        self._metric = np.array([self.index[rule.metric] for rule in self.rules], dtype=np.int64)
+        self._enter = np.array([rule.threshold for rule in self.rules], dtype=np.float64)
+        self._exit = np.array(
+            [rule.threshold if rule.exit_threshold is None else rule.exit_threshold for rule in self.rules],
+            dtype=np.float64,
+        )
+        self._duration = np.array([int(rule.duration * NANOSECONDS) for rule in self.rules], dtype=np.int64)
+        self._min_gap = np.array([int(rule.min_gap * NANOSECONDS) for rule in self.rules], dtype=np.int64)
+        self._operators: List[Tuple[np.ufunc, np.ndarray]] = [
+            (function, np.flatnonzero([rule.operator == operator for rule in self.rules]))
+            for operator, function in OPERATORS.items()
+            if any(rule.operator == operator for rule in self.rules)
+        ]
+
+        # Latest value per metric
+        self.values = np.full(len(self.metrics), np.nan)
+        self.latest: Optional[int] = None
+
+        # Per rule: condition (with hysteresis), since when it holds, and the open interval
+        self._holding = np.zeros(size, dtype=bool)
+        self._since = np.full(size, NONE, dtype=np.int64)
+        self._open_start = np.full(size, NONE, dtype=np.int64)
+        self._open_end = np.full(size, NONE, dtype=np.int64)
+        self._inactive_since = np.full(size, NONE, dtype=np.int64)
+
+    def push(self, names: Iterable[str], times: Sequence[int], values: Sequence[float]) -> None:
+        """Update the latest values with a batch of samples (unknown metrics are ignored)."""
+
+        index = self.index
+        metrics = np.fromiter((index.get(name, -1) for name in names), dtype=np.int64)
+        times = np.asarray(times, dtype=np.int64)
+        values = np.asarray(values, dtype=np.float64)
+
+        known = metrics >= 0
+        if not known.any():
+            return
+        metrics, times, values = metrics[known], times[known], values[known]
+
+        # Last sample per metric, in time order
+        order = np.argsort(times, kind="stable")[::-1]
+        metrics, first = np.unique(metrics[order], return_index=True)
+        self.values[metrics] = values[order][first]
+
+        latest = int(times.max())
+        if self.latest is None or latest > self.latest:
+            self.latest = latest
+
+    def process(self, names: Sequence[str], times: Sequence[int], values: Sequence[float]) -> List[Tuple[Rule, Interval]]:
+        """Push and evaluate a batch of samples at each of its times in order, returning the intervals closed."""
+
+        names = np.asarray(names, dtype=object)
+        times = np.asarray(times, dtype=np.int64)
+        values = np.asarray(values, dtype=np.float64)
+
+        order = np.argsort(times, kind="stable")
+        names, times, values = names[order], times[order], values[order]
+        bounds = np.flatnonzero(np.diff(times)) + 1
+
+        closed = []
+        for start, end in zip(np.concatenate([[0], bounds]).tolist(), np.concatenate([bounds, [len(times)]]).tolist()):
+            self.push(names[start:end], times[start:end], values[start:end])
+            closed += self.evaluate(int(times[start]))
+
+        return closed
+
+    def conditions(self) -> np.ndarray:
+        """Whether each rule's condition holds for the latest values (with hysteresis)."""
+
+        values = self.values[self._metric]
+        thresholds = np.where(self._holding, self._exit, self._enter)
+        holding = np.zeros(len(self.rules), dtype=bool)
+
+        with np.errstate(invalid="ignore"):
+            for function, rules in self._operators:
+                holding[rules] = function(values[rules], thresholds[rules])
+
+        return holding & ~np.isnan(values)
+
+    def evaluate(self, now: Optional[int] = None) -> List[Tuple[Rule, Interval]]:
+        """Evaluate every rule at now (default: the latest sample), returning the intervals closed."""
+
+        now = self.latest if now is None else now
+        if now is None:
+            return []
+
+        holding = self._holding = self.conditions()
+        self._since = np.where(holding, np.where(self._since == NONE, now, self._since), NONE)
+        active = holding & (now - self._since >= self._duration)
+
+        # Close open intervals after min_gap of inactivity (or when a new one starts after it)
+        is_open = self._open_start != NONE
+        self._inactive_since = np.where(
+            is_open & ~active & (self._inactive_since == NONE), now, self._inactive_since
+        )
+        closing = is_open & (self._inactive_since != NONE) & (now - self._inactive_since >= self._min_gap)
+        closed = [
+            (self.rules[i], Interval(int(self._open_start[i]), int(self._open_end[i])))
+            for i in np.flatnonzero(closing).tolist()
+        ]
+        self._open_start[closing] = self._open_end[closing] = NONE
+
+        # Open or extend intervals of the active rules
+        opening = active & (self._open_start == NONE)
+        self._open_start[opening] = self._since[opening]
+        self._open_end[active] = now
+        self._inactive_since[active | closing] = NONE
+
+        return closed
+
+    def flush(self) -> List[Tuple[Rule, Interval]]:
+        """Close and return every open interval."""
+
+        is_open = np.flatnonzero(self._open_start != NONE).tolist()
+        closed = [(self.rules[i], Interval(int(self._open_start[i]), int(self._open_end[i]))) for i in is_open]
+        self._open_start[:] = self._open_end[:] = self._inactive_since[:] = NONE
+
+        return closed
@@ -0,0 +1,244 @@
+"""
+Background label submission.
+
+Labels are queued without blocking the caller and sent by a worker thread in
+batches. Labels that fail are retried with exponential backoff (and jitter);
+labels that still fail after the retries are handed to a failure callback.
+
+With an outbox, each batch is written to it before sending and labels are only
+removed once sent. Failed labels stay in the outbox, which is drained (oldest
+first, with the same backoff) whenever the worker is otherwise idle, including
+labels left over from before a restart.
+"""
+
+import hashlib
+import random
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Callable, Deque, Dict, List, NamedTuple, Optional, Sequence
+
+from .intervals import NANOSECONDS, Interval
+
+
+class Label(NamedTuple):
+    """A data label to create for an interval."""
+
+    label_name: str
+    start: int  # nanoseconds since the epoch
+    end: int
+    metric: str = ""  # metric the label applies to
+
+    @classmethod
+    def from_interval(cls, label_name: str, interval: Interval, metric: str = "") -> "Label":
+        """Label of an interval."""
+
+        return cls(label_name, interval.start, interval.end, metric)
+
+    @property
+    def key(self) -> str:
+        """Idempotency key: the same label always has the same key."""
+
+        return hashlib.sha1(f"{self.label_name}|{self.metric}|{self.start}|{self.end}".encode()).hexdigest()
+
+    @property
+    def start_date(self) -> datetime:
+        return datetime.fromtimestamp(self.start / NANOSECONDS, timezone.utc)
+
+    @property
+    def end_date(self) -> datetime:
+        return datetime.fromtimestamp(self.end / NANOSECONDS, timezone.utc)
+
+
+class LabelSubmitter:
+    """Queue labels and submit them in batches from a background thread."""
+
+    def __init__(
+        self,
+        send: Callable[[Label], None],
+        batch_size: int = 50,
+        flush_interval: float = 1.0,
+        max_retries: int = 5,
+        backoff: float = 0.5,
+        max_backoff: float = 30.0,
+        on_failure: Optional[Callable[[Sequence[Label]], None]] = None,
+        outbox=None,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        """
+        Create the submitter and start its worker.
+
+        send -- create one label, raising on failure
+        batch_size -- maximum labels sent per batch
+        flush_interval -- maximum seconds a queued label waits for a batch to fill
+        max_retries -- retries of a failing label before it is given up
+        backoff, max_backoff -- first and maximum retry delay (seconds), doubling per retry
+        on_failure -- called with the labels given up
+        outbox -- durable store of pending labels (see outbox.Outbox), replacing
+            in-memory retries
+        """
+
+        self.send = send
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.on_failure = on_failure
+        self.outbox = outbox
+        self.sleep = sleep
+
+        # Outbox draining: backlog size and when to next try after failures
+        self._backlog = len(outbox) if outbox is not None else 0
+        self._failures = 0
+        self._next_drain = 0.0
+
+        self._queue: Deque[Label] = deque()
+        self._condition = threading.Condition()
+        self._closed = False
+        self._in_flight = 0
+
+        self.stats: Dict[str, int] = {"queued": 0, "sent": 0, "retried": 0, "failed": 0, "batches": 0}
+
+        self._thread = threading.Thread(target=self._run, name="label-submitter", daemon=True)
+        self._thread.start()
+
+    def submit(self, label: Label) -> None:
+        """Queue a label (never blocks on the network)."""
+
+        with self._condition:
+            self._queue.append(label)
+            self.stats["queued"] += 1
+            self._condition.notify()
+
+    @property
+    def pending(self) -> int:
+        """Labels queued, being sent or in the outbox."""
+
+        with self._condition:
+            return len(self._queue) + max(self._in_flight, self._backlog)
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """Send the queued labels (or store them in the outbox) and stop the worker."""
+
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        self._thread.join(timeout)
+
+    def _run(self) -> None:
+        queue = self._queue
+
+        while True:
+            with self._condition:
+                # Wait for a full batch, or flush_interval after the first label was queued
+                # or until the outbox is due to be drained
+                deadline = None
+                while not self._closed and len(queue) < self.batch_size:
+                    timeout = None
+                    if queue:
+                        if deadline is None:
+                            deadline = time.monotonic() + self.flush_interval
+                        timeout = deadline - time.monotonic()
+                        if timeout <= 0:
+                            break
+                    if self._backlog:
+                        drain = self._next_drain - time.monotonic()
+                        if drain <= 0 and not queue:
+                            break
+                        timeout = drain if timeout is None else min(timeout, drain)
+                    self._condition.wait(timeout)
+
+                if not queue and (self._closed or not self._backlog):
+                    return  # closed
+                batch = [queue.popleft() for _ in range(min(self.batch_size, len(queue)))]
+                self._in_flight = len(batch)
+                closed = self._closed
+
+            try:
+                if self.outbox is None:
+                    self._send_batch(batch)
+                else:
+                    self._store(batch)
+                    if not closed:
+                        self._drain()
+            finally:
+                with self._condition:
+                    self._in_flight = 0
+
+    def _send_batch(self, batch: List[Label]) -> None:
+        """Send a batch, retrying the labels that fail."""
+
+        self.stats["batches"] += 1
+        attempt = 0
+
+        while batch:
+            failed = []
+            for label in batch:
+                try:
+                    self.send(label)
+                except Exception:
+                    failed.append(label)
+            self.stats["sent"] += len(batch) - len(failed)
+
+            if not failed:
+                return
+            if attempt >= self.max_retries:
+                self.stats["failed"] += len(failed)
+                if self.on_failure is not None:
+                    self.on_failure(failed)
+                return
+
+            self.sleep(self._delay(attempt))
+            attempt += 1
+            self.stats["retried"] += len(failed)
+            batch = failed
+
+    def _delay(self, attempt: int) -> float:
+        """Backoff before a retry, with jitter."""
+
+        return min(self.backoff * 2 ** attempt, self.max_backoff) * random.uniform(0.5, 1.0)
+
+    def _store(self, batch: List[Label]) -> None:
+        """Write a batch to the outbox."""
+
+        if batch:
+            self.stats["batches"] += 1
+            self.outbox.put(batch)
+            self._backlog = len(self.outbox)
+
+    def _drain(self) -> None:
+        """Send a batch from the outbox, oldest first, stopping at the first failure."""
+
+        outbox = self.outbox
+
+        if time.monotonic() < self._next_drain:
+            return
+
+        rows = outbox.peek(self.batch_size)
+
+        sent, failed = [], []
+        for i, label in rows:
+            try:
+                self.send(label)
+            except Exception:
+                failed.append(i)
+                break  # probably unreachable, keep the rest for the next attempt
+            sent.append(i)
+
+        outbox.ack(sent)
+        self.stats["sent"] += len(sent)
+
+        if failed:
+            given_up = outbox.failed(failed)
+            self.stats["retried"] += len(failed) - len(given_up)
+            self.stats["failed"] += len(given_up)
+            if given_up and self.on_failure is not None:
+                self.on_failure(given_up)
+            self._next_drain = time.monotonic() + self._delay(self._failures)
+            self._failures += 1
+        else:
+            self._failures = 0
+
+        self._backlog = len(outbox)
@@ -6,5 +6,8 @@ setup(
     author='Author',
     author_email='Email',
     description='Package description',
-    packages=find_packages()
-)
\ No newline at end of file
+    packages=find_packages(),
+    entry_points={
+        'console_scripts': ['label-backfill=data_labeling_app.backfill:main'],
+    },
+)
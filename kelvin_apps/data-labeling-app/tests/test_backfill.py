@@ -0,0 +1,181 @@
+"""
+Backfill Tests.
+"""
+
+import sqlite3
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_labeling_app.backfill import Backfill, load_checkpoint, read_chunks, run, send
+from data_labeling_app.intervals import NANOSECONDS
+from data_labeling_app.outbox import Outbox
+from data_labeling_app.rules import Rule, RuleEngine
+
+RULES = [
+    Rule("a", ">=", 1, "a-high", exit_threshold=-1, min_gap=3),
+    Rule("a", "<", -2, "a-low", duration=2),
+    Rule("b", ">", 0.5, "b-high", duration=1, min_gap=2),
+    Rule("b", "!=", 0, "b-nonzero"),
+]
+
+
+def history(size: int, seed: int = 0) -> pd.DataFrame:
+    """Random walks of a and b at irregular times, each missing on some rows."""
+
+    rng = np.random.default_rng(seed)
+    data = pd.DataFrame({
+        "timestamp": np.cumsum(rng.integers(1, 3, size)).astype(float),
+        "a": np.cumsum(rng.normal(0, 1, size)),
+        "b": np.round(rng.normal(0, 1, size)),
+    })
+    data.loc[rng.random(size) < 0.2, "a"] = np.nan
+    data.loc[rng.random(size) < 0.2, "b"] = np.nan
+
+    return data
+
+
+def intervals(closed) -> list:
+    """Sorted (label, start, end) of closed intervals."""
+
+    return sorted((rule.label_name, interval.start, interval.end) for rule, interval in closed)
+
+
+def live(data: pd.DataFrame) -> list:
+    """Intervals of the live rule engine evaluated at every row."""
+
+    engine = RuleEngine(RULES)
+    closed = []
+    for row in data.itertuples(index=False):
+        names = [name for name in ("a", "b") if not np.isnan(getattr(row, name))]
+        time = int(row.timestamp * NANOSECONDS)
+        if names:
+            engine.push(names, [time] * len(names), [getattr(row, name) for name in names])
+        closed += engine.evaluate(time)
+    closed += engine.flush()
+
+    return intervals(closed)
+
+
+@pytest.fixture
+def data() -> pd.DataFrame:
+    """Historical data."""
+
+    return history(2000)
+
+
+@pytest.fixture
+def source(tmp_path: Path, data: pd.DataFrame) -> str:
+    """Historical data as CSV."""
+
+    path = str(tmp_path / "history.csv")
+    data.to_csv(path, index=False)
+
+    return path
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 2000])
+def test_matches_live(data: pd.DataFrame, source: str, chunk_size: int) -> None:
+    """Test that the backfill finds the same intervals as the live engine, whatever the chunking."""
+
+    backfill = Backfill(RULES)
+    closed = []
+    for chunk in read_chunks(source, backfill.metrics, chunk_size=chunk_size):
+        closed += backfill.process(chunk)
+    closed += backfill.flush()
+
+    assert backfill.rows == len(data)
+    assert intervals(closed) == live(data)
+
+
+def test_sources(tmp_path: Path, data: pd.DataFrame, source: str) -> None:
+    """Test that CSV, Parquet and SQLite sources read the same chunks, from any row."""
+
+    pytest.importorskip("pyarrow")
+
+    parquet = str(tmp_path / "history.parquet")
+    data.to_parquet(parquet)
+
+    database = str(tmp_path / "history.sqlite")
+    with sqlite3.connect(database) as connection:
+        data.to_sql("metrics", connection, index=False)
+
+    expected = pd.concat(read_chunks(source, ["a", "b"], chunk_size=300, start=150))
+
+    for path, table in [(parquet, None), (database, "metrics")]:
+        result = pd.concat(read_chunks(path, ["a", "b"], chunk_size=300, start=150, table=table))
+        pd.testing.assert_frame_equal(result, expected)
+
+    assert len(expected) == len(data) - 150
+    assert expected.index[0] == int(data.timestamp[150] * NANOSECONDS)
+
+
+def test_resume(tmp_path: Path, data: pd.DataFrame, source: str) -> None:
+    """Test that an interrupted backfill resumes from its checkpoint, storing every label once."""
+
+    checkpoint = str(tmp_path / "backfill.json")
+    outbox = Outbox(str(tmp_path / "outbox.sqlite"))
+    put, calls = outbox.put, []
+
+    def interrupt(labels):
+        calls.append(len(labels))
+        if len(calls) == 5:
+            raise KeyboardInterrupt
+        return put(labels)
+
+    outbox.put = interrupt
+    with pytest.raises(KeyboardInterrupt):
+        run(source, RULES, outbox, checkpoint=checkpoint, chunk_size=100)
+
+    assert load_checkpoint(checkpoint)["rows"] == 400
+
+    outbox.put = put
+    summary = run(source, RULES, outbox, checkpoint=checkpoint, chunk_size=100)
+    expected = live(data)
+
+    assert summary.rows == len(data)
+    assert len(outbox) == len(expected)
+    assert sorted((label.label_name, label.start, label.end) for _, label in outbox.peek(10000)) == expected
+
+    # Finished: running again adds nothing
+    assert run(source, RULES, outbox, checkpoint=checkpoint, chunk_size=100).labels == 0
+
+    with pytest.raises(ValueError):
+        run(source, RULES[:1], outbox, checkpoint=checkpoint)
+
+
+def test_send(tmp_path: Path, data: pd.DataFrame, source: str) -> None:
+    """Test that sending drains the outbox and stops at the first failure."""
+
+    outbox = Outbox(str(tmp_path / "outbox.sqlite"))
+    run(source, RULES, outbox)
+    total = len(outbox)
+    created = []
+
+    def create(label) -> None:
+        if len(created) == 10:
+            created.append(None)
+            raise ConnectionError("unreachable")
+        created.append(label)
+
+    assert send(outbox, create, batch_size=4) == 10
+    assert len(outbox) == total - 10
+
+    assert send(outbox, created.append) == total - 10
+    assert len(outbox) == 0
+
+
+@pytest.mark.parametrize("size", [100_000, 1_000_000])
+def test_benchmark_backfill(benchmark, size: int) -> None:
+    """Benchmark evaluating the rules over size rows."""
+
+    data = history(size)
+    chunk = data.set_index((data.pop("timestamp") * NANOSECONDS).astype(np.int64))
+
+    def backfill() -> list:
+        backfill = Backfill(RULES)
+        return backfill.process(chunk) + backfill.flush()
+
+    benchmark.pedantic(backfill, rounds=3)
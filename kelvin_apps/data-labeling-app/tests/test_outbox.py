@@ -0,0 +1,194 @@
+"""
+Outbox Tests.
+"""
+
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from data_labeling_app.intervals import Interval
+from data_labeling_app.outbox import Outbox
+from data_labeling_app.submitter import Label, LabelSubmitter
+
+
+class LabelApi:
+    """Local stand-in for the label API, storing labels by idempotency key."""
+
+    def __init__(self, latency: float = 0.0) -> None:
+        self.latency = latency
+        self.labels = {}
+        self.calls = 0
+        self.down = False
+        self.lock = threading.Lock()
+
+    def create(self, label: Label) -> None:
+        if self.latency:
+            time.sleep(self.latency)
+        with self.lock:
+            self.calls += 1
+            if self.down:
+                raise ConnectionError("platform unreachable")
+            self.labels[label.key] = label
+
+
+def labels(count: int, offset: int = 0) -> list:
+    """Labels one second apart."""
+
+    return [
+        Label.from_interval("label", Interval(i * 10 ** 9, i * 10 ** 9 + 1), "metric")
+        for i in range(offset, offset + count)
+    ]
+
+
+def wait_for(condition, timeout: float = 5.0) -> None:
+    """Wait until condition() is true."""
+
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+@pytest.fixture
+def path(tmp_path: Path) -> str:
+    """Outbox path fixture."""
+
+    return str(tmp_path / "outbox.sqlite")
+
+
+def test_idempotent_put_and_ack(path: str) -> None:
+    """Test that labels are stored once per key and removed when acknowledged."""
+
+    outbox = Outbox(path)
+
+    stored = outbox.put(labels(3))
+    assert [label for _, label in stored] == labels(3)
+    assert outbox.put(labels(3)) == []
+    assert len(outbox) == 3
+    assert outbox.stats["duplicates"] == 3
+
+    rows = outbox.peek(2)
+    assert [label for _, label in rows] == labels(2)
+
+    outbox.ack([i for i, _ in rows])
+    assert [label for _, label in outbox.peek(10)] == labels(1, 2)
+    outbox.close()
+
+
+def test_bounded(path: str) -> None:
+    """Test that the oldest labels are dropped beyond max_rows."""
+
+    outbox = Outbox(path, max_rows=5)
+
+    outbox.put(labels(3))
+    stored = outbox.put(labels(4, 3))
+
+    assert len(outbox) == 5
+    assert outbox.stats["dropped"] == 2
+    assert len(stored) == 4
+    assert [label for _, label in outbox.peek(10)] == labels(5, 2)
+
+    # More new labels than fit at once: only the newest are kept
+    stored = outbox.put(labels(7, 10))
+    assert [label for _, label in stored] == labels(5, 12)
+    outbox.close()
+
+
+def test_give_up_after_max_attempts(path: str) -> None:
+    """Test that a label failing max_attempts times is given up."""
+
+    outbox = Outbox(path, max_attempts=2)
+    (i, label), = outbox.put(labels(1))
+
+    assert outbox.failed([i]) == []
+    assert outbox.failed([i]) == [label]
+    assert len(outbox) == 0
+
+
+def test_replay_on_restart(path: str) -> None:
+    """Test that labels pending at shutdown are sent after a restart."""
+
+    api = LabelApi()
+    api.down = True
+
+    submitter = LabelSubmitter(api.create, batch_size=10, flush_interval=0.01, backoff=10.0, outbox=Outbox(path))
+    for label in labels(25):
+        submitter.submit(label)
+    wait_for(lambda: api.calls)
+    submitter.close(timeout=5)
+    submitter.outbox.close()
+
+    assert not api.labels
+    assert len(Outbox(path)) == 25
+
+    api.down = False
+    outbox = Outbox(path)
+    submitter = LabelSubmitter(api.create, batch_size=10, flush_interval=0.01, outbox=outbox)
+    wait_for(lambda: len(outbox) == 0)
+    submitter.close(timeout=5)
+
+    assert sorted(api.labels.values()) == sorted(labels(25))
+
+
+def test_outage_and_recovery(path: str) -> None:
+    """Test that labels queued during an outage are sent once connectivity returns."""
+
+    api = LabelApi()
+    outbox = Outbox(path)
+    submitter = LabelSubmitter(api.create, batch_size=10, flush_interval=0.01, backoff=0.05, max_backoff=0.05,
+                               outbox=outbox)
+
+    submitter.submit(labels(1)[0])
+    wait_for(lambda: len(api.labels) == 1)
+
+    api.down = True
+    for label in labels(30, 1):
+        submitter.submit(label)
+    wait_for(lambda: submitter.stats["retried"] >= 2)
+    assert len(api.labels) == 1
+
+    api.down = False
+    wait_for(lambda: len(api.labels) == 31)
+    submitter.close(timeout=5)
+
+    assert len(outbox) == 0
+    assert submitter.pending == 0
+
+
+@pytest.mark.parametrize("count", [1_000, 10_000])
+def test_benchmark_put(benchmark, tmp_path: Path, count: int) -> None:
+    """Benchmark storing labels in batches of 50."""
+
+    outbox = Outbox(str(tmp_path / "outbox.sqlite"), max_rows=10 ** 7)
+    batches = [labels(50, i) for i in range(0, count, 50)]
+    rounds = iter(range(1 << 30))
+
+    def put():
+        offset = next(rounds) * 10 ** 6  # new keys every round
+        for batch in batches:
+            outbox.put([label._replace(start=label.start + offset) for label in batch])
+
+    benchmark(put)
+
+
+@pytest.mark.parametrize("count", [1_000, 10_000])
+def test_benchmark_drain(benchmark, tmp_path: Path, count: int) -> None:
+    """Benchmark storing and draining labels through the submitter to the stand-in API."""
+
+    api = LabelApi()
+    rounds = iter(range(1 << 30))
+
+    def drain():
+        outbox = Outbox(str(tmp_path / f"outbox-{next(rounds)}.sqlite"))
+        submitter = LabelSubmitter(api.create, batch_size=100, flush_interval=0.001, outbox=outbox)
+        for label in labels(count):
+            submitter.submit(label)
+        wait_for(lambda: submitter.stats["sent"] == count, timeout=60)
+        submitter.close()
+        outbox.close()
+
+    benchmark.pedantic(drain, rounds=3)
+
+    assert len(api.labels) == count
@@ -0,0 +1,168 @@
+"""
+Rule Engine Tests.
+"""
+
+import numpy as np
+import pytest
+
+from data_labeling_app.intervals import NANOSECONDS, Interval
+from data_labeling_app.rules import Rule, RuleEngine
+
+
+def run(engine: RuleEngine, samples) -> list:
+    """Intervals (rule label, start and end seconds) of (seconds, {metric: value}) samples, flushed at the end."""
+
+    closed = []
+    for time, values in samples:
+        engine.push(list(values), [time * NANOSECONDS] * len(values), list(values.values()))
+        closed += engine.evaluate()
+    closed += engine.flush()
+
+    return [(rule.label_name, interval.start // NANOSECONDS, interval.end // NANOSECONDS) for rule, interval in closed]
+
+
+def test_operators() -> None:
+    """Test that each operator compares the metric to its threshold."""
+
+    operators = [">", ">=", "<", "<=", "==", "!="]
+    engine = RuleEngine([Rule("x", operator, 1, operator) for operator in operators])
+
+    samples = [(t, {"x": value}) for t, value in enumerate([0, 1, 2])]
+    result = sorted(run(engine, samples))
+
+    assert result == sorted([
+        (">", 2, 2), (">=", 1, 2), ("<", 0, 0), ("<=", 0, 1), ("==", 1, 1), ("!=", 0, 0), ("!=", 2, 2),
+    ])
+
+
+def test_duration() -> None:
+    """Test that a rule is only active once its condition has held for the duration."""
+
+    engine = RuleEngine([Rule("x", ">", 5, "long", duration=2)])
+
+    values = [6, 6, 0, 6, 6, 6, 6, 0]
+    result = run(engine, [(t, {"x": value}) for t, value in enumerate(values)])
+
+    # The first exceedance is too short, the second starts when the condition started to hold
+    assert result == [("long", 3, 6)]
+
+
+def test_metrics_are_independent() -> None:
+    """Test that rules only see their own metric and unknown or missing metrics are ignored."""
+
+    engine = RuleEngine([Rule("a", ">", 0, "a"), Rule("b", "<", 0, "b")])
+
+    samples = [
+        (0, {"a": 1, "other": 5}),
+        (1, {"b": -1}),
+        (2, {"a": 0, "b": 0}),
+    ]
+
+    assert sorted(run(engine, samples)) == [("a", 0, 1), ("b", 1, 1)]
+
+
+def test_latest_sample_wins() -> None:
+    """Test that the latest sample of a metric in a batch is used, whatever the order."""
+
+    engine = RuleEngine([Rule("x", ">", 5, "x")])
+    engine.push(["x", "x", "x"], [3, 1, 2], [10, 0, 0])
+
+    assert engine.latest == 3
+    assert engine.values.tolist() == [10]
+
+
+def test_validation() -> None:
+    """Test that inconsistent rules are rejected."""
+
+    with pytest.raises(ValueError):
+        RuleEngine([Rule("x", "=>", 1, "x")])
+    with pytest.raises(ValueError):
+        RuleEngine([Rule("x", ">", 1, "x", exit_threshold=2)])
+    with pytest.raises(ValueError):
+        RuleEngine([Rule("x", "<", 1, "x", exit_threshold=0)])
+    with pytest.raises(ValueError):
+        RuleEngine([Rule("x", "==", 1, "x", exit_threshold=1)])
+
+    rule = Rule.from_config({"metric": "x", "threshold": "3", "label_name": "x", "exit_threshold": 2})
+
+    assert rule == Rule("x", ">=", 3.0, "x", exit_threshold=2.0)
+
+
+def test_hysteresis() -> None:
+    """Test that a condition holds until the value crosses the exit threshold."""
+
+    engine = RuleEngine([Rule("x", ">=", 10, "x", exit_threshold=8)])
+
+    values = [5, 10, 9, 8, 7.9, 9, 11]
+    assert run(engine, [(t, {"x": value}) for t, value in enumerate(values)]) == [("x", 1, 3), ("x", 6, 6)]
+
+
+@pytest.mark.parametrize("min_gap, expected", [(0, [(0, 1), (3, 3), (9, 9)]), (2, [(0, 3), (9, 9)])])
+def test_min_gap(min_gap: float, expected: list) -> None:
+    """Test that inactivity shorter than min_gap extends the open interval."""
+
+    engine = RuleEngine([Rule("x", ">", 0, "x", min_gap=min_gap)])
+
+    samples = [(0, 1), (1, 1), (2, 0), (3, 1), (4, 0), (5, 0), (9, 1), (10, 0)]
+    result = run(engine, [(t, {"x": value}) for t, value in samples])
+
+    assert result == [("x", start, end) for start, end in expected]
+
+
+def test_closed_once() -> None:
+    """Test that an interval is returned once, when it closes."""
+
+    rule = Rule("x", ">", 0, "x", min_gap=1)
+    engine = RuleEngine([rule])
+
+    def evaluate(seconds: int, value: float) -> list:
+        engine.push(["x"], [seconds * NANOSECONDS], [value])
+        return engine.evaluate()
+
+    assert evaluate(0, 1) == []
+    assert evaluate(1, 1) == []
+    assert evaluate(2, 0) == []
+    assert evaluate(3, 0) == [(rule, Interval(0, NANOSECONDS))]
+    assert evaluate(4, 0) == []
+    assert engine.flush() == []
+
+
+def test_process() -> None:
+    """Test that a batch is evaluated at each of its sample times, not only at its latest values."""
+
+    samples = [(5, {"x": 0}), (1, {"x": 10}), (2, {"x": 10, "y": 1}), (3, {"x": 0}), (4, {"y": 0})]
+    rules = [Rule("x", ">", 5, "x"), Rule("y", ">", 0, "y")]
+
+    engine = RuleEngine(rules)
+    names, times, values = zip(*(
+        (name, time * NANOSECONDS, value) for time, metrics in samples for name, value in metrics.items()
+    ))
+    closed = engine.process(names, times, values) + engine.flush()
+
+    expected = run(RuleEngine(rules), sorted(samples, key=lambda sample: sample[0]))
+
+    assert sorted((rule.label_name, i.start // NANOSECONDS, i.end // NANOSECONDS) for rule, i in closed) == sorted(expected)
+    assert sorted(expected) == [("x", 1, 2), ("y", 2, 3)]
+
+
+@pytest.mark.parametrize("size", [10, 100, 1000])
+def test_benchmark_evaluate(benchmark, size: int) -> None:
+    """Benchmark a batch of every metric against size rules (four rules per metric)."""
+
+    operators = [">", ">=", "<", "<="]
+    rules = [
+        Rule(f"metric_{i // 4}", operators[i % 4], 0.0, f"rule_{i}", duration=1, min_gap=2)
+        for i in range(size)
+    ]
+    engine = RuleEngine(rules)
+
+    rng = np.random.default_rng(0)
+    names = engine.metrics
+    state = {"time": 0}
+
+    def step() -> None:
+        state["time"] += NANOSECONDS
+        engine.push(names, [state["time"]] * len(names), rng.normal(0, 1, len(names)))
+        engine.evaluate()
+
+    benchmark(step)
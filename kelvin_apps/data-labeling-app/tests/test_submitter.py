@@ -0,0 +1,89 @@
+"""
+Label Submitter Tests.
+"""
+
+import threading
+import time
+
+from data_labeling_app.intervals import Interval
+from data_labeling_app.submitter import Label, LabelSubmitter
+
+
+def labels(count: int) -> list:
+    """Labels one second apart."""
+
+    return [Label.from_interval("label", Interval(i * 10 ** 9, i * 10 ** 9 + 1), "metric") for i in range(count)]
+
+
+def test_batches_without_blocking() -> None:
+    """Test that submit returns immediately and labels are sent in batches."""
+
+    sent = []
+    release = threading.Event()
+
+    def send(label: Label) -> None:
+        release.wait()
+        sent.append(label)
+
+    submitter = LabelSubmitter(send, batch_size=10, flush_interval=0.05)
+
+    start = time.monotonic()
+    for label in labels(25):
+        submitter.submit(label)
+    assert time.monotonic() - start < 0.05
+
+    release.set()
+    submitter.close(timeout=5)
+
+    assert sent == labels(25)
+    assert submitter.stats["batches"] == 3
+    assert submitter.pending == 0
+
+
+def test_flush_interval() -> None:
+    """Test that a partial batch is sent after the flush interval."""
+
+    sent = threading.Event()
+    submitter = LabelSubmitter(lambda label: sent.set(), batch_size=100, flush_interval=0.05)
+
+    submitter.submit(labels(1)[0])
+
+    assert sent.wait(1.0)
+    submitter.close(timeout=5)
+
+
+def test_retry_with_backoff() -> None:
+    """Test that failing labels are retried with growing delays, then given up."""
+
+    attempts = {}
+    delays = []
+    given_up = []
+
+    def send(label: Label) -> None:
+        attempts[label.start] = attempts.get(label.start, 0) + 1
+        if label.start == 0 or attempts[label.start] < 3:
+            raise ConnectionError("unreachable")
+
+    submitter = LabelSubmitter(
+        send, batch_size=2, flush_interval=0.01, max_retries=4, backoff=1.0, on_failure=given_up.extend,
+        sleep=delays.append,
+    )
+    for label in labels(2):
+        submitter.submit(label)
+    submitter.close(timeout=5)
+
+    assert attempts == {0: 5, 10 ** 9: 3}
+    assert given_up == labels(1)
+    assert len(delays) == 4
+    assert all(0.5 * 2 ** i <= delay <= 2 ** i for i, delay in enumerate(delays))
+    assert submitter.stats["sent"] == 1
+    assert submitter.stats["failed"] == 1
+
+
+def test_label_dates() -> None:
+    """Test label dates from nanosecond times."""
+
+    label = labels(2)[1]
+
+    assert label.start_date.timestamp() == 1.0
+    assert label.end_date.isoformat() == "1970-01-01T00:00:01+00:00"
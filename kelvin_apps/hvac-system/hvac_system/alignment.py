@@ -0,0 +1,263 @@
+"""
+Timestamp alignment.
+
+Metrics arriving at different rates are aligned into rows, either on a fixed
+grid (every period) or on the timestamps of a leading metric. Each metric has
+an operation:
+
+- avg: mean of the samples in the row's window (since the previous row), or
+  the last value before the row when there are none
+- last: last value at or before the row (as-of)
+- interpolate: linear interpolation between the samples either side of the
+  row, or the last value when there is none after it yet
+
+Text (non-numeric) metrics always use last.
+
+Samples are kept in sorted per-metric buffers: appending in time order is
+amortised O(1), and rows are computed for all pending row times at once with
+binary searches and cumulative sums, after which the buffers are trimmed. A
+row is only produced once every metric had the chance to catch up: up to the
+watermark, the latest time seen less the allowed lateness. Samples older than
+the last row produced are dropped as late.
+"""
+
+from typing import Dict, Mapping, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+OPERATIONS = ("avg", "last", "interpolate")
+
+
+class MetricBuffer:
+    """Time-sorted samples of a metric in a growable array."""
+
+    def __init__(self, dtype=np.float64, capacity: int = 64) -> None:
+        self.times = np.empty(capacity, dtype=np.int64)
+        self.values = np.empty(capacity, dtype=dtype)
+        self.start = 0
+        self.end = 0
+
+    def __len__(self) -> int:
+        return self.end - self.start
+
+    @property
+    def numeric(self) -> bool:
+        return self.values.dtype != object
+
+    def view(self):
+        """Times and values of the buffered samples."""
+
+        return self.times[self.start:self.end], self.values[self.start:self.end]
+
+    def append(self, times: np.ndarray, values: np.ndarray) -> None:
+        """Add samples, keeping the buffer sorted by time."""
+
+        if not len(times):
+            return
+
+        if np.any(times[1:] < times[:-1]):
+            order = np.argsort(times, kind="stable")
+            times, values = times[order], values[order]
+
+        if len(self) and times[0] < self.times[self.end - 1]:
+            # Out of order: merge (rare, bounded by the lateness)
+            current_times, current_values = self.view()
+            times = np.concatenate([current_times, times])
+            values = np.concatenate([current_values, values])
+            order = np.argsort(times, kind="stable")
+            times, values = times[order], values[order]
+            self.start = self.end = 0
+
+        self._reserve(len(times))
+        end = self.end + len(times)
+        self.times[self.end:end] = times
+        self.values[self.end:end] = values
+        self.end = end
+
+    def trim(self, before: int) -> None:
+        """Drop samples before a time, keeping the last one at or before it."""
+
+        times = self.times[self.start:self.end]
+        keep = int(np.searchsorted(times, before, side="right")) - 1
+        if keep > 0:
+            self.start += keep
+
+    def _reserve(self, count: int) -> None:
+        """Make room for count more samples, compacting or doubling the arrays."""
+
+        if self.end + count <= len(self.times):
+            return
+
+        size = len(self)
+        capacity = len(self.times)
+        while size + count > capacity:
+            capacity *= 2
+
+        if capacity == len(self.times):
+            self.times[:size] = self.times[self.start:self.end]
+            self.values[:size] = self.values[self.start:self.end]
+        else:
+            times = np.empty(capacity, dtype=np.int64)
+            values = np.empty(capacity, dtype=self.values.dtype)
+            times[:size] = self.times[self.start:self.end]
+            values[:size] = self.values[self.start:self.end]
+            self.times, self.values = times, values
+
+        self.start, self.end = 0, size
+
+
+class Aligned(NamedTuple):
+    """Aligned rows."""
+
+    times: np.ndarray  # row timestamps, nanoseconds
+    values: Dict[str, np.ndarray]  # per metric, NaN (or None for text) without a value
+
+
+class Aligner:
+    """Align metrics on a grid or on a leading metric."""
+
+    def __init__(
+        self,
+        operations: Mapping[str, str],
+        period: Optional[float] = 1.0,
+        leading: Optional[str] = None,
+        lateness: float = 0.0,
+        text: Sequence[str] = (),
+    ) -> None:
+        """
+        Create the aligner.
+
+        operations -- operation per metric (avg, last or interpolate)
+        period -- grid period in seconds (unless leading)
+        leading -- metric whose timestamps are the rows
+        lateness -- seconds a sample may arrive after later samples (of any metric)
+        text -- metrics with text values
+        """
+
+        for name, operation in operations.items():
+            if operation not in OPERATIONS:
+                raise ValueError(f"Unknown operation {operation!r} for {name}, expected one of {', '.join(OPERATIONS)}")
+        if leading is not None and leading not in operations:
+            raise ValueError(f"Leading metric {leading} is not aligned")
+        if leading is None and not period:
+            raise ValueError("Either a period or a leading metric is needed")
+
+        self.operations = dict(operations)
+        self.period = None if leading is not None else int(period * 1e9)
+        self.leading = leading
+        self.lateness = int(lateness * 1e9)
+
+        self.buffers = {
+            name: MetricBuffer(object if name in text else np.float64) for name in self.operations
+        }
+        self.latest: Optional[int] = None  # latest time seen
+        self.last_row: Optional[int] = None  # time of the last row produced
+        self.late = 0  # samples dropped as late
+
+    @property
+    def watermark(self) -> Optional[int]:
+        """Time up to which rows are final."""
+
+        return None if self.latest is None else self.latest - self.lateness
+
+    def push(self, name: str, times: Sequence[int], values: Sequence) -> None:
+        """Add samples of a metric (unknown metrics are ignored)."""
+
+        buffer = self.buffers.get(name)
+        if buffer is None:
+            return
+
+        times = np.asarray(times, dtype=np.int64)
+        values = np.asarray(values, dtype=buffer.values.dtype)
+
+        if self.last_row is not None:
+            on_time = times > self.last_row
+            if not on_time.all():
+                self.late += int(np.count_nonzero(~on_time))
+                times, values = times[on_time], values[on_time]
+
+        if len(times):
+            buffer.append(times, values)
+            latest = int(times.max())
+            if self.latest is None or latest > self.latest:
+                self.latest = latest
+
+    def align(self, until: Optional[int] = None) -> Aligned:
+        """Rows up to the watermark (or until) not produced yet."""
+
+        watermark = self.watermark if until is None else until
+        rows = self._rows(watermark)
+
+        if not len(rows):
+            return Aligned(rows, {name: rows[:0].astype(buffer.values.dtype) for name, buffer in self.buffers.items()})
+
+        starts = np.concatenate([[self.last_row if self.last_row is not None else np.iinfo(np.int64).min], rows[:-1]])
+        values = {name: self._column(name, rows, starts) for name in self.buffers}
+
+        self.last_row = int(rows[-1])
+        for buffer in self.buffers.values():
+            buffer.trim(self.last_row)
+
+        return Aligned(rows, values)
+
+    def _rows(self, watermark: Optional[int]) -> np.ndarray:
+        """Row times after the last row, up to the watermark."""
+
+        if watermark is None:
+            return np.zeros(0, dtype=np.int64)
+
+        after = self.last_row
+
+        if self.leading is not None:
+            times, _ = self.buffers[self.leading].view()
+            low = 0 if after is None else int(np.searchsorted(times, after, side="right"))
+            high = int(np.searchsorted(times, watermark, side="right"))
+            return times[low:high].copy()
+
+        period = self.period
+        if after is None:
+            first = min((buffer.times[buffer.start] for buffer in self.buffers.values() if len(buffer)), default=None)
+            if first is None:
+                return np.zeros(0, dtype=np.int64)
+            after = -(-int(first) // period) * period - period
+
+        return np.arange(after + period, watermark + 1, period, dtype=np.int64)
+
+    def _column(self, name: str, rows: np.ndarray, starts: np.ndarray) -> np.ndarray:
+        """Values of a metric at the rows, each over the window (start, row]."""
+
+        buffer = self.buffers[name]
+        times, values = buffer.view()
+        operation = self.operations[name] if buffer.numeric else "last"
+
+        index = np.searchsorted(times, rows, side="right")  # samples at or before each row
+        has_last = index > 0
+        if buffer.numeric:
+            last = np.where(has_last, values[np.maximum(index - 1, 0)] if len(values) else np.nan, np.nan)
+        else:
+            last = np.full(len(rows), None, dtype=object)
+            last[has_last] = values[index[has_last] - 1]
+
+        if operation == "last":
+            return last
+
+        if operation == "avg":
+            low = np.searchsorted(times, starts, side="right")
+            count = index - low
+            sums = np.concatenate([[0.0], np.cumsum(values)])
+            with np.errstate(invalid="ignore", divide="ignore"):
+                mean = (sums[index] - sums[low]) / count
+            return np.where(count > 0, mean, last)
+
+        # interpolate
+        has_next = index < len(times)
+        both = has_last & has_next
+        result = last.copy()
+        if both.any():
+            before, after = index[both] - 1, index[both]
+            t0, t1 = times[before], times[after]
+            v0, v1 = values[before], values[after]
+            fraction = (rows[both] - t0) / np.maximum(t1 - t0, 1)
+            result[both] = np.where(times[before] == rows[both], v0, v0 + (v1 - v0) * fraction)
+
+        return result
@@ -0,0 +1,219 @@
+"""
+Compiled data model codecs.
+
+Data model YAML files (such as datatype/hvac_data_model.yaml) define
+struct-like records of fixed-size fields. A codec compiled from a model has:
+
+- a record class with __slots__ (no per-record dict) and a generated
+  constructor, named after the model's class_name
+- a NumPy structured dtype (packed, little-endian) for columnar batches
+- a struct packing each record into the same bytes as a row of the dtype, so
+  single records and batches share one wire format
+"""
+
+import keyword
+import struct
+from operator import attrgetter
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Mapping, NamedTuple, Optional, Sequence, Union
+
+import numpy as np
+import yaml
+
+# Field types: struct format and NumPy dtype
+TYPES = {
+    "bool": ("?", "?"),
+    "boolean": ("?", "?"),
+    "int8": ("b", "i1"),
+    "int16": ("h", "<i2"),
+    "int32": ("i", "<i4"),
+    "int64": ("q", "<i8"),
+    "uint8": ("B", "u1"),
+    "uint16": ("H", "<u2"),
+    "uint32": ("I", "<u4"),
+    "uint64": ("Q", "<u8"),
+    "float32": ("f", "<f4"),
+    "float64": ("d", "<f8"),
+}
+
+# Names used by the generated record classes, not available to fields
+RESERVED = frozenset({"self", "fields", "to_dict", "data_model"})
+
+
+class Field(NamedTuple):
+    """Field of a data model."""
+
+    name: str
+    type: str
+    description: Optional[str] = None
+
+
+class DataModel(NamedTuple):
+    """Data model definition."""
+
+    name: str
+    version: str
+    class_name: str
+    fields: List[Field]
+    description: Optional[str] = None
+
+    @classmethod
+    def from_config(cls, config: Mapping[str, Any]) -> "DataModel":
+        """Create a model from a data model definition."""
+
+        name = config.get("name", None)
+        if not name:
+            raise ValueError("Data models need a name")
+
+        fields = [
+            Field(field.get("name", None), field.get("type", None), field.get("description", None))
+            for field in config.get("fields", None) or []
+        ]
+        if not fields:
+            raise ValueError(f"Data model {name} has no fields")
+
+        for field in fields:
+            if not field.name or not field.name.isidentifier() or keyword.iskeyword(field.name):
+                raise ValueError(f"Invalid field name {field.name!r} in {name}")
+            if field.name in RESERVED or field.name.startswith("__"):
+                raise ValueError(
+                    f"Reserved field name {field.name!r} in {name}: {', '.join(sorted(RESERVED))} and __ names are used by the record class"
+                )
+            if field.type not in TYPES:
+                raise ValueError(f"Unsupported type {field.type!r} of {name}.{field.name}, expected one of {', '.join(TYPES)}")
+        if len({field.name for field in fields}) < len(fields):
+            raise ValueError(f"Duplicate field names in {name}")
+
+        class_name = config.get("class_name", None) or name.rpartition(".")[2].title().replace("_", "")
+
+        return cls(name, str(config.get("version", None)), class_name, fields, config.get("description", None))
+
+    @classmethod
+    def from_file(cls, path: Union[str, Path]) -> "DataModel":
+        """Read a model from a data model YAML file."""
+
+        with open(path) as file:
+            return cls.from_config(yaml.safe_load(file) or {})
+
+    @property
+    def dtype(self) -> np.dtype:
+        return np.dtype([(field.name, TYPES[field.type][1]) for field in self.fields])
+
+
+def values_getter(names: Sequence[str]):
+    """Function returning the tuple of values of the named attributes."""
+
+    if len(names) == 1:
+        getter = attrgetter(names[0])
+        return lambda record: (getter(record),)
+
+    return attrgetter(*names)
+
+
+def record_class(model: DataModel) -> type:
+    """Generate the record class of a model."""
+
+    names = [field.name for field in model.fields]
+    arguments = ", ".join(names)
+    assignments = "\n".join(f"    self.{name} = {name}" for name in names)
+
+    namespace: Dict[str, Any] = {}
+    exec(f"def __init__(self, {arguments}):\n{assignments}\n", namespace)
+
+    getter = values_getter(names)
+
+    def __repr__(self) -> str:
+        values = ", ".join(f"{name}={value!r}" for name, value in zip(names, getter(self)))
+        return f"{type(self).__name__}({values})"
+
+    def __eq__(self, other: Any) -> bool:
+        return type(other) is type(self) and getter(self) == getter(other)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(zip(names, getter(self)))
+
+    return type(model.class_name, (), {
+        "__slots__": tuple(names),
+        "__init__": namespace["__init__"],
+        "__repr__": __repr__,
+        "__eq__": __eq__,
+        "__hash__": None,
+        "to_dict": to_dict,
+        "fields": tuple(names),
+        "data_model": model.name,
+    })
+
+
+class Codec:
+    """Encoding and decoding of the records of a data model."""
+
+    def __init__(self, model: DataModel) -> None:
+        self.model = model
+        self.names = [field.name for field in model.fields]
+        self.record = record_class(model)
+        self.dtype = model.dtype
+        self.struct = struct.Struct("<" + "".join(TYPES[field.type][0] for field in model.fields))
+        self._values = values_getter(self.names)
+
+    @classmethod
+    def from_file(cls, path: Union[str, Path]) -> "Codec":
+        """Compile the codec of a data model YAML file."""
+
+        return cls(DataModel.from_file(path))
+
+    @property
+    def size(self) -> int:
+        """Bytes per record."""
+
+        return self.struct.size
+
+    # Single records
+
+    def encode(self, record: Any) -> bytes:
+        return self.struct.pack(*self._values(record))
+
+    def decode(self, data: bytes) -> Any:
+        return self.record(*self.struct.unpack(data))
+
+    def from_dict(self, values: Mapping[str, Any]) -> Any:
+        return self.record(**values)
+
+    # Batches
+
+    def array(self, records: Iterable[Any]) -> np.ndarray:
+        """Columnar array of records."""
+
+        values = self._values
+        return np.array([values(record) for record in records], dtype=self.dtype)
+
+    def columns(self, columns: Mapping[str, Sequence[Any]]) -> np.ndarray:
+        """Columnar array of field columns."""
+
+        size = len(columns[self.names[0]])
+        result = np.empty(size, dtype=self.dtype)
+        for name in self.names:
+            result[name] = columns[name]
+
+        return result
+
+    def records(self, array: np.ndarray) -> List[Any]:
+        """Records of a columnar array."""
+
+        record = self.record
+        return [record(*values) for values in array.tolist()]
+
+    def encode_batch(self, batch: Union[np.ndarray, Iterable[Any]]) -> bytes:
+        """Bytes of a columnar array (or records): the records packed back to back."""
+
+        if not isinstance(batch, np.ndarray):
+            batch = self.array(batch)
+
+        return batch.astype(self.dtype, copy=False).tobytes()
+
+    def decode_batch(self, data: bytes) -> np.ndarray:
+        """Columnar array of packed records (a read-only view of the data)."""
+
+        if len(data) % self.size:
+            raise ValueError(f"Data size {len(data)} is not a multiple of the record size {self.size}")
+
+        return np.frombuffer(data, dtype=self.dtype)
@@ -2,12 +2,45 @@
 Data Application.
 """
 
+from typing import Sequence
+
 from kelvin.app import DataApplication
+from kelvin.icd import Message
+
+from .pipeline import Pipeline
 
 
 class App(DataApplication):
     """Application."""
 
-    def process(self) -> None:
-        print(self.data)
+    def init(self) -> None:
+        """Compile the configured gatekeeper/refinery stages."""
+
+        configs = self.config.pipeline or []
+        self.pipeline = Pipeline.from_files(configs) if configs else None
+
+    def process_data(self, data: Sequence[Message]) -> None:
+        """Run a batch of messages through the pipeline and emit its output."""
 
+        if self.pipeline is None or not data:
+            return
+
+        batch = self.pipeline.process(
+            [msg._.name for msg in data],
+            [msg._.time_of_validity for msg in data],
+            [msg.value for msg in data],
+        )
+
+        # Stage outputs have their configured data models, other messages pass through with their own
+        data_models = {msg._.name: msg._.type for msg in data}
+        data_models.update(self.pipeline.data_models)
+
+        for name, time_of_validity, fields in batch.records(self.pipeline.keys):
+            data_type = data_models.get(name) or 'raw.float32'
+            if data_type.startswith(('raw.int', 'raw.uint')):
+                fields = {field: int(value) for field, value in fields.items()}
+            self.logger.debug(name, data_type=data_type, time_of_validity=time_of_validity, fields=fields)
+            self.make_message(data_type, name, time_of_validity=time_of_validity, emit=True, **fields)
+
+    def process(self) -> None:
+        """Process data (messages are processed as they arrive, in process_data)."""
@@ -0,0 +1,396 @@
+"""
+Gatekeeper and refinery pipeline.
+
+The input_stage definitions of Kelvin app configurations (gatekeeper stages
+first, then refinery stages) are compiled into a chain of stage operators that
+run over columnar batches of messages, so the same transformations can run in
+the app, offline in tests and in benchmarks:
+
+- min_max: drops messages whose field is outside [min, max] (either bound is
+  optional)
+- scale: multiplies src by scaling into dest
+- compose: combines fields of several messages into one message, emitted with
+  the latest value of every field (once every field has a value) whenever any
+  of its sources arrives, at the latest time of validity of those sources
+- timestamp_alignment: aligns its inputs into rows on a grid or on the times
+  of a leading input (see hvac_system.alignment)
+
+A stage applies to the messages of its inputs and replaces them with its
+outputs; other messages pass through unchanged.
+
+A batch holds one row per message field, keyed by an integer code of the
+(message name, field) pair, so stages index threshold and scaling arrays by
+code instead of comparing names.
+"""
+
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Mapping, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+import yaml
+
+from .alignment import Aligner
+
+
+class Keys:
+    """Integer codes of (message name, field) pairs."""
+
+    def __init__(self) -> None:
+        self.index: Dict[Tuple[str, str], int] = {}
+        self.pairs: List[Tuple[str, str]] = []
+
+    def __len__(self) -> int:
+        return len(self.pairs)
+
+    def code(self, name: str, field: str = "value") -> int:
+        """Code of a pair, assigning the next one to a new pair."""
+
+        key = (name, field)
+        code = self.index.get(key)
+        if code is None:
+            code = self.index[key] = len(self.pairs)
+            self.pairs.append(key)
+
+        return code
+
+    def path(self, path: str) -> int:
+        """Code of a name.field path."""
+
+        name, _, field = path.rpartition(".")
+
+        return self.code(name, field) if name else self.code(field)
+
+    def codes(self, names: Iterable[str], field: str = "value") -> np.ndarray:
+        """Codes of the field of messages."""
+
+        index = self.index
+        code = self.code
+
+        return np.fromiter((index.get((name, field)) or code(name, field) for name in names), dtype=np.int64)
+
+    def array(self, values: Mapping[int, Any], default: Any, dtype=np.float64) -> np.ndarray:
+        """Array of values by code (default elsewhere), covering the codes assigned so far."""
+
+        result = np.full(len(self.pairs), default, dtype=dtype)
+        for code, value in values.items():
+            result[code] = value
+
+        return result
+
+
+class Batch(NamedTuple):
+    """Columnar message fields: one row per field of a message."""
+
+    code: np.ndarray  # (message name, field) code
+    time: np.ndarray  # time of validity, nanoseconds
+    value: np.ndarray  # float64
+
+    @classmethod
+    def from_messages(cls, keys: Keys, names: Sequence[str], times: Sequence[int], values: Sequence[float]) -> "Batch":
+        """Batch of raw (single value) messages."""
+
+        return cls(
+            keys.codes(names),
+            np.asarray(times, dtype=np.int64),
+            np.asarray(values, dtype=np.float64),
+        )
+
+    def __len__(self) -> int:
+        return len(self.code)
+
+    def select(self, mask: np.ndarray) -> "Batch":
+        return Batch(self.code[mask], self.time[mask], self.value[mask])
+
+    def concatenate(self, other: "Batch") -> "Batch":
+        return Batch(*(np.concatenate([a, b]) for a, b in zip(self, other)))
+
+    def records(self, keys: Keys) -> Iterator[Tuple[str, int, Dict[str, float]]]:
+        """Messages of the batch as (name, time of validity, {field: value})."""
+
+        pairs = keys.pairs
+        current: Optional[Tuple[str, int]] = None
+        fields: Dict[str, float] = {}
+
+        for code, time_of_validity, value in zip(self.code.tolist(), self.time.tolist(), self.value.tolist()):
+            name, field = pairs[code]
+            if (name, time_of_validity) != current or field in fields:
+                if current is not None:
+                    yield (*current, fields)
+                current, fields = (name, time_of_validity), {}
+            fields[field] = value
+
+        if current is not None:
+            yield (*current, fields)
+
+
+class Stage(ABC):
+    """A compiled stage."""
+
+    type = ""
+
+    def __init__(self, config: Mapping[str, Any], keys: Keys) -> None:
+        self.keys = keys
+        self.inputs = [item["name"] for item in config.get("inputs") or []]
+        self.outputs = {item["name"]: item.get("data_model") for item in config.get("outputs") or []}
+        self.actions = (config.get(self.type) or {}).get("actions") or []
+
+    @abstractmethod
+    def __call__(self, batch: Batch) -> Batch:
+        """Transform a batch."""
+
+    def _lookup(self, values: Mapping[int, Any], default: Any, dtype=np.float64) -> Callable[[np.ndarray], np.ndarray]:
+        """Vectorised lookup of values by code, rebuilt when codes are added."""
+
+        keys = self.keys
+        table = keys.array(values, default, dtype)
+
+        def lookup(codes: np.ndarray) -> np.ndarray:
+            nonlocal table
+            if len(table) < len(keys):
+                table = keys.array(values, default, dtype)
+            return table[codes]
+
+        return lookup
+
+
+STAGES: Dict[str, Callable[[Mapping[str, Any], Keys], Stage]] = {}
+
+
+def register(type_name: str) -> Callable[[type], type]:
+    """Register a stage class for a stage type."""
+
+    def decorator(cls: type) -> type:
+        cls.type = type_name
+        STAGES[type_name] = cls
+        return cls
+
+    return decorator
+
+
+@register("min_max")
+class MinMaxStage(Stage):
+    """Drop messages whose field is outside its range."""
+
+    def __init__(self, config: Mapping[str, Any], keys: Keys) -> None:
+        super().__init__(config, keys)
+
+        low, high = {}, {}
+        for action in self.actions:
+            code = keys.code(action["src"], action.get("field") or "value")
+            if action.get("min") is not None:
+                low[code] = float(action["min"])
+            if action.get("max") is not None:
+                high[code] = float(action["max"])
+
+        self.low = self._lookup(low, -np.inf)
+        self.high = self._lookup(high, np.inf)
+
+    def __call__(self, batch: Batch) -> Batch:
+        with np.errstate(invalid="ignore"):
+            keep = (batch.value >= self.low(batch.code)) & (batch.value <= self.high(batch.code))
+
+        return batch if keep.all() else batch.select(keep)
+
+
+@register("scale")
+class ScaleStage(Stage):
+    """Multiply fields by a scaling factor."""
+
+    def __init__(self, config: Mapping[str, Any], keys: Keys) -> None:
+        super().__init__(config, keys)
+
+        scaling, dest = {}, {}
+        for action in self.actions:
+            code = keys.path(action["src"])
+            scaling[code] = float(action.get("scaling", 1.0))
+            dest[code] = keys.path(action.get("dest") or action["src"])
+
+        self.scaling = self._lookup(scaling, 1.0)
+        self.dest = self._lookup(dest, -1, np.int64)
+
+    def __call__(self, batch: Batch) -> Batch:
+        dest = self.dest(batch.code)
+        return Batch(np.where(dest >= 0, dest, batch.code), batch.time, batch.value * self.scaling(batch.code))
+
+
+@register("compose")
+class ComposeStage(Stage):
+    """Compose fields of several messages into one message."""
+
+    def __init__(self, config: Mapping[str, Any], keys: Keys) -> None:
+        super().__init__(config, keys)
+
+        self.sources = np.array([keys.path(action["src"]) for action in self.actions], dtype=np.int64)
+        dest = [keys.path(action["dest"]) for action in self.actions]
+        self.dest = np.array(dest, dtype=np.int64)
+
+        # Output messages and the actions of each
+        self.messages = {}
+        for i, code in enumerate(dest):
+            self.messages.setdefault(keys.pairs[code][0], []).append(i)
+
+        self.consumed = keys.codes(self.inputs)
+        self.latest = np.full(len(self.actions), np.nan)
+        self.latest_time = np.zeros(len(self.actions), dtype=np.int64)
+
+    def __call__(self, batch: Batch) -> Batch:
+        # Latest value of each source in the batch (rows are in time order per source)
+        action = np.full(len(batch), -1, dtype=np.int64)
+        for i, source in enumerate(self.sources.tolist()):
+            action[batch.code == source] = i
+
+        rows = np.flatnonzero(action >= 0)
+        updated = np.zeros(len(self.actions), dtype=bool)
+        if len(rows):
+            order = rows[np.argsort(batch.time[rows], kind="stable")]
+            self.latest[action[order]] = batch.value[order]
+            self.latest_time[action[order]] = batch.time[order]
+            updated[action[rows]] = True
+
+        rest = batch.select(~np.isin(batch.code, self.consumed))
+
+        composed = []
+        for indices in self.messages.values():
+            if updated[indices].any() and not np.isnan(self.latest[indices]).any():
+                time_of_validity = self.latest_time[indices][updated[indices]].max()
+                composed.append(Batch(
+                    self.dest[indices],
+                    np.full(len(indices), time_of_validity, dtype=np.int64),
+                    self.latest[indices].copy(),
+                ))
+
+        for output in composed:
+            rest = rest.concatenate(output)
+
+        return rest
+
+
+@register("timestamp_alignment")
+class AlignmentStage(Stage):
+    """Align inputs arriving at different rates into rows."""
+
+    def __init__(self, config: Mapping[str, Any], keys: Keys) -> None:
+        super().__init__(config, keys)
+
+        options = config.get(self.type) or {}
+        data_models = {item["name"]: item.get("data_model") for item in config.get("inputs") or []}
+
+        # Actions apply to their src input, or to every input without one
+        default = "last"
+        operations = {}
+        for action in self.actions:
+            src = action.get("src")
+            if src in data_models:
+                operations[src] = action.get("operation") or default
+            else:
+                default = action.get("operation") or default
+
+        # Values of text inputs can't be averaged or interpolated
+        operations = {
+            name: "last" if data_model == "raw.text" else operations.get(name, default)
+            for name, data_model in data_models.items()
+        }
+
+        self.aligner = Aligner(
+            operations,
+            period=float(options.get("period", 1.0)),
+            leading=options.get("leading", None),
+            lateness=float(options.get("lateness", 0.0)),
+        )
+
+        names = list(data_models)
+        outputs = list(self.outputs) if len(self.outputs) == len(names) else names
+        self.consumed = keys.codes(names)
+        self.dest = keys.codes(outputs)
+        self.names = names
+
+    def __call__(self, batch: Batch) -> Batch:
+        consumed = np.isin(batch.code, self.consumed)
+
+        if consumed.any():
+            rows = np.flatnonzero(consumed)
+            rows = rows[np.argsort(batch.code[rows], kind="stable")]
+            codes = batch.code[rows]
+            starts = np.searchsorted(codes, self.consumed, side="left")
+            ends = np.searchsorted(codes, self.consumed, side="right")
+            for name, start, end in zip(self.names, starts.tolist(), ends.tolist()):
+                if end > start:
+                    self.aligner.push(name, batch.time[rows[start:end]], batch.value[rows[start:end]])
+
+        rest = batch.select(~consumed) if consumed.any() else batch
+
+        aligned = self.aligner.align()
+        if not len(aligned.times):
+            return rest
+
+        # One row per (time, input) with a value, in time order
+        values = np.column_stack([aligned.values[name] for name in self.names]).astype(np.float64).ravel()
+        codes = np.tile(self.dest, len(aligned.times))
+        times = np.repeat(aligned.times, len(self.names))
+        keep = ~np.isnan(values)
+
+        return rest.concatenate(Batch(codes[keep], times[keep], values[keep]))
+
+
+class Pipeline:
+    """Chain of compiled stages."""
+
+    def __init__(self, stages: Sequence[Stage], keys: Keys) -> None:
+        self.stages = list(stages)
+        self.keys = keys
+        self.timings = np.zeros(len(self.stages))  # seconds spent per stage
+        self.rows = np.zeros(len(self.stages), dtype=np.int64)  # rows into each stage
+
+    @classmethod
+    def from_configs(cls, configs: Iterable[Mapping[str, Any]], keys: Optional[Keys] = None) -> "Pipeline":
+        """Compile the gatekeeper and refinery input stages of app configurations, in order."""
+
+        keys = Keys() if keys is None else keys
+        stages = []
+
+        for config in configs:
+            core = ((config.get("app") or {}).get("kelvin") or {}).get("core") or {}
+            for section in ("gatekeeper", "refinery"):
+                for stage in (core.get(section) or {}).get("input_stage") or []:
+                    stage_type = stage.get("type")
+                    if stage_type not in STAGES:
+                        raise ValueError(f"Unsupported stage type {stage_type!r}, expected one of {', '.join(STAGES)}")
+                    stages.append(STAGES[stage_type](stage, keys))
+
+        return cls(stages, keys)
+
+    @classmethod
+    def from_files(cls, paths: Iterable[str], keys: Optional[Keys] = None) -> "Pipeline":
+        """Compile the input stages of app configuration files."""
+
+        configs = []
+        for path in paths:
+            with open(path) as file:
+                configs.append(yaml.safe_load(file) or {})
+
+        return cls.from_configs(configs, keys)
+
+    @property
+    def data_models(self) -> Dict[str, str]:
+        """Data model of each stage output."""
+
+        result = {}
+        for stage in self.stages:
+            result.update(stage.outputs)
+
+        return result
+
+    def __call__(self, batch: Batch) -> Batch:
+        for i, stage in enumerate(self.stages):
+            start = time.perf_counter()
+            self.rows[i] += len(batch)
+            batch = stage(batch)
+            self.timings[i] += time.perf_counter() - start
+
+        return batch
+
+    def process(self, names: Sequence[str], times: Sequence[int], values: Sequence[float]) -> Batch:
+        """Run raw messages through the pipeline."""
+
+        return self(Batch.from_messages(self.keys, names, times, values))
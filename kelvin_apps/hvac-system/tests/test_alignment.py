@@ -0,0 +1,203 @@
+"""
+Alignment Tests.
+"""
+
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from hvac_system.alignment import Aligner, MetricBuffer
+from hvac_system.pipeline import Pipeline
+
+CONFIGS = Path(__file__).parent.parent / "configs"
+
+S = 10 ** 9
+
+
+def test_buffer_order() -> None:
+    """Test that the buffer stays sorted, grows and trims keeping the last sample."""
+
+    buffer = MetricBuffer(capacity=2)
+    buffer.append(np.array([1, 2, 3]), np.array([1.0, 2.0, 3.0]))
+    buffer.append(np.array([5, 4]), np.array([5.0, 4.0]))
+    buffer.append(np.array([2]), np.array([2.5]))
+
+    times, values = buffer.view()
+    assert times.tolist() == [1, 2, 2, 3, 4, 5]
+    assert values.tolist() == [1.0, 2.0, 2.5, 3.0, 4.0, 5.0]
+
+    buffer.trim(3)
+    assert buffer.view()[0].tolist() == [3, 4, 5]
+    buffer.trim(10)
+    assert buffer.view()[0].tolist() == [5]
+
+
+def test_grid() -> None:
+    """Test avg, last and interpolate on a grid."""
+
+    aligner = Aligner({"a": "avg", "b": "last", "c": "interpolate"}, period=2)
+
+    aligner.push("a", [1 * S, 2 * S, 3 * S, 4 * S], [1.0, 3.0, 5.0, 7.0])
+    aligner.push("b", [1 * S, 3 * S], [10.0, 30.0])
+    aligner.push("c", [0, 4 * S], [0.0, 40.0])
+
+    result = aligner.align()
+
+    assert (result.times // S).tolist() == [0, 2, 4]
+    assert np.allclose(result.values["a"], [np.nan, 2.0, 6.0], equal_nan=True)
+    assert np.allclose(result.values["b"], [np.nan, 10.0, 30.0], equal_nan=True)
+    assert np.allclose(result.values["c"], [0.0, 20.0, 40.0])
+
+
+def test_avg_falls_back_to_last() -> None:
+    """Test that avg of a slow metric carries its last value through windows without samples."""
+
+    aligner = Aligner({"fast": "avg", "slow": "avg"}, period=1)
+
+    aligner.push("slow", [0], [5.0])
+    aligner.push("fast", np.arange(4) * S, [1.0, 2.0, 3.0, 4.0])
+
+    assert aligner.align().values["slow"].tolist() == [5.0] * 4
+
+
+def test_leading() -> None:
+    """Test rows on the timestamps of a leading metric."""
+
+    aligner = Aligner({"lead": "last", "other": "avg"}, leading="lead")
+
+    aligner.push("other", [1 * S, 2 * S, 4 * S], [1.0, 2.0, 4.0])
+    aligner.push("lead", [2 * S, 5 * S], [20.0, 50.0])
+
+    result = aligner.align()
+
+    assert (result.times // S).tolist() == [2, 5]
+    assert result.values["lead"].tolist() == [20.0, 50.0]
+    assert result.values["other"].tolist() == [1.5, 4.0]
+
+
+def test_text() -> None:
+    """Test that text metrics use the last value whatever the operation."""
+
+    aligner = Aligner({"x": "avg", "label": "avg"}, period=1, text=["label"])
+
+    aligner.push("x", [0, 1 * S], [1.0, 2.0])
+    aligner.push("label", [0], ["on"])
+
+    assert aligner.align().values["label"].tolist() == ["on", "on"]
+
+
+def test_lateness() -> None:
+    """Test that rows wait for the lateness and later samples are dropped."""
+
+    aligner = Aligner({"a": "last", "b": "last"}, period=1, lateness=2)
+
+    aligner.push("a", np.arange(5) * S, np.arange(5.0))
+    assert (aligner.align().times // S).tolist() == [0, 1, 2]
+
+    # Within the lateness: included in the next rows
+    aligner.push("b", [3 * S], [30.0])
+    # Older than the rows produced: dropped
+    aligner.push("b", [1 * S], [10.0])
+    assert aligner.late == 1
+
+    aligner.push("a", [6 * S], [6.0])
+    result = aligner.align()
+    assert (result.times // S).tolist() == [3, 4]
+    assert result.values["b"].tolist() == [30.0, 30.0]
+
+
+def test_incremental() -> None:
+    """Test that aligning in pieces gives the same rows as all at once."""
+
+    rng = np.random.default_rng(0)
+    samples = {
+        name: (np.sort(rng.integers(0, 100 * S, size)), rng.normal(0, 1, size))
+        for name, size in [("a", 500), ("b", 50), ("c", 5)]
+    }
+    operations = {"a": "avg", "b": "interpolate", "c": "last"}
+
+    whole = Aligner(operations, period=1)
+    for name, (times, values) in samples.items():
+        whole.push(name, times, values)
+    expected = whole.align(until=100 * S)
+
+    pieces = Aligner(operations, period=1)
+    times_, values_ = [], {name: [] for name in operations}
+    for chunk in range(10):
+        for name, (times, values) in samples.items():
+            mask = (times >= chunk * 10 * S) & (times < (chunk + 1) * 10 * S)
+            pieces.push(name, times[mask], values[mask])
+        result = pieces.align(until=(chunk + 1) * 10 * S - 1 if chunk < 9 else 100 * S)
+        times_.append(result.times)
+        for name in operations:
+            values_[name].append(result.values[name])
+
+    # Interpolation between pieces only sees samples up to the piece
+    assert np.array_equal(np.concatenate(times_), expected.times)
+    for name in ("a", "c"):
+        assert np.allclose(np.concatenate(values_[name]), expected.values[name], equal_nan=True)
+
+
+def test_invalid() -> None:
+    """Test that inconsistent configurations are rejected."""
+
+    with pytest.raises(ValueError):
+        Aligner({"a": "median"})
+    with pytest.raises(ValueError):
+        Aligner({"a": "avg"}, leading="b")
+    with pytest.raises(ValueError):
+        Aligner({"a": "avg"}, period=None)
+
+
+def test_stage() -> None:
+    """Test that timestamp_alignment.yaml aligns its inputs (text inputs with last)."""
+
+    pipeline = Pipeline.from_files([CONFIGS / "timestamp_alignment.yaml"])
+    stage = pipeline.stages[0]
+
+    assert stage.aligner.operations == {
+        "sample_metric_1": "avg",
+        "sample_metric_2": "avg",
+        "sample_metric_3": "last",
+    }
+
+    names = ["sample_metric_1", "sample_metric_1", "sample_metric_2", "sample_metric_3", "other"]
+    batch = pipeline.process(names, [1 * S, int(1.5 * S), 1 * S, 2 * S, 1 * S], [1.0, 2.0, 10.0, 3.0, 7.0])
+
+    assert [(name, time // S, fields) for name, time, fields in batch.records(pipeline.keys)] == [
+        ("other", 1, {"value": 7.0}),
+        ("sample_metric_1", 1, {"value": 1.0}),
+        ("sample_metric_2", 1, {"value": 10.0}),
+        ("sample_metric_1", 2, {"value": 2.0}),
+        ("sample_metric_2", 2, {"value": 10.0}),
+        ("sample_metric_3", 2, {"value": 3.0}),
+    ]
+
+
+@pytest.mark.parametrize("size", [10, 50])
+def test_benchmark_align(benchmark, size: int) -> None:
+    """Benchmark aligning size metrics at rates from 100/s to 0.1/s over a minute, pushed in 1s batches."""
+
+    rng = np.random.default_rng(0)
+    rates = 10.0 ** rng.uniform(-1, 2, size)
+    operations = {f"metric_{i}": ("avg", "last", "interpolate")[i % 3] for i in range(size)}
+    samples = {
+        name: np.sort(rng.integers(0, 60 * S, rng.poisson(rate * 60) + 1))
+        for name, rate in zip(operations, rates)
+    }
+
+    def align():
+        aligner = Aligner(operations, period=0.1, lateness=0.5)
+        rows = 0
+        for second in range(60):
+            for name, times in samples.items():
+                low, high = np.searchsorted(times, [second * S, (second + 1) * S])
+                aligner.push(name, times[low:high], times[low:high] / S)
+            rows += len(aligner.align().times)
+        return rows
+
+    rows = benchmark(align)
+
+    benchmark.extra_info["samples"] = int(sum(len(times) for times in samples.values()))
+    assert rows > 500
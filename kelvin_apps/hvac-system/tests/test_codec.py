@@ -0,0 +1,172 @@
+"""
+Codec Tests.
+"""
+
+import json
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from hvac_system.codec import Codec, DataModel
+
+DATATYPE = Path(__file__).parent.parent / "datatype" / "hvac_data_model.yaml"
+
+SIZE = 10_000
+
+
+@pytest.fixture(scope="module")
+def codec() -> Codec:
+    """HVAC data model codec fixture."""
+
+    return Codec.from_file(DATATYPE)
+
+
+@pytest.fixture(scope="module")
+def columns() -> dict:
+    """Columns of SIZE records, exactly representable as float32."""
+
+    rng = np.random.default_rng(0)
+
+    return {
+        "temperature": rng.uniform(15, 30, SIZE).astype(np.float32).astype(np.float64),
+        "setpoint": rng.uniform(18, 24, SIZE).astype(np.float32).astype(np.float64),
+        "power": rng.uniform(0, 5000, SIZE).astype(np.float32).astype(np.float64),
+    }
+
+
+def test_model() -> None:
+    """Test that the data model is read with its dtype."""
+
+    model = DataModel.from_file(DATATYPE)
+
+    assert model.name == "my.custom.hvac_data_model"
+    assert model.version == "1.0.0"
+    assert model.class_name == "Hvac_Data_Model"
+    assert [field.name for field in model.fields] == ["temperature", "setpoint", "power"]
+    assert model.dtype == np.dtype([("temperature", "<f4"), ("setpoint", "<f4"), ("power", "<f4")])
+
+
+def test_record(codec: Codec) -> None:
+    """Test the generated record class."""
+
+    record = codec.record(20.5, 21.0, power=1500.0)
+
+    assert type(record).__name__ == "Hvac_Data_Model"
+    assert not hasattr(record, "__dict__")
+    assert record.to_dict() == {"temperature": 20.5, "setpoint": 21.0, "power": 1500.0}
+    assert record == codec.from_dict(record.to_dict())
+    assert repr(record) == "Hvac_Data_Model(temperature=20.5, setpoint=21.0, power=1500.0)"
+
+    with pytest.raises(AttributeError):
+        record.humidity = 50.0
+
+
+def test_round_trip(codec: Codec) -> None:
+    """Test that records and batches share one encoding and round trip."""
+
+    records = [codec.record(20.5, 21.0, 1500.0), codec.record(-1.0, 0.25, 0.0)]
+
+    data = codec.encode_batch(records)
+
+    assert len(data) == 2 * codec.size == 24
+    assert data == b"".join(codec.encode(record) for record in records)
+    assert codec.records(codec.decode_batch(data)) == records
+    assert [codec.decode(data[i:i + 12]) for i in (0, 12)] == records
+
+
+def test_columns(codec: Codec, columns: dict) -> None:
+    """Test columnar batches from field columns."""
+
+    array = codec.columns(columns)
+    decoded = codec.decode_batch(codec.encode_batch(array))
+
+    for name, values in columns.items():
+        assert np.array_equal(decoded[name], values)
+
+    with pytest.raises(ValueError):
+        codec.decode_batch(b"\x00" * 13)
+
+
+def test_invalid_models() -> None:
+    """Test that models without fixed-size fields are rejected."""
+
+    with pytest.raises(ValueError):
+        DataModel.from_config({"name": "x", "fields": [{"name": "label", "type": "string"}]})
+    with pytest.raises(ValueError):
+        DataModel.from_config({"name": "x", "fields": [{"name": "class", "type": "float32"}]})
+    with pytest.raises(ValueError):
+        DataModel.from_config({"name": "x", "fields": []})
+
+
+@pytest.mark.parametrize("name", ["self", "fields", "to_dict", "data_model", "__init__"])
+def test_reserved_field_names(name: str) -> None:
+    """Test that field names clashing with the generated class are rejected."""
+
+    with pytest.raises(ValueError, match="Reserved field name"):
+        DataModel.from_config({"name": "x", "fields": [{"name": name, "type": "float32"}]})
+
+
+def generic(columns: dict) -> list:
+    """Generic (dict) representation of the records."""
+
+    names = list(columns)
+    return [dict(zip(names, values)) for values in zip(*(columns[name].tolist() for name in names))]
+
+
+def test_memory(codec: Codec, columns: dict) -> None:
+    """Test that records take less memory than dicts, and columnar batches less still."""
+
+    def measure(build) -> float:
+        tracemalloc.start()
+        result = build()  # noqa: F841
+        size, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return size / SIZE
+
+    dicts = measure(lambda: generic(columns))
+    records = measure(lambda: codec.records(codec.columns(columns)))
+    array = measure(lambda: codec.columns(columns))
+
+    assert array < 16 < records < dicts
+
+
+@pytest.mark.parametrize("representation", ["generic", "records", "columnar"])
+def test_benchmark_encode(benchmark, codec: Codec, columns: dict, representation: str) -> None:
+    """Benchmark encoding SIZE records: dicts to JSON, records packed one by one, and a columnar batch."""
+
+    if representation == "generic":
+        dicts = generic(columns)
+        encode = lambda: [json.dumps(item).encode() for item in dicts]  # noqa: E731
+    elif representation == "records":
+        records = codec.records(codec.columns(columns))
+        encode = lambda: [codec.encode(record) for record in records]  # noqa: E731
+    else:
+        array = codec.columns(columns)
+        encode = lambda: codec.encode_batch(array)  # noqa: E731
+
+    result = benchmark(encode)
+
+    benchmark.extra_info["bytes_per_record"] = (
+        len(result) / SIZE if isinstance(result, bytes) else sum(map(len, result)) / SIZE
+    )
+
+
+@pytest.mark.parametrize("representation", ["generic", "records", "columnar"])
+def test_benchmark_decode(benchmark, codec: Codec, columns: dict, representation: str) -> None:
+    """Benchmark decoding SIZE records: JSON to dicts, packed records one by one, and a columnar batch."""
+
+    if representation == "generic":
+        encoded = [json.dumps(item).encode() for item in generic(columns)]
+        decode = lambda: [json.loads(item) for item in encoded]  # noqa: E731
+    elif representation == "records":
+        encoded = [codec.encode(record) for record in codec.records(codec.columns(columns))]
+        decode = lambda: [codec.decode(item) for item in encoded]  # noqa: E731
+    else:
+        encoded = codec.encode_batch(codec.columns(columns))
+        decode = lambda: codec.decode_batch(encoded)  # noqa: E731
+
+    result = benchmark(decode)
+
+    assert len(result) == SIZE
@@ -0,0 +1,141 @@
+"""
+Pipeline Tests.
+"""
+
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from hvac_system.pipeline import Batch, Keys, Pipeline
+
+CONFIGS = Path(__file__).parent.parent / "configs"
+
+
+def run(pipeline: Pipeline, messages) -> list:
+    """Records of (name, seconds, value) messages run through a pipeline."""
+
+    names, times, values = zip(*messages)
+    batch = pipeline.process(names, [int(t * 1e9) for t in times], values)
+
+    return [(name, time // 10 ** 9, fields) for name, time, fields in batch.records(pipeline.keys)]
+
+
+def test_min_max() -> None:
+    """Test that min_max.yaml drops messages outside the configured ranges."""
+
+    pipeline = Pipeline.from_files([CONFIGS / "min_max.yaml"])
+
+    result = run(pipeline, [
+        ("setpoint.temperature", 1, 10.0),
+        ("setpoint.temperature", 2, 9.9),
+        ("setpoint.temperature", 3, 50.5),
+        ("setpoint.humidity", 1, 25),
+        ("setpoint.humidity", 2, 26),
+        ("setpoint.humidity", 3, -1000),
+        ("setpoint.rpm", 1, 49),
+        ("setpoint.rpm", 2, 1e9),
+        ("other", 1, -1e9),
+    ])
+
+    assert result == [
+        ("setpoint.temperature", 1, {"value": 10.0}),
+        ("setpoint.humidity", 1, {"value": 25.0}),
+        ("setpoint.humidity", 3, {"value": -1000.0}),
+        ("setpoint.rpm", 2, {"value": 1e9}),
+        ("other", 1, {"value": -1e9}),
+    ]
+    assert pipeline.data_models == {
+        "setpoint.temperature": "raw.float32",
+        "setpoint.humidity": "raw.uint64",
+        "setpoint.rpm": "raw.int32",
+    }
+
+
+def test_scale() -> None:
+    """Test that scale.yaml scales pressure_bar and passes pressure_psi through."""
+
+    pipeline = Pipeline.from_files([CONFIGS / "scale.yaml"])
+
+    result = run(pipeline, [("pressure_bar", 1, 100.0), ("pressure_psi", 1, 100.0)])
+
+    assert result == [
+        ("pressure_bar", 1, {"value": pytest.approx(6.89476)}),
+        ("pressure_psi", 1, {"value": 100.0}),
+    ]
+
+
+def test_compose() -> None:
+    """Test that compose.yaml composes hvac_system once every field has a value, carrying the latest values."""
+
+    pipeline = Pipeline.from_files([CONFIGS / "compose.yaml"])
+
+    # Incomplete: nothing composed, the inputs are consumed
+    assert run(pipeline, [("temperature", 1, 20.0), ("setpoint", 1, 21.0)]) == []
+
+    assert run(pipeline, [("power", 2, 1500), ("temperature", 3, 20.5), ("temperature", 2, 19.0)]) == [
+        ("hvac_system", 3, {"temperature": 20.5, "setpoint": 21.0, "power": 1500.0}),
+    ]
+
+    assert run(pipeline, [("setpoint", 4, 22.0), ("outside", 4, 5.0)]) == [
+        ("outside", 4, {"value": 5.0}),
+        ("hvac_system", 4, {"temperature": 20.5, "setpoint": 22.0, "power": 1500.0}),
+    ]
+    assert pipeline.data_models == {"hvac_system": "my.custom.hvac_data_model"}
+
+
+def test_chain() -> None:
+    """Test that stages of several configurations run in order."""
+
+    pipeline = Pipeline.from_files([CONFIGS / "min_max.yaml", CONFIGS / "scale.yaml"])
+
+    assert [stage.type for stage in pipeline.stages] == ["min_max", "scale"]
+
+    result = run(pipeline, [("setpoint.rpm", 1, 10), ("pressure_bar", 1, 1.0)])
+
+    assert result == [("pressure_bar", 1, {"value": pytest.approx(0.0689476)})]
+    assert pipeline.rows.tolist() == [2, 1]
+
+
+def test_unsupported_stage() -> None:
+    """Test that unknown stage types are rejected."""
+
+    config = {"app": {"kelvin": {"core": {"refinery": {"input_stage": [{"type": "unknown"}]}}}}}
+
+    with pytest.raises(ValueError):
+        Pipeline.from_configs([config])
+
+
+def test_records_split_messages() -> None:
+    """Test that rows are grouped into messages by name and time."""
+
+    keys = Keys()
+    batch = Batch(
+        np.array([keys.path("a.x"), keys.path("a.y"), keys.path("a.x"), keys.path("b.value")]),
+        np.array([1, 1, 1, 1]),
+        np.array([1.0, 2.0, 3.0, 4.0]),
+    )
+
+    assert list(batch.records(keys)) == [
+        ("a", 1, {"x": 1.0, "y": 2.0}),
+        ("a", 1, {"x": 3.0}),
+        ("b", 1, {"value": 4.0}),
+    ]
+
+
+@pytest.mark.parametrize("config", ["min_max", "scale", "compose"])
+def test_benchmark_stage(benchmark, config: str) -> None:
+    """Benchmark a stage over batches of 10000 messages of its inputs."""
+
+    pipeline = Pipeline.from_files([CONFIGS / f"{config}.yaml"])
+    stage = pipeline.stages[0]
+
+    rng = np.random.default_rng(0)
+    codes = pipeline.keys.codes(stage.inputs)
+    batch = Batch(
+        codes[rng.integers(0, len(codes), 10_000)],
+        np.sort(rng.integers(0, 10 ** 12, 10_000)),
+        rng.uniform(0, 100, 10_000),
+    )
+
+    benchmark(stage, batch)
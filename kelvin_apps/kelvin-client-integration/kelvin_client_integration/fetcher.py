@@ -0,0 +1,141 @@
+"""
+Streaming platform inventory.
+
+Paginated listings are walked lazily, one page at a time (cursor pagination:
+each response carries the cursor of the next page), so only a page of each
+listing is held in memory. Related resources (ACP -> workloads -> metrics) are
+fetched by a bounded thread pool over one pooled session: at most twice
+max_workers ACPs are pending and their results are yielded in ACP order as
+compact records, so memory stays bounded however large the tenant is.
+"""
+
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, Iterator, List, Mapping, NamedTuple, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Listing endpoints, formatted with the names of the parent resources
+ENDPOINTS = {
+    "acp": "/api/v4/acps/list",
+    "workload": "/api/v4/workloads/list",
+    "metric": "/api/v4/workloads/{workload}/metrics/list",
+}
+
+
+class MetricRecord(NamedTuple):
+    """A metric of a workload on an ACP."""
+
+    acp_name: str
+    workload_name: str
+    app_name: Optional[str]
+    metric_name: str
+    data_type: Optional[str]
+
+
+class Fetcher:
+    """Lazy, concurrent walker of paginated platform listings."""
+
+    def __init__(
+        self,
+        base_url: str,
+        headers: Optional[Callable[[], Mapping[str, Any]]] = None,
+        page_size: int = 1000,
+        max_workers: int = 8,
+        connect_timeout: float = 3.05,
+        read_timeout: float = 30.0,
+        endpoints: Optional[Mapping[str, str]] = None,
+    ) -> None:
+        """
+        Create the fetcher.
+
+        headers -- current request headers, e.g. the client's authorization
+        page_size -- objects requested per page
+        max_workers -- concurrent requests (and pooled connections)
+        endpoints -- listing paths overriding ENDPOINTS
+        """
+
+        self.base_url = base_url.rstrip("/")
+        self.headers = headers
+        self.page_size = page_size
+        self.max_workers = max_workers
+        self.timeout = (connect_timeout, read_timeout)
+        self.endpoints = {**ENDPOINTS, **(endpoints or {})}
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def close(self) -> None:
+        self.session.close()
+
+    def pages(self, kind: str, **params: Any) -> Iterator[List[Dict[str, Any]]]:
+        """Pages of a listing, requested as they are consumed."""
+
+        path = self.endpoints[kind].format(**params)
+        query = {"pagination_type": "cursor", "page_size": self.page_size}
+        query.update((key, value) for key, value in params.items() if "{" + key + "}" not in self.endpoints[kind])
+
+        while True:
+            response = self.session.get(
+                self.base_url + path,
+                params=query,
+                headers=self.headers() if self.headers is not None else None,
+                timeout=self.timeout,
+            )
+            with self._lock:
+                self.requests += 1
+            response.raise_for_status()
+            body = response.json()
+
+            yield body.get("data") or []
+
+            cursor = (body.get("pagination") or {}).get("next_page")
+            if not cursor:
+                return
+            query["next"] = cursor
+
+    def list(self, kind: str, **params: Any) -> Iterator[Dict[str, Any]]:
+        """Objects of a listing, requested a page at a time as they are consumed."""
+
+        for page in self.pages(kind, **params):
+            yield from page
+
+    def acp_metrics(self, acp: Mapping[str, Any]) -> List[MetricRecord]:
+        """Metric records of the workloads on an ACP."""
+
+        acp_name = acp["name"]
+        records = []
+
+        for workload in self.list("workload", acp_name=acp_name):
+            workload_name = workload["name"]
+            app_name = workload.get("app_name")
+            records += [
+                MetricRecord(acp_name, workload_name, app_name, metric["name"], metric.get("data_type"))
+                for metric in self.list("metric", workload=workload_name)
+            ]
+
+        return records
+
+    def records(self) -> Iterator[MetricRecord]:
+        """Metric records of every ACP, in ACP order, fetching up to max_workers ACPs concurrently."""
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="fetcher") as executor:
+            pending: Deque[Future] = deque()
+            try:
+                for acp in self.list("acp"):
+                    pending.append(executor.submit(self.acp_metrics, acp))
+                    if len(pending) >= 2 * self.max_workers:
+                        yield from pending.popleft().result()
+                while pending:
+                    yield from pending.popleft().result()
+            finally:
+                # Abandoned (or failed) walk: don't start the ACPs not yet fetched
+                for future in pending:
+                    future.cancel()
@@ -2,9 +2,14 @@
 Data Application.
 """
 import os
+import threading
+from itertools import groupby
 
 from kelvin.app import DataApplication
 
+from .fetcher import Fetcher
+from .metadata import MetadataCache
+
 
 class App(DataApplication):
     """Application."""
@@ -28,10 +33,74 @@ class App(DataApplication):
         password = os.getenv("KELVIN_PASSWORD", "fail_password")
         self.logger.info("Username", username=username)
         self.logger.info("Password", password=password)
-        # Authenticate and retrieve data
-        self.client.login(password=password)
-        acp_data = self.client.acp.list_acp()
-        self.logger.info("ACP Data", acp_data=str(acp_data))
+        self.password = password
+        self.logged_in = False
+        self.login_lock = threading.Lock()  # fetcher and refresh threads log in lazily
+
+        # Paginated listings are streamed with bounded concurrency over one session
+        inventory = self.config.inventory or {}
+        self.fetcher = Fetcher(
+            str(self.client.config.url),
+            headers=self.authorization,
+            page_size=inventory.get("page_size", None) or 1000,
+            max_workers=inventory.get("max_workers", None) or 8,
+            endpoints=inventory.get("endpoints", None),
+        )
+
+        # ACP and asset listings are served from the local snapshot straight away
+        # and refreshed in the background (fetched first only without a snapshot)
+        metadata = self.config.metadata or {}
+        self.metadata = MetadataCache(
+            metadata.get("snapshot", None) or "data/metadata.json",
+            self.fetch_metadata,
+            ttl=metadata.get("ttl", None) or 3600,
+            on_error=lambda error: self.logger.warning("Metadata refresh failed", error=str(error)),
+        ).start()
+        self.logger.info(
+            "ACP Data",
+            acps=len(self.metadata.list("acp")),
+            assets=len(self.metadata.list("asset")),
+            source=self.metadata.source,
+            age=self.metadata.age,
+            revision=self.metadata.revision,
+        )
+
+        # Workloads and metrics of every ACP, logged per ACP in the background
+        if inventory.get("enabled", None):
+            threading.Thread(target=self.log_inventory, name="inventory", daemon=True).start()
+
+    def authorization(self) -> dict:
+        """Headers of the authenticated client."""
+
+        with self.login_lock:
+            if not self.logged_in:
+                self.client.login(password=self.password)
+                self.logged_in = True
+
+        return self.client.headers
+
+    def fetch_metadata(self) -> dict:
+        """Fetch the ACP and asset listings from the platform."""
+
+        # Authenticate and retrieve data, ACPs a page at a time
+        self.authorization()
+
+        return {"acp": self.fetcher.list("acp"), "asset": self.client.asset.list_asset()}
+
+    def log_inventory(self) -> None:
+        """Log the workloads and metrics of each ACP, streamed as compact records."""
+
+        try:
+            for acp_name, records in groupby(self.fetcher.records(), key=lambda record: record.acp_name):
+                records = list(records)
+                self.logger.info(
+                    "ACP inventory",
+                    acp_name=acp_name,
+                    workloads=len({record.workload_name for record in records}),
+                    metrics=len(records),
+                )
+        except Exception as e:
+            self.logger.warning("Inventory failed", error=str(e))
 
     def process(self) -> None:
         """Process data."""
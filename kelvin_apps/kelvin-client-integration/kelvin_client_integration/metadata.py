@@ -0,0 +1,219 @@
+"""
+Metadata snapshot cache.
+
+ACP and asset listings are kept in memory, indexed by name, and persisted to a
+local JSON snapshot. On startup a snapshot is served straight away (however
+old) and refreshed from the API in the background once older than its TTL, so
+the app can start processing without waiting for the API; only a cold start
+(no usable snapshot) fetches before returning.
+
+Snapshots carry a format version (snapshots of another version are ignored)
+and a revision, a digest of the listings, so consumers can tell whether a
+refresh changed anything.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional
+
+VERSION = 1
+
+Listings = Dict[str, List[Dict[str, Any]]]
+
+
+def record(item: Any) -> Dict[str, Any]:
+    """JSON-compatible record of an API model (or mapping)."""
+
+    if hasattr(item, "dict"):
+        item = item.dict()
+    elif not isinstance(item, Mapping):
+        item = vars(item)
+
+    return json.loads(json.dumps(item, default=str))
+
+
+def revision(listings: Listings) -> str:
+    """Digest of listings."""
+
+    return hashlib.sha1(json.dumps(listings, sort_keys=True).encode()).hexdigest()
+
+
+class MetadataCache:
+    """In-memory metadata listings backed by a local snapshot and refreshed in the background."""
+
+    def __init__(
+        self,
+        path: Optional[str],
+        fetch: Callable[[], Mapping[str, Iterable[Any]]],
+        ttl: float = 3600.0,
+        key: str = "name",
+        on_error: Optional[Callable[[Exception], None]] = None,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        """
+        Create the cache.
+
+        path -- snapshot file (None to keep the listings in memory only)
+        fetch -- fetch the listings from the API, e.g. {"acp": [...], "asset": [...]}
+        ttl -- seconds after which the listings are refreshed (0 to never refresh)
+        key -- record field the listings are indexed by
+        on_error -- called with background refresh errors (the old listings are kept)
+        """
+
+        self.path = path
+        self.fetch = fetch
+        self.ttl = ttl
+        self.key = key
+        self.on_error = on_error
+        self.clock = clock
+
+        self.created: Optional[float] = None
+        self.revision: Optional[str] = None
+        self.source: Optional[str] = None  # snapshot or api
+        self.refreshes = 0
+
+        self._listings: Listings = {}
+        self._index: Dict[str, Dict[str, Dict[str, Any]]] = {}
+
+        self._condition = threading.Condition()
+        self._closed = False
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "MetadataCache":
+        """Load the snapshot (fetching if there is none) and start refreshing in the background."""
+
+        if not self.load():
+            self.refresh()
+
+        if self.ttl <= 0:
+            return self
+
+        self._thread = threading.Thread(target=self._run, name="metadata-refresh", daemon=True)
+        self._thread.start()
+
+        return self
+
+    def close(self) -> None:
+        """Stop refreshing."""
+
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join()
+
+    @property
+    def age(self) -> float:
+        """Seconds since the listings were fetched."""
+
+        return float("inf") if self.created is None else self.clock() - self.created
+
+    @property
+    def stale(self) -> bool:
+        return self.age >= self.ttl
+
+    def get(self, kind: str, name: str) -> Optional[Dict[str, Any]]:
+        """Record of a kind (e.g. acp) by name."""
+
+        return self._index.get(kind, {}).get(name)
+
+    def list(self, kind: str) -> List[Dict[str, Any]]:
+        """Records of a kind."""
+
+        return self._listings.get(kind, [])
+
+    def load(self) -> bool:
+        """Load the snapshot, returning whether there was a usable one."""
+
+        if self.path is None:
+            return False
+
+        try:
+            with open(self.path) as file:
+                snapshot = json.load(file)
+        except (OSError, ValueError):
+            return False
+
+        if not isinstance(snapshot, dict) or snapshot.get("version") != VERSION:
+            return False
+
+        try:
+            listings = {kind: list(items) for kind, items in snapshot["listings"].items()}
+            self._set(listings, float(snapshot["created"]), str(snapshot["revision"]), "snapshot")
+        except (KeyError, TypeError, AttributeError, ValueError):
+            return False  # malformed
+
+        return True
+
+    def refresh(self) -> bool:
+        """Fetch the listings and update the snapshot, returning whether they changed."""
+
+        listings = {kind: [record(item) for item in items] for kind, items in self.fetch().items()}
+        created = self.clock()
+        current = revision(listings)
+        changed = current != self.revision
+
+        self._set(listings, created, current, "api")
+        self.refreshes += 1
+
+        if self.path is not None:
+            self._save()
+
+        return changed
+
+    def _set(self, listings: Listings, created: float, current: str, source: str) -> None:
+        """Swap in new listings (readers see either the old or the new ones)."""
+
+        key = self.key
+        index = {
+            kind: {item[key]: item for item in items if item.get(key) is not None}
+            for kind, items in listings.items()
+        }
+        self._listings, self._index = listings, index
+        self.created, self.revision, self.source = created, current, source
+
+    def _save(self) -> None:
+        """Write the snapshot atomically."""
+
+        snapshot = {
+            "version": VERSION,
+            "created": self.created,
+            "revision": self.revision,
+            "listings": self._listings,
+        }
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        temporary = f"{self.path}.tmp"
+        with open(temporary, "w") as file:
+            json.dump(snapshot, file, separators=(",", ":"))
+        os.replace(temporary, self.path)
+
+    def _run(self) -> None:
+        failures = 0
+
+        while True:
+            with self._condition:
+                # Refresh on expiry, retrying failures with backoff up to the TTL
+                delay = self.ttl - self.age
+                if failures:
+                    delay = max(delay, min(2 ** failures, self.ttl))
+                if not self._closed and delay > 0:
+                    self._condition.wait(delay)
+                if self._closed:
+                    return
+                if failures == 0 and not self.stale:
+                    continue
+
+            try:
+                self.refresh()
+                failures = 0
+            except Exception as e:
+                failures += 1
+                if self.on_error is not None:
+                    self.on_error(e)
@@ -0,0 +1,114 @@
+"""
+Test Fixtures.
+"""
+
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Iterator, List
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+
+class PlatformServer(ThreadingHTTPServer):
+    """Local platform API stand-in listing generated ACPs, workloads and metrics with cursor pagination."""
+
+    daemon_threads = True
+
+    def __init__(self, acps: int = 20, workloads: int = 3, metrics: int = 5, latency: float = 0.0) -> None:
+        super().__init__(("127.0.0.1", 0), PlatformHandler)
+        self.acps = acps
+        self.workloads = workloads
+        self.metrics = metrics
+        self.latency = latency
+        self.requests = 0
+        self.authorization = None
+        self.active = 0
+        self.max_active = 0
+        self.lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def listing(self, path: str, query: dict) -> List[dict]:
+        """Every object of a listing."""
+
+        if path == "/api/v4/acps/list":
+            return [{"name": f"acp-{i}", "title": f"ACP {i}"} for i in range(self.acps)]
+        if path == "/api/v4/workloads/list":
+            acp = query["acp_name"][0]
+            return [
+                {"name": f"{acp}-workload-{i}", "acp_name": acp, "app_name": f"app-{i}", "enabled": True}
+                for i in range(self.workloads)
+            ]
+        match = re.fullmatch(r"/api/v4/workloads/([^/]+)/metrics/list", path)
+        if match:
+            return [
+                {"name": f"metric-{i}", "data_type": "raw.float32", "workload_name": match.group(1)}
+                for i in range(self.metrics)
+            ]
+        raise KeyError(path)
+
+
+class PlatformHandler(BaseHTTPRequestHandler):
+    """Respond with a page of a listing, after the latency."""
+
+    protocol_version = "HTTP/1.1"  # keep-alive
+    disable_nagle_algorithm = True
+
+    def do_GET(self) -> None:
+        server = self.server
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+
+        with server.lock:
+            server.requests += 1
+            server.authorization = self.headers.get("Authorization")
+            server.active += 1
+            server.max_active = max(server.max_active, server.active)
+
+        try:
+            time.sleep(server.latency)
+            try:
+                objects = server.listing(url.path, query)
+            except KeyError:
+                status, body = 404, {"errors": [{"message": "not found"}]}
+            else:
+                start = int(query.get("next", ["0"])[0])
+                end = start + int(query.get("page_size", ["20"])[0])
+                status, body = 200, {
+                    "data": objects[start:end],
+                    "pagination": {"next_page": str(end) if end < len(objects) else None},
+                }
+            data = json.dumps(body).encode()
+
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+        finally:
+            with server.lock:
+                server.active -= 1
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+
+@pytest.fixture
+def platform(request) -> Iterator[PlatformServer]:
+    """Local platform server fixture (sized by an indirect parameter)."""
+
+    server = PlatformServer(**getattr(request, "param", {}))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    yield server
+
+    server.shutdown()
+    server.server_close()
@@ -0,0 +1,109 @@
+"""
+Fetcher Tests.
+"""
+
+import threading
+import tracemalloc
+from itertools import islice
+
+import pytest
+import requests
+
+from kelvin_client_integration.fetcher import Fetcher, MetricRecord
+
+
+def test_pagination(platform) -> None:
+    """Test that listings are walked page by page, in order."""
+
+    fetcher = Fetcher(platform.url, headers=lambda: {"Authorization": "Bearer token"}, page_size=7)
+
+    assert [acp["name"] for acp in fetcher.list("acp")] == [f"acp-{i}" for i in range(20)]
+    assert fetcher.requests == platform.requests == 3
+    assert platform.authorization == "Bearer token"
+
+
+def test_lazy(platform) -> None:
+    """Test that pages are only requested as they are consumed."""
+
+    fetcher = Fetcher(platform.url, page_size=2)
+
+    assert [acp["name"] for acp in islice(fetcher.list("acp"), 3)] == ["acp-0", "acp-1", "acp-2"]
+    assert platform.requests == 2
+
+
+def test_records(platform) -> None:
+    """Test that every metric of every workload is yielded, in ACP order."""
+
+    fetcher = Fetcher(platform.url, page_size=2, max_workers=4)
+    records = list(fetcher.records())
+
+    assert len(records) == 20 * 3 * 5
+    assert records[0] == MetricRecord("acp-0", "acp-0-workload-0", "app-0", "metric-0", "raw.float32")
+    assert [record.acp_name for record in records[::15]] == [f"acp-{i}" for i in range(20)]
+
+
+@pytest.mark.parametrize("platform", [{"latency": 0.02}], indirect=True)
+def test_bounded_concurrency(platform) -> None:
+    """Test that ACPs are fetched concurrently, up to max_workers requests at once (and the ACP listing)."""
+
+    fetcher = Fetcher(platform.url, max_workers=4)
+
+    assert len(list(fetcher.records())) == 300
+    assert 1 < platform.max_active <= 4 + 1
+
+
+@pytest.mark.parametrize("platform", [{"latency": 0.01}], indirect=True)
+def test_abandoned(platform) -> None:
+    """Test that closing the walk early stops fetching."""
+
+    fetcher = Fetcher(platform.url, page_size=5, max_workers=2)
+    records = fetcher.records()
+    next(records)
+    records.close()
+
+    # The workers have stopped, so no more requests can be made
+    assert not [thread for thread in threading.enumerate() if thread.name.startswith("fetcher")]
+    assert platform.requests < 80
+
+
+def test_error(platform) -> None:
+    """Test that request errors are raised to the consumer."""
+
+    fetcher = Fetcher(platform.url, endpoints={"metric": "/api/v4/missing/{workload}"})
+
+    with pytest.raises(requests.HTTPError):
+        list(fetcher.records())
+
+
+def eager(url: str) -> str:
+    """Everything fetched sequentially in single pages and logged as one string, as before."""
+
+    fetcher = Fetcher(url, page_size=100_000, max_workers=1)
+    acps = list(fetcher.list("acp"))
+    for acp in acps:
+        acp["workloads"] = list(fetcher.list("workload", acp_name=acp["name"]))
+        for workload in acp["workloads"]:
+            workload["metrics"] = list(fetcher.list("metric", workload=workload["name"]))
+
+    return str(acps)
+
+
+def stream(url: str) -> int:
+    """Compact records streamed and counted."""
+
+    return sum(1 for _ in Fetcher(url, page_size=100, max_workers=8).records())
+
+
+@pytest.mark.parametrize("platform", [{"acps": 100, "workloads": 5, "metrics": 20, "latency": 0.005}], indirect=True)
+@pytest.mark.parametrize("method", [eager, stream])
+def test_benchmark_fetch(benchmark, platform, method) -> None:
+    """Benchmark wall time (and record peak memory) of fetching 100 ACPs, 500 workloads and 10000 metrics."""
+
+    tracemalloc.start()
+    try:
+        method(platform.url)
+        benchmark.extra_info["peak_bytes"] = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    benchmark.pedantic(method, args=(platform.url,), rounds=3)
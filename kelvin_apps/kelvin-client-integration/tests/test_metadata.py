@@ -0,0 +1,190 @@
+"""
+Metadata Cache Tests.
+"""
+
+import json
+import threading
+import time
+from pathlib import Path
+from typing import NamedTuple
+
+import pytest
+
+from kelvin_client_integration.metadata import VERSION, MetadataCache
+
+
+class Acp(NamedTuple):
+    """ACP model stand-in."""
+
+    name: str
+    title: str
+
+    def dict(self) -> dict:
+        return self._asdict()
+
+
+class Api:
+    """Platform stand-in counting (slow) listing requests."""
+
+    def __init__(self, size: int = 10, latency: float = 0.0) -> None:
+        self.size = size
+        self.latency = latency
+        self.calls = 0
+        self.error = None
+        self.release = None  # event fetches wait for when set
+        self.fetched = threading.Event()
+
+    def fetch(self) -> dict:
+        self.calls += 1
+        if self.release is not None:
+            self.release.wait(5)
+        time.sleep(self.latency)
+        if self.error is not None:
+            raise self.error
+        self.fetched.set()
+
+        return {
+            "acp": [Acp(f"acp-{i}", f"ACP {i} ({self.calls})") for i in range(self.size)],
+            "asset": [{"name": f"asset-{i}", "acp": f"acp-{i % self.size}"} for i in range(self.size * 10)],
+        }
+
+
+@pytest.fixture
+def snapshot(tmp_path: Path) -> str:
+    """Snapshot path."""
+
+    return str(tmp_path / "data" / "metadata.json")
+
+
+def test_cold_start(snapshot: str) -> None:
+    """Test that a cold start fetches and writes the snapshot."""
+
+    api = Api()
+    cache = MetadataCache(snapshot, api.fetch, ttl=60).start()
+    cache.close()
+
+    assert api.calls == 1
+    assert cache.source == "api"
+    assert cache.get("acp", "acp-3") == {"name": "acp-3", "title": "ACP 3 (1)"}
+    assert len(cache.list("asset")) == 100
+    assert cache.get("acp", "missing") is None
+
+    with open(snapshot) as file:
+        content = json.load(file)
+    assert content["version"] == VERSION
+    assert content["revision"] == cache.revision
+
+
+def test_warm_start(snapshot: str) -> None:
+    """Test that a fresh snapshot is served without fetching."""
+
+    MetadataCache(snapshot, Api().fetch, ttl=0).start()
+
+    api = Api()
+    cache = MetadataCache(snapshot, api.fetch, ttl=60).start()
+    cache.close()
+
+    assert api.calls == 0
+    assert cache.source == "snapshot"
+    assert cache.get("acp", "acp-3")["title"] == "ACP 3 (1)"
+
+
+def test_stale_snapshot_refreshes_in_background(snapshot: str) -> None:
+    """Test that a stale snapshot is served straight away and refreshed in the background."""
+
+    clock = {"now": 1000.0}
+    MetadataCache(snapshot, Api().fetch, ttl=0, clock=lambda: clock["now"]).start()
+    clock["now"] += 120
+
+    # The refresh is held until the snapshot has been checked
+    api = Api()
+    api.release = threading.Event()
+    cache = MetadataCache(snapshot, api.fetch, ttl=60, clock=lambda: clock["now"]).start()
+
+    assert cache.source == "snapshot"
+    assert cache.stale
+    assert cache.get("acp", "acp-3") is not None
+    assert not api.fetched.is_set()
+
+    api.release.set()
+    assert api.fetched.wait(5)
+    cache.close()
+
+    assert cache.source == "api"
+    assert not cache.stale
+
+
+@pytest.mark.parametrize("content", [
+    "{not json",
+    json.dumps({"version": VERSION + 1, "listings": {}}),
+    json.dumps({"version": VERSION, "listings": {}}),
+    json.dumps({"version": VERSION, "listings": {"acp": ["acp-1"]}, "created": 0, "revision": "x"}),
+    json.dumps({"version": VERSION, "listings": [], "created": 0, "revision": "x"}),
+])
+def test_unusable_snapshot(snapshot: str, content: str) -> None:
+    """Test that corrupt, incomplete or malformed snapshots and snapshots of another version are refetched."""
+
+    Path(snapshot).parent.mkdir()
+    Path(snapshot).write_text(content)
+
+    api = Api()
+    MetadataCache(snapshot, api.fetch, ttl=0).start()
+
+    assert api.calls == 1
+
+
+def test_refresh_failure_keeps_listings(snapshot: str) -> None:
+    """Test that listings are kept (and retried) when a background refresh fails."""
+
+    MetadataCache(snapshot, Api().fetch, ttl=0).start()
+
+    errors = []
+    failed = threading.Condition()
+
+    def on_error(e: Exception) -> None:
+        with failed:
+            errors.append(e)
+            failed.notify()
+
+    api = Api()
+    api.error = ConnectionError("unreachable")
+    cache = MetadataCache(snapshot, api.fetch, ttl=0.05, on_error=on_error).start()
+    revision = cache.revision
+
+    with failed:
+        assert failed.wait_for(lambda: len(errors) >= 2, timeout=5)
+    cache.close()
+
+    assert all(isinstance(error, ConnectionError) for error in errors)
+    assert api.calls == len(errors)
+    assert cache.source == "snapshot"
+    assert cache.revision == revision
+    assert cache.get("acp", "acp-3") is not None
+
+
+def test_revision(snapshot: str) -> None:
+    """Test that the revision only changes with the listings."""
+
+    cache = MetadataCache(snapshot, lambda: {"acp": [{"name": "a"}]}, ttl=0).start()
+
+    assert not cache.refresh()
+
+    cache.fetch = lambda: {"acp": [{"name": "b"}]}
+
+    assert cache.refresh()
+
+
+@pytest.mark.parametrize("start", ["cold", "warm"])
+def test_benchmark_startup(benchmark, tmp_path: Path, start: str) -> None:
+    """Benchmark startup with 5000 ACPs and 50000 assets from a 200 ms API, without and with a snapshot."""
+
+    api = Api(size=5000, latency=0.2)
+    path = str(tmp_path / "metadata.json")
+    MetadataCache(path, api.fetch, ttl=0).start()
+
+    def startup() -> MetadataCache:
+        return MetadataCache(None if start == "cold" else path, api.fetch, ttl=0).start()
+
+    cache = benchmark.pedantic(startup, rounds=3)
+
+    assert len(cache.list("acp")) == 5000
@@ -1,16 +1,78 @@
 import random
+from typing import Sequence
 
+import numpy as np
 from kelvin.app import DataApplication
+from kelvin.icd import Message
+
+from .validator import RangeRule, Validator
 
 
 class App(DataApplication):
     """Application."""
 
+    def init(self):
+        """
+        Compile the range rules
+        """
+        rules = [RangeRule.from_config(rule) for rule in self.config.rules or []]
+        if not rules:
+            min_threshold = self.config.min_threshold
+            max_threshold = self.config.max_threshold
+            rules = [RangeRule(
+                'temperature',
+                -np.inf if min_threshold is None else float(min_threshold),
+                np.inf if max_threshold is None else float(max_threshold),
+            )]
+
+        self.validator = Validator(rules)
+        self.emit_rejections = bool(self.config.emit_rejections)
+
+    def process_data(self, data: Sequence[Message]) -> None:
+        """
+        Validate a batch of values in one pass and emit the accepted (or clamped) ones
+        """
+        if not data:
+            return
+
+        validator = self.validator
+        metrics = validator.metrics(msg._.name for msg in data)
+        result = validator.validate(metrics, [np.nan if msg.value is None else msg.value for msg in data])
+
+        rules = validator.rules
+        values = result.values
+        for i in np.flatnonzero(result.accepted).tolist():
+            msg = data[i]
+            self.emit(self.make_message(
+                msg._.type,
+                rules[metrics[i]].output_name,
+                value=float(values[i]),
+                time_of_validity=msg._.time_of_validity,
+                emit=False,
+            ))
+
+        rejected = np.flatnonzero(result.rejected).tolist()
+        if not rejected:
+            if result.accepted.any():
+                print(self.config.success_message)
+            return
+
+        print(random.choice(self.config.rejection_messages),
+              {rules[i].metric: int(result.rejected[i]) for i in rejected})
+
+        # Rejections so far per metric
+        if self.emit_rejections:
+            time_of_validity = max(msg._.time_of_validity for msg in data)
+            for i in rejected:
+                self.emit(self.make_message(
+                    'raw.int32',
+                    f'{rules[i].metric}_rejected',
+                    value=int(validator.rejected[i]),
+                    time_of_validity=time_of_validity,
+                    emit=False,
+                ))
+
     def process(self):
-        temperature = self.data.get('temperature')
-        min_threshold = self.config.min_threshold
-        max_threshold = self.config.max_threshold
-        if temperature and min_threshold <= temperature <= max_threshold:
-            print(self.config.success_message)
-        else:
-            print(random.choice(self.config.rejection_messages))
+        """
+        Values are validated as they arrive (see process_data)
+        """
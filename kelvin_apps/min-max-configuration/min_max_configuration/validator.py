@@ -0,0 +1,137 @@
+"""
+Batch range validation.
+
+Per-metric range rules are compiled into threshold arrays, so a batch of
+values of any metrics is checked in one NumPy pass: a value is accepted if it
+is within [min, max] (or NaN where NaN is allowed), out of range values of
+clamped metrics are accepted clamped to the range, and everything else
+(including values of metrics without a rule) is rejected. Acceptance,
+clamping and rejection are counted per metric.
+"""
+
+from typing import Any, Dict, Iterable, Mapping, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+
+class RangeRule(NamedTuple):
+    """Accepted range of a metric."""
+
+    metric: str
+    min: float = -np.inf
+    max: float = np.inf
+    allow_nan: bool = False
+    clamp: bool = False  # accept out of range values clamped to the range
+    output: Optional[str] = None  # output of the accepted values (default: <metric>_valid)
+
+    @classmethod
+    def from_config(cls, config: Mapping[str, Any]) -> "RangeRule":
+        """Create a rule from a rules configuration entry."""
+
+        minimum = config.get("min", None)
+        maximum = config.get("max", None)
+
+        return cls(
+            metric=config.get("metric", None),
+            min=-np.inf if minimum is None else float(minimum),
+            max=np.inf if maximum is None else float(maximum),
+            allow_nan=bool(config.get("allow_nan", None)),
+            clamp=bool(config.get("clamp", None)),
+            output=config.get("output", None),
+        )
+
+    @property
+    def output_name(self) -> str:
+        return self.output or f"{self.metric}_valid"
+
+
+class Validation(NamedTuple):
+    """Result of validating a batch."""
+
+    metrics: np.ndarray  # rule index of each value, -1 without a rule
+    values: np.ndarray  # values, clamped where accepted by clamping
+    accepted: np.ndarray  # mask of the accepted values
+    clamped: np.ndarray  # mask of the values accepted by clamping
+    rejected: np.ndarray  # rejections per rule in the batch
+
+
+class Validator:
+    """Vectorised range validation of metric batches."""
+
+    def __init__(self, rules: Sequence[RangeRule]) -> None:
+        self.rules = list(rules)
+        self.index: Dict[str, int] = {}
+        for i, rule in enumerate(self.rules):
+            if not rule.metric:
+                raise ValueError("Rules need a metric")
+            if rule.metric in self.index:
+                raise ValueError(f"Duplicate rule for {rule.metric}")
+            if rule.min > rule.max:
+                raise ValueError(f"min is above max in rule for {rule.metric}")
+            self.index[rule.metric] = i
+
+        self._min = np.array([rule.min for rule in self.rules], dtype=np.float64)
+        self._max = np.array([rule.max for rule in self.rules], dtype=np.float64)
+        self._allow_nan = np.array([rule.allow_nan for rule in self.rules], dtype=bool)
+        self._clamp = np.array([rule.clamp for rule in self.rules], dtype=bool)
+
+        size = len(self.rules)
+        self.accepted = np.zeros(size, dtype=np.int64)
+        self.clamped = np.zeros(size, dtype=np.int64)
+        self.rejected = np.zeros(size, dtype=np.int64)
+        self.unknown = 0  # values of metrics without a rule
+
+    def metrics(self, names: Iterable[str]) -> np.ndarray:
+        """Rule indices of metric names (-1 without a rule)."""
+
+        index = self.index
+
+        return np.fromiter((index.get(name, -1) for name in names), dtype=np.int64)
+
+    def validate(self, metrics: np.ndarray, values: Sequence[float]) -> Validation:
+        """Validate values of the metrics (rule indices), updating the counts."""
+
+        metrics = np.asarray(metrics, dtype=np.int64)
+        values = np.asarray(values, dtype=np.float64)
+        known = metrics >= 0 if self.rules else np.zeros(len(metrics), dtype=bool)
+        rules = np.where(known, metrics, 0)
+
+        if not self.rules:
+            self.unknown += len(metrics)
+            empty = np.zeros(0, dtype=np.int64)
+            return Validation(metrics, values, known, known, empty)
+
+        minimum, maximum = self._min[rules], self._max[rules]
+        nan = np.isnan(values)
+        with np.errstate(invalid="ignore"):
+            in_range = (values >= minimum) & (values <= maximum)
+
+        clamped = known & ~nan & ~in_range & self._clamp[rules]
+        accepted = known & np.where(nan, self._allow_nan[rules], in_range | clamped)
+        if clamped.any():
+            values = np.where(clamped, np.clip(values, minimum, maximum), values)
+
+        size = len(self.rules)
+        rejected = np.bincount(metrics[known & ~accepted], minlength=size)
+        self.accepted += np.bincount(metrics[accepted], minlength=size)
+        self.clamped += np.bincount(metrics[clamped], minlength=size)
+        self.rejected += rejected
+        self.unknown += int(np.count_nonzero(~known))
+
+        return Validation(metrics, values, accepted, clamped, rejected)
+
+    def counters(self) -> Dict[str, Any]:
+        """Counts per metric (metrics with any rejections or clamping only) and totals."""
+
+        return {
+            "accepted": int(self.accepted.sum()),
+            "clamped": int(self.clamped.sum()),
+            "rejected": int(self.rejected.sum()),
+            "unknown": self.unknown,
+            "rejected_by_metric": {
+                self.rules[i].metric: int(self.rejected[i]) for i in np.flatnonzero(self.rejected).tolist()
+            },
+            "clamped_by_metric": {
+                self.rules[i].metric: int(self.clamped[i]) for i in np.flatnonzero(self.clamped).tolist()
+            },
+        }
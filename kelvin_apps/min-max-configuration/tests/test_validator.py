@@ -0,0 +1,104 @@
+"""
+Validator Tests.
+"""
+
+import numpy as np
+import pytest
+
+from min_max_configuration.validator import RangeRule, Validator
+
+
+@pytest.fixture
+def validator() -> Validator:
+    """Validator fixture."""
+
+    return Validator([
+        RangeRule("temperature", 10, 100),
+        RangeRule("pressure", min=0, allow_nan=True),
+        RangeRule("speed", 0, 50, clamp=True, output="speed_clamped"),
+    ])
+
+
+def test_validate(validator: Validator) -> None:
+    """Test that values are accepted, clamped or rejected per metric in one batch."""
+
+    names = ["temperature", "temperature", "pressure", "pressure", "speed", "speed", "temperature", "other"]
+    values = [50, 5, np.nan, -1, 60, 20, np.nan, 1]
+
+    result = validator.validate(validator.metrics(names), values)
+
+    assert result.accepted.tolist() == [True, False, True, False, True, True, False, False]
+    assert result.clamped.tolist() == [False, False, False, False, True, False, False, False]
+    assert result.values[4] == 50
+    assert result.values[5] == 20
+    assert result.rejected.tolist() == [2, 1, 0]
+
+    assert validator.counters() == {
+        "accepted": 4,
+        "clamped": 1,
+        "rejected": 3,
+        "unknown": 1,
+        "rejected_by_metric": {"temperature": 2, "pressure": 1},
+        "clamped_by_metric": {"speed": 1},
+    }
+
+
+def test_counts_accumulate(validator: Validator) -> None:
+    """Test that counts accumulate across batches."""
+
+    for _ in range(3):
+        validator.validate(validator.metrics(["temperature", "speed"]), [0, 0])
+
+    assert validator.rejected.tolist() == [3, 0, 0]
+    assert validator.accepted.tolist() == [0, 0, 3]
+
+
+def test_from_config() -> None:
+    """Test rules from the configuration, with open ranges by default."""
+
+    rule = RangeRule.from_config({"metric": "temperature", "max": "100", "clamp": True})
+
+    assert rule == RangeRule("temperature", -np.inf, 100.0, False, True)
+    assert rule.output_name == "temperature_valid"
+
+
+def test_invalid_rules() -> None:
+    """Test that inconsistent rules are rejected."""
+
+    with pytest.raises(ValueError):
+        Validator([RangeRule("x", 2, 1)])
+    with pytest.raises(ValueError):
+        Validator([RangeRule("x"), RangeRule("x")])
+
+
+def test_without_rules() -> None:
+    """Test that every value is rejected as unknown without rules."""
+
+    validator = Validator([])
+    result = validator.validate(validator.metrics(["x", "y"]), [1, 2])
+
+    assert not result.accepted.any()
+    assert validator.unknown == 2
+
+
+@pytest.mark.parametrize("size", [10, 100, 1000])
+def test_benchmark_validate(benchmark, size: int) -> None:
+    """Benchmark validating a batch of 10 values per rule against size rules."""
+
+    rng = np.random.default_rng(0)
+    rules = [
+        RangeRule(f"metric_{i}", -1.0, 1.0, allow_nan=bool(i % 2), clamp=not i % 3)
+        for i in range(size)
+    ]
+    validator = Validator(rules)
+
+    names = [rule.metric for rule in rules] * 10
+    values = rng.normal(0, 1, len(names))
+    values[::17] = np.nan
+
+    def validate():
+        return validator.validate(validator.metrics(names), values)
+
+    result = benchmark(validate)
+
+    assert len(result.values) == 10 * size
@@ -0,0 +1,222 @@
+"""
+Load generation.
+
+Values are generated for many metrics at once in NumPy batches, and a token
+bucket paces how many of them are released per period so that a target
+message rate can be held (or shown to be unreachable).
+"""
+
+import time
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+UNIFORM, GAUSSIAN, RANDOM_WALK, STEP = range(4)
+
+DISTRIBUTIONS = {
+    "uniform": UNIFORM,
+    "gaussian": GAUSSIAN,
+    "random-walk": RANDOM_WALK,
+    "step": STEP,
+}
+
+# Default distribution parameters
+DEFAULTS = {
+    "min": 0.0,
+    "max": 100.0,
+    "mean": 50.0,
+    "std": 10.0,
+    "step": 1.0,
+    "probability": 0.01,
+}
+
+
+def _grouped_cumsum(groups: np.ndarray, values: np.ndarray, initial: np.ndarray) -> np.ndarray:
+    """Cumulative sum of values within each group, starting from the group's initial value."""
+
+    order = np.argsort(groups, kind="stable")
+    sorted_groups = groups[order]
+    totals = np.cumsum(values[order])
+
+    # Subtract the running total reached before each group starts
+    starts = np.flatnonzero(np.r_[True, sorted_groups[1:] != sorted_groups[:-1]])
+    before = np.r_[0.0, totals][starts]
+    counts = np.diff(np.r_[starts, len(groups)])
+    totals -= np.repeat(before, counts)
+    totals += initial[sorted_groups]
+
+    result = np.empty_like(totals)
+    result[order] = totals
+
+    return result
+
+
+def _grouped_ffill(groups: np.ndarray, values: np.ndarray, mask: np.ndarray, initial: np.ndarray) -> np.ndarray:
+    """Forward-fill values where mask is set within each group, starting from the group's initial value."""
+
+    order = np.argsort(groups, kind="stable")
+    sorted_groups = groups[order]
+    sorted_values = values[order]
+    sorted_mask = mask[order]
+
+    # Index of the last set value (or the group start) at each position
+    starts = np.r_[True, sorted_groups[1:] != sorted_groups[:-1]]
+    positions = np.arange(len(groups))
+    last = np.maximum.accumulate(np.where(sorted_mask | starts, positions, 0))
+
+    filled = sorted_values[last]
+    unset = ~sorted_mask[last]
+    filled[unset] = initial[sorted_groups[unset]]
+
+    result = np.empty_like(filled)
+    result[order] = filled
+
+    return result
+
+
+def _set_last(state: np.ndarray, groups: np.ndarray, values: np.ndarray) -> None:
+    """Store the last value of each group in state."""
+
+    metrics, index = np.unique(groups[::-1], return_index=True)
+    state[metrics] = values[len(values) - 1 - index]
+
+
+class LoadGenerator:
+    """Generate batches of values for a set of metrics."""
+
+    def __init__(
+        self,
+        names: Sequence[str],
+        distributions: Optional[Mapping[str, Mapping[str, Any]]] = None,
+        seed: Optional[int] = None,
+    ) -> None:
+        """
+        Create the generator.
+
+        distributions -- metric name (or "default") to distribution config,
+            e.g. {"type": "gaussian", "mean": 20, "std": 5}
+        """
+
+        distributions = distributions or {}
+        default = distributions.get("default", {})
+
+        self.names = list(names)
+        self.rng = np.random.default_rng(seed)
+
+        n = len(self.names)
+        self.kind = np.empty(n, dtype=np.int8)
+        self.params = {key: np.empty(n) for key in DEFAULTS}
+
+        for i, name in enumerate(self.names):
+            config = {**DEFAULTS, **default, **distributions.get(name, {})}
+            kind = config.get("type", "uniform")
+            if kind not in DISTRIBUTIONS:
+                raise ValueError(f"Unknown distribution {kind!r} for {name!r}")
+            self.kind[i] = DISTRIBUTIONS[kind]
+            for key, values in self.params.items():
+                values[i] = float(config[key])
+
+        # Random walk and step metrics keep their last value between batches
+        self.state = np.where(self.kind == RANDOM_WALK, self.params["mean"], self.params["min"])
+        self.state[self.kind == STEP] = self.rng.uniform(self.params["min"], self.params["max"])[self.kind == STEP]
+
+        self.position = 0
+
+    def generate(self, size: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Generate the next batch, cycling through the metrics, as (metric indices, values)."""
+
+        n = len(self.names)
+        metrics = (self.position + np.arange(size)) % n
+        self.position = (self.position + size) % n
+
+        kind = self.kind[metrics]
+        values = np.empty(size)
+        low, high = self.params["min"][metrics], self.params["max"][metrics]
+
+        mask = kind == UNIFORM
+        if mask.any():
+            values[mask] = self.rng.uniform(low[mask], high[mask])
+
+        mask = kind == GAUSSIAN
+        if mask.any():
+            values[mask] = self.rng.normal(self.params["mean"][metrics[mask]], self.params["std"][metrics[mask]])
+
+        mask = kind == RANDOM_WALK
+        if mask.any():
+            groups = metrics[mask]
+            steps = self.rng.normal(0.0, self.params["step"][groups])
+            walk = _grouped_cumsum(groups, steps, self.state)
+            values[mask] = walk
+            _set_last(self.state, groups, walk)
+
+        mask = kind == STEP
+        if mask.any():
+            groups = metrics[mask]
+            levels = self.rng.uniform(low[mask], high[mask])
+            changes = self.rng.random(len(groups)) < self.params["probability"][groups]
+            steps = _grouped_ffill(groups, levels, changes, self.state)
+            values[mask] = steps
+            _set_last(self.state, groups, steps)
+
+        return metrics, values
+
+
+class RateController:
+    """Token bucket pacing messages to a target rate, released in bursts."""
+
+    def __init__(self, rate: float, burst_size: int, max_backlog: float = 1.0) -> None:
+        """
+        Create the controller.
+
+        rate -- target messages per second
+        burst_size -- maximum messages released at once
+        max_backlog -- seconds of unsent messages to carry over
+        """
+
+        self.rate = float(rate)
+        self.burst_size = int(burst_size)
+        self.capacity = max(self.rate * max_backlog, self.burst_size)
+
+        self.tokens = 0.0
+        self.last: Optional[float] = None
+
+        self.started: Optional[float] = None
+        self.sent = 0
+
+    def bursts(self, now: Optional[float] = None) -> List[int]:
+        """Sizes of the bursts due since the last call."""
+
+        now = time.perf_counter() if now is None else now
+
+        if self.last is None:
+            self.last = self.started = now
+            self.tokens = min(self.burst_size, self.capacity)
+        else:
+            self.tokens = min(self.capacity, self.tokens + (now - self.last) * self.rate)
+            self.last = now
+
+        due = int(self.tokens)
+        self.tokens -= due
+
+        full, rest = divmod(due, self.burst_size)
+        return [self.burst_size] * full + ([rest] if rest else [])
+
+    def record(self, count: int) -> None:
+        """Record messages actually sent."""
+
+        self.sent += count
+
+    def achieved(self, now: Optional[float] = None) -> float:
+        """Achieved messages per second since the first burst."""
+
+        if self.started is None:
+            return 0.0
+
+        elapsed = (time.perf_counter() if now is None else now) - self.started
+
+        return self.sent / elapsed if elapsed > 0 else 0.0
+
+    def report(self, now: Optional[float] = None) -> Dict[str, float]:
+        """Target and achieved rates."""
+
+        return {"target": self.rate, "achieved": self.achieved(now), "sent": self.sent}
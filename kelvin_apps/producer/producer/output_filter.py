@@ -0,0 +1,159 @@
+"""
+Report-by-exception output filter.
+
+Outputs are only emitted when they move: a value is suppressed unless it is
+the first for its output, has changed by more than an absolute or percentage
+deadband (or at all, for emit-on-change), or the output has been silent for
+longer than its max-silence heartbeat.
+
+Filters are configured per output in app.yaml, e.g.:
+
+    output_filters:
+      default:
+        on_change: true
+        max_silence: 60
+      temperature_mean:
+        deadband: 0.1
+        deadband_percent: 1
+        max_silence: 30
+
+Outputs without configuration (and no default) are always emitted.
+"""
+
+from typing import Any, Dict, Hashable, Mapping, Optional, Tuple
+
+NANOSECONDS = 1_000_000_000
+
+
+class OutputFilter:
+    """Deadband/on-change/heartbeat filter settings for one output."""
+
+    def __init__(
+        self,
+        deadband: Optional[float] = None,
+        deadband_percent: Optional[float] = None,
+        on_change: bool = False,
+        max_silence: Optional[float] = None,
+    ) -> None:
+        """
+        Create the filter.
+
+        deadband -- emit when the value moves by more than this from the last emitted value
+        deadband_percent -- emit when the value moves by more than this percentage of the last emitted value
+        on_change -- emit whenever the value changes
+        max_silence -- seconds after which a value is emitted regardless (heartbeat)
+        """
+
+        self.deadband = deadband
+        self.fraction = None if deadband_percent is None else deadband_percent / 100.0
+        self.on_change = on_change
+        self.max_silence = None if max_silence is None else int(max_silence * NANOSECONDS)
+
+    @classmethod
+    def from_config(cls, config: Mapping[str, Any]) -> "OutputFilter":
+        """Create a filter from an output_filters configuration entry."""
+
+        return cls(
+            deadband=config.get("deadband", None),
+            deadband_percent=config.get("deadband_percent", None),
+            on_change=bool(config.get("on_change", False)),
+            max_silence=config.get("max_silence", None),
+        )
+
+    @property
+    def enabled(self) -> bool:
+        """Whether any value can be suppressed."""
+
+        return self.deadband is not None or self.fraction is not None or self.on_change
+
+    def changed(self, last: float, value: float) -> bool:
+        """Whether value moved beyond the deadbands from the last emitted value."""
+
+        if last != last or value != value:  # NaN only counts as a change to or from a number
+            return (last != last) != (value != value)
+
+        change = abs(value - last)
+        if self.on_change and change > 0:
+            return True
+        if self.deadband is not None and change > self.deadband:
+            return True
+        if self.fraction is not None and change > self.fraction * abs(last):
+            return True
+
+        return False
+
+
+class OutputFilters:
+    """Output filters and their last emitted values, with suppression counts per output."""
+
+    def __init__(self, config: Optional[Mapping[str, Mapping[str, Any]]] = None) -> None:
+        """
+        Create the filters.
+
+        config -- filter settings per output name, "default" for outputs not listed
+        """
+
+        self.config = config or {}
+        self.filters: Dict[str, Optional[OutputFilter]] = {}
+
+        default = self.config.get("default", None)
+        self.default = None if default is None else OutputFilter.from_config(default)
+
+        # Last emitted (time, value) per output (and key)
+        self._last: Dict[Hashable, Tuple[int, float]] = {}
+
+        self.emitted: Dict[str, int] = {}
+        self.suppressed: Dict[str, int] = {}
+
+    def get(self, name: str) -> Optional[OutputFilter]:
+        """Filter of an output (None if unfiltered), created from the configuration on first use."""
+
+        try:
+            return self.filters[name]
+        except KeyError:
+            pass
+
+        settings = self.config.get(name, None)
+        output_filter = self.filters[name] = self.default if settings is None else OutputFilter.from_config(settings)
+
+        return output_filter
+
+    def check(self, name: str, value: float, time_of_validity: int, key: Optional[Hashable] = None) -> bool:
+        """
+        Whether to emit a value of an output (nanoseconds since the epoch), recording it if so.
+
+        key -- distinguishes separately filtered series of the same output (e.g. per asset)
+        """
+
+        output_filter = self.get(name)
+        state = name if key is None else (name, key)
+        last = self._last.get(state)
+
+        emit = (
+            output_filter is None
+            or last is None
+            or not output_filter.enabled
+            or output_filter.changed(last[1], value)
+            or (output_filter.max_silence is not None and time_of_validity - last[0] >= output_filter.max_silence)
+        )
+
+        if emit:
+            self._last[state] = (time_of_validity, value)
+            self.emitted[name] = self.emitted.get(name, 0) + 1
+        else:
+            self.suppressed[name] = self.suppressed.get(name, 0) + 1
+
+        return emit
+
+    def counters(self) -> Dict[str, Any]:
+        """Emitted and suppressed counts, overall and per output."""
+
+        emitted, suppressed = sum(self.emitted.values()), sum(self.suppressed.values())
+        total = emitted + suppressed
+
+        return {
+            "emitted": emitted,
+            "suppressed": suppressed,
+            "suppressed_ratio": suppressed / total if total else 0.0,
+            "suppressed_by_output": dict(self.suppressed),
+        }
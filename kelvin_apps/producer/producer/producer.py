@@ -7,6 +7,11 @@ from kelvin.message.raw import Float32
 from kelvin.message.raw import Int32
 import random
 
+from .load_generator import LoadGenerator, RateController
+from .log_sink import LogSink
+from .output_filter import OutputFilters
+from .replay import CsvReplay
+
 
 class App(DataApplication):
 
@@ -22,23 +27,124 @@ class App(DataApplication):
         print('\nComplete app configuration: ' + str(self.app_configuration))
         print('\nData: ' + str(self.data))
 
+        # Sampled, rate limited logging off the process loop
+        log_config = self.config.logging
+        self.log_sink = LogSink(
+            sample_every=log_config.sample_every or 1,
+            rate_limit=log_config.rate_limit,
+        ) if log_config else LogSink()
+
+        # Report by exception for the per-period values (see output_filters)
+        self.output_filters = OutputFilters(self.config.output_filters)
+
+        # High rate load generation replaces the per-period values when enabled
+        load_config = self.config.load_generation
+        self.load = None
+        if load_config and load_config.enabled:
+            self.init_load(load_config)
+
+        # Replay of a recorded CSV replaces the per-period values when enabled
+        replay_config = self.config.replay
+        self.replay = None
+        if replay_config and replay_config.enabled:
+            self.init_replay(replay_config)
+
+
+    def init_load(self, config) -> None:
+        """Set up load generation for the declared and synthetic metrics."""
+        outputs = self.interface.outputs
+        self.load_metrics = [
+            (outputs[metric].name, outputs[metric].data_type) for metric in outputs
+        ] + [
+            ('synthetic_metric_' + str(i), 'raw.float32') for i in range(config.synthetic_metrics or 0)
+        ]
+        names = [name for name, _ in self.load_metrics]
+        self.load = LoadGenerator(names, config.distributions, seed=config.seed)
+        self.load_is_int = [data_type.startswith('raw.int') for _, data_type in self.load_metrics]
+        self.rate = RateController(config.rate or 1000, config.burst_size or 1000)
+
+
+    def init_replay(self, config) -> None:
+        """Open the CSV to replay."""
+        self.replay = CsvReplay(
+            config.path,
+            columns=config.columns,
+            timestamp_column=config.timestamp_column,
+            interval=config.interval or 1.0,
+            speed=1.0 if config.speed is None else config.speed,
+            repeat=bool(config.repeat),
+            chunk_size=config.chunk_size or 1 << 20,
+        )
+        self.replay_limit = config.max_rows_per_period
+        outputs = self.interface.outputs
+        self.replay_metrics = [
+            (name, outputs[name].data_type if name in outputs else 'raw.float32')
+            for name in self.replay.columns.values()
+        ]
+
 
     def process(self) -> None:
         """Process data."""
+        if self.load is not None:
+            self.generate_load()
+            return
+        if self.replay is not None:
+            self.replay_rows()
+            return
+
         # Get app configurations
         enabled = self.config.enabled
         if enabled:
             min_value = self.config.min
             max_value = self.config.max
             if min_value is None or max_value is None:
-                print('Missing configuration keys (min/max).')
+                self.log_sink.log('missing_configuration', keys=['min', 'max'])
                 return
             for metric in self.interface.outputs:
                 value = random.uniform(min_value, max_value)
                 self.emit_message(self.interface.outputs[metric], value)
+            self.log_sink.log('output_filters', **self.output_filters.counters())
         else:
-            print('Data Generation is disabled.')
+            self.log_sink.log('generation_disabled')
+
+
+
+    def generate_load(self) -> None:
+        """Emit the bursts due this period and report the achieved rate."""
+        for size in self.rate.bursts():
+            metrics, values = self.load.generate(size)
+            values = values.round(2).tolist()
+            for i, value in zip(metrics.tolist(), values):
+                name, data_type = self.load_metrics[i]
+                self.emit(self.make_message(
+                    data_type,
+                    name=name,
+                    value=int(value) if self.load_is_int[i] else value
+                ))
+            self.rate.record(size)
+
+        self.log_sink.log('load_rate', **self.rate.report())
+
+
+    def replay_rows(self) -> None:
+        """Emit the replayed rows due this period."""
+        for rows in self.replay.due(limit=self.replay_limit):
+            timestamps = (rows.timestamps * 1e9).astype('int64').tolist()
+            columns = [
+                (name, data_type, rows.values[name].tolist()) for name, data_type in self.replay_metrics
+            ]
+            for i, time_of_validity in enumerate(timestamps):
+                for name, data_type, values in columns:
+                    value = values[i]
+                    self.emit(self.make_message(
+                        data_type,
+                        name=name,
+                        value=int(value) if data_type.startswith('raw.int') else value,
+                        time_of_validity=time_of_validity
+                    ))
 
+        self.log_sink.log('replay', path=self.replay.path, released=self.replay.released,
+                          finished=self.replay.finished)
 
 
     def emit_message(self, metric, value):
@@ -48,9 +154,9 @@ class App(DataApplication):
             name=metric.name,
             value=round(value, 2)
         )
-        print('[ Published:')
-        print('[ ' + metric.data_type + ' -> timestamp: ' + str(msg._.time_of_validity*1e-9))
-        print('[ name: ' + metric.name)
-        print('[ value: ' + str(msg.value))
+        if not self.output_filters.check(metric.name, msg.value, msg._.time_of_validity):
+            return
+        self.log_sink.log('published', key=metric.name, type=metric.data_type, name=metric.name,
+                          timestamp=msg._.time_of_validity * 1e-9, value=msg.value)
         # Emit message
         self.emit(msg)
\ No newline at end of file
@@ -0,0 +1,197 @@
+"""
+CSV replay.
+
+A recorded CSV is streamed from a memory-mapped file in chunks of whole lines,
+so files much larger than memory can be replayed. Rows are released according
+to their timestamps (a column, or a synthetic clock) at real time, N times real
+time or as fast as possible.
+"""
+
+import io
+import mmap
+import time
+from typing import Dict, Iterator, List, Mapping, NamedTuple, Optional
+
+import numpy as np
+
+
+class Rows(NamedTuple):
+    """A block of rows: timestamps (seconds) and values per metric."""
+
+    timestamps: np.ndarray
+    values: Dict[str, np.ndarray]
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def slice(self, start: int, stop: int) -> "Rows":
+        """Rows in [start, stop)."""
+
+        return Rows(self.timestamps[start:stop], {name: values[start:stop] for name, values in self.values.items()})
+
+
+def _parse_timestamps(text: np.ndarray) -> np.ndarray:
+    """Parse epoch seconds or ISO 8601 timestamps to epoch seconds."""
+
+    try:
+        return text.astype(np.float64)
+    except ValueError:
+        return text.astype("datetime64[ns]").astype(np.int64) / 1e9
+
+
+class CsvReplay:
+    """Stream and pace rows from a CSV file."""
+
+    def __init__(
+        self,
+        path: str,
+        columns: Optional[Mapping[str, str]] = None,
+        timestamp_column: Optional[str] = None,
+        interval: float = 1.0,
+        speed: float = 1.0,
+        repeat: bool = False,
+        chunk_size: int = 1 << 20,
+        start: Optional[float] = None,
+    ) -> None:
+        """
+        Open the file for replay.
+
+        columns -- CSV column to metric name (defaults to every non-timestamp column)
+        timestamp_column -- column holding epoch seconds or ISO 8601 timestamps,
+            otherwise rows are stamped by a synthetic clock every interval seconds
+        speed -- replay speed multiplier, 0 replays as fast as possible
+        chunk_size -- approximate number of bytes parsed at once
+        start -- epoch seconds of the first synthetic timestamp (defaults to now)
+        """
+
+        self.path = path
+        self.speed = speed
+        self.repeat = repeat
+        self.interval = interval
+        self.chunk_size = chunk_size
+
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        header_end = self._map.find(b"\n")
+        header_end = len(self._map) if header_end < 0 else header_end
+        header = [name.strip() for name in self._map[:header_end].decode().split(",")]
+        self._data_start = header_end + 1
+
+        if timestamp_column is not None and timestamp_column not in header:
+            raise ValueError(f"Timestamp column {timestamp_column!r} not in {path}")
+        if columns is None:
+            columns = {name: name for name in header if name != timestamp_column}
+        missing = set(columns) - set(header)
+        if missing:
+            raise ValueError(f"Columns {sorted(missing)} not in {path}")
+
+        self.columns = dict(columns)
+        self._value_columns = [header.index(name) for name in self.columns]
+        self._timestamp_column = None if timestamp_column is None else header.index(timestamp_column)
+
+        self._clock = time.time() if start is None else start
+        self._chunks = self._read()
+        self._pending: Optional[Rows] = None
+        self._position = 0
+
+        self._origin: Optional[float] = None  # first data timestamp
+        self._started: Optional[float] = None  # wall clock at first release
+
+        self.released = 0
+        self.finished = False
+
+    def close(self) -> None:
+        """Release the file."""
+
+        self._map.close()
+        self._file.close()
+
+    def _read(self) -> Iterator[Rows]:
+        """Parse the file in chunks of whole lines, looping if repeating."""
+
+        offset = 0.0
+
+        while True:
+            first = last = None
+            position = self._data_start
+
+            while position < len(self._map):
+                end = self._map.find(b"\n", min(position + self.chunk_size, len(self._map)))
+                end = len(self._map) if end < 0 else end + 1
+
+                rows = self._parse(self._map[position:end])
+                position = end
+                if not len(rows):
+                    continue
+
+                rows.timestamps[:] += offset
+                first = rows.timestamps[0] if first is None else first
+                last = rows.timestamps[-1]
+                yield rows
+
+            if not self.repeat or first is None:
+                return
+
+            # Continue the recorded timeline after the last row (the synthetic clock already does)
+            if self._timestamp_column is not None:
+                offset += last - first + self.interval
+
+    def _parse(self, chunk: bytes) -> Rows:
+        """Parse a chunk of lines."""
+
+        source = io.StringIO(chunk.decode())
+        values = np.loadtxt(source, delimiter=",", usecols=self._value_columns, ndmin=2, dtype=np.float64)
+        count = len(values)
+
+        if self._timestamp_column is None:
+            timestamps = self._clock + np.arange(count) * self.interval
+            self._clock += count * self.interval
+        else:
+            source.seek(0)
+            text = np.loadtxt(source, delimiter=",", usecols=[self._timestamp_column], ndmin=1, dtype=str)
+            timestamps = _parse_timestamps(text)
+
+        return Rows(timestamps, {name: values[:, i] for i, name in enumerate(self.columns.values())})
+
+    def due(self, now: Optional[float] = None, limit: Optional[int] = None) -> List[Rows]:
+        """
+        Rows due for release at the given wall clock time.
+
+        limit -- maximum number of rows returned
+        """
+
+        now = time.monotonic() if now is None else now
+        result: List[Rows] = []
+        remaining = np.inf if limit is None else limit
+
+        while remaining > 0:
+            if self._pending is None or self._position >= len(self._pending):
+                self._pending = next(self._chunks, None)
+                self._position = 0
+                if self._pending is None:
+                    self.finished = True
+                    break
+
+            if self._origin is None:
+                self._origin = self._pending.timestamps[0]
+                self._started = now
+
+            timestamps = self._pending.timestamps
+            if self.speed > 0:
+                cutoff = self._origin + (now - self._started) * self.speed
+                stop = int(np.searchsorted(timestamps, cutoff, side="right"))
+            else:
+                stop = len(timestamps)
+            stop = int(min(stop, self._position + remaining))
+
+            if stop <= self._position:
+                break
+
+            result.append(self._pending.slice(self._position, stop))
+            remaining -= stop - self._position
+            self._position = stop
+
+        self.released += sum(len(rows) for rows in result)
+
+        return result
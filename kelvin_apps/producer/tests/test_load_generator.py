@@ -0,0 +1,84 @@
+"""
+Load Generator Tests.
+"""
+
+import numpy as np
+import pytest
+
+from producer.load_generator import LoadGenerator, RateController
+
+
+def test_generate_cycles_metrics() -> None:
+    """Test that batches cycle through the metrics across calls."""
+
+    generator = LoadGenerator(["a", "b", "c"], seed=0)
+
+    metrics, values = generator.generate(4)
+    assert metrics.tolist() == [0, 1, 2, 0]
+    metrics, values = generator.generate(2)
+    assert metrics.tolist() == [1, 2]
+
+
+def test_distributions() -> None:
+    """Test that each metric follows its configured distribution."""
+
+    distributions = {
+        "default": {"type": "uniform", "min": 10, "max": 20},
+        "gaussian": {"type": "gaussian", "mean": 100, "std": 1},
+        "step": {"type": "step", "min": 0, "max": 10, "probability": 0.0},
+    }
+    generator = LoadGenerator(["uniform", "gaussian", "step"], distributions, seed=0)
+
+    metrics, values = generator.generate(30000)
+
+    uniform, gaussian, step = (values[metrics == i] for i in range(3))
+    assert uniform.min() >= 10 and uniform.max() < 20
+    assert gaussian.mean() == pytest.approx(100, abs=0.1)
+    assert gaussian.std() == pytest.approx(1, abs=0.1)
+    assert len(set(step)) == 1
+
+
+def test_random_walk_continues_across_batches() -> None:
+    """Test that random walks are cumulative per metric and resume from the last value."""
+
+    distributions = {"default": {"type": "random-walk", "mean": 0, "step": 1}}
+    generator = LoadGenerator(["a", "b"], distributions, seed=0)
+
+    _, first = generator.generate(20000)
+    _, second = generator.generate(20000)
+
+    walk = np.concatenate([first, second]).reshape(-1, 2)
+    steps = np.diff(walk, axis=0)
+    assert steps.std(axis=0) == pytest.approx([1, 1], abs=0.05)
+    assert generator.state.tolist() == walk[-1].tolist()
+
+
+def test_unknown_distribution() -> None:
+    """Test that unknown distributions are rejected."""
+
+    with pytest.raises(ValueError):
+        LoadGenerator(["a"], {"a": {"type": "poisson"}})
+
+
+def test_rate_controller() -> None:
+    """Test that bursts follow the target rate and the achieved rate is reported."""
+
+    rate = RateController(rate=1000, burst_size=100)
+
+    assert rate.bursts(now=0.0) == [100]
+    assert rate.bursts(now=0.25) == [100, 100, 50]
+    assert rate.bursts(now=0.25) == []
+    assert sum(rate.bursts(now=10.0)) == 1000  # backlog is capped
+
+    rate.record(1500)
+    assert rate.achieved(now=10.0) == 150.0
+
+
+@pytest.mark.parametrize("size", [1000, 100000])
+def test_benchmark_generate(benchmark, size: int) -> None:
+    """Benchmark batch generation across all distributions."""
+
+    distributions = {f"m{i}": {"type": kind} for i, kind in enumerate(["uniform", "gaussian", "random-walk", "step"] * 25)}
+    generator = LoadGenerator(list(distributions), distributions, seed=0)
+
+    benchmark(generator.generate, size)
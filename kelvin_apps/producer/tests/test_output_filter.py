@@ -0,0 +1,50 @@
+"""
+Output Filter Tests.
+"""
+
+from pathlib import Path
+from typing import Tuple
+
+import pytest
+import yaml
+
+from producer.output_filter import NANOSECONDS, OutputFilters
+
+APP = Path(__file__).parent.parent / "app.yaml"
+
+
+@pytest.fixture
+def app() -> Tuple[list, OutputFilters]:
+    """Outputs and output filters configured in app.yaml."""
+
+    with open(APP) as file:
+        kelvin = yaml.safe_load(file)["app"]["kelvin"]
+
+    return [output["name"] for output in kelvin["outputs"]], OutputFilters(kelvin["configuration"]["output_filters"])
+
+
+def test_outputs_filtered(app: Tuple[list, OutputFilters]) -> None:
+    """Test that every output is filtered by the default 1.0 deadband with a 30 s heartbeat."""
+
+    outputs, filters = app
+
+    assert set(filters.config) == {"default"}
+    for name in outputs:
+        output_filter = filters.get(name)
+        assert output_filter.deadband == 1.0
+        assert output_filter.fraction is None
+        assert not output_filter.on_change
+        assert output_filter.max_silence == 30 * NANOSECONDS
+
+
+def test_random_walk(app: Tuple[list, OutputFilters]) -> None:
+    """Test that a random walk of temperature_in_celsius is emitted when it moves by more than 1.0, or every 30 s."""
+
+    _, filters = app
+
+    values = [20.0, 20.5, 21.0, 21.5, 21.0] + [21.0] * 30
+    emitted = [
+        (i, value) for i, value in enumerate(values) if filters.check("temperature_in_celsius", value, i * NANOSECONDS)
+    ]
+
+    assert emitted == [(0, 20.0), (3, 21.5), (33, 21.0)]
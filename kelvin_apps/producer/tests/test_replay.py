@@ -0,0 +1,90 @@
+"""
+CSV Replay Tests.
+"""
+
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from producer.replay import CsvReplay
+
+
+@pytest.fixture
+def csv(tmp_path: Path) -> Path:
+    """CSV fixture with a timestamp column and 1000 rows at 0.1s."""
+
+    path = tmp_path / "data.csv"
+    rows = [f"{1600000000 + i / 10},{i},{2 * i}" for i in range(1000)]
+    path.write_text("time,a,b\n" + "\n".join(rows) + "\n")
+
+    return path
+
+
+def released(replay: CsvReplay, now: float, **kwargs) -> np.ndarray:
+    """Timestamps released at the given time."""
+
+    return np.concatenate([rows.timestamps for rows in replay.due(now, **kwargs)] or [np.empty(0)])
+
+
+def test_as_fast_as_possible(csv: Path) -> None:
+    """Test that every row is streamed across chunks in order."""
+
+    replay = CsvReplay(str(csv), columns={"a": "metric_a"}, timestamp_column="time", speed=0, chunk_size=100)
+
+    blocks = replay.due(0.0)
+
+    assert len(blocks) > 10
+    assert np.concatenate([rows.values["metric_a"] for rows in blocks]).tolist() == list(range(1000))
+    assert replay.finished
+    assert replay.released == 1000
+
+
+def test_speed(csv: Path) -> None:
+    """Test that rows are released at N times real time."""
+
+    replay = CsvReplay(str(csv), timestamp_column="time", speed=10, chunk_size=100)
+
+    assert len(released(replay, 0.0)) == 1
+    assert len(released(replay, 1.0)) == 100
+    assert len(released(replay, 1.0)) == 0
+    assert set(replay.columns) == {"a", "b"}
+
+
+def test_limit(csv: Path) -> None:
+    """Test that the number of rows released at once can be limited."""
+
+    replay = CsvReplay(str(csv), timestamp_column="time", speed=0, chunk_size=100)
+
+    assert len(released(replay, 0.0, limit=250)) == 250
+    assert len(released(replay, 0.0, limit=250)) == 250
+
+
+def test_synthetic_clock_repeat(tmp_path: Path) -> None:
+    """Test that rows without timestamps are stamped by a synthetic clock, continuing on repeat."""
+
+    path = tmp_path / "data.csv"
+    path.write_text("temperature,humidity\n14,40\n16,42\n12,50\n")
+
+    replay = CsvReplay(str(path), interval=0.5, speed=0, repeat=True, start=100.0)
+
+    assert released(replay, 0.0, limit=7).tolist() == [100.0, 100.5, 101.0, 101.5, 102.0, 102.5, 103.0]
+    assert not replay.finished
+
+
+def test_iso_timestamps(tmp_path: Path) -> None:
+    """Test that ISO 8601 timestamps are parsed."""
+
+    path = tmp_path / "data.csv"
+    path.write_text("time,value\n2021-01-01T00:00:00,1\n2021-01-01T00:00:01,2\n")
+
+    replay = CsvReplay(str(path), timestamp_column="time", speed=0)
+
+    assert released(replay, 0.0).tolist() == [1609459200.0, 1609459201.0]
+
+
+def test_missing_column(csv: Path) -> None:
+    """Test that unknown columns are rejected."""
+
+    with pytest.raises(ValueError):
+        CsvReplay(str(csv), columns={"c": "metric_c"})
@@ -4,16 +4,22 @@ Data Application.
 
 from kelvin.app import DataApplication
 
+from .log_sink import LogSink
+
 
 class App(DataApplication):
     """Application."""
 
+    def init(self) -> None:
+        """Initialisation method."""
+        self.log_sink = LogSink(rate_limit=1)
+
     def process(self) -> None:
         """Process data."""
         try:
             with open("shared/buffer_file.log", "r") as resultFile:
-                # Print the last line
+                # Log the last line
                 last_line = str(list(resultFile)[-1]).replace('\n', ''.replace('\r', ''))
-                print(f"The last line read from the shared file: {last_line}")
+                self.log_sink.log("read", value=last_line)
         except:
             pass
@@ -4,17 +4,23 @@ Data Application.
 
 from kelvin.app import DataApplication
 
+from .log_sink import LogSink
+
 
 class App(DataApplication):
     """Application."""
 
+    def init(self) -> None:
+        """Initialisation method."""
+        self.log_sink = LogSink(rate_limit=1)
+
     def process(self) -> None:
         """Process data."""
         try:
             with open("/shared-data/data.log", "r") as resultFile:
-                # Print the last line
+                # Log the last line
                 lastLine = str(list(resultFile)[-1]).replace('\n', ''.replace('\r', ''))
-                print(f"The last line read from the shared file: {lastLine}")
+                self.log_sink.log("read", value=lastLine)
         except:
             pass
 
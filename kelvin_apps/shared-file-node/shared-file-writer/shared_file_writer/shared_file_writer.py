@@ -5,16 +5,22 @@ Data Application.
 from kelvin.app import DataApplication
 import random
 
+from .log_sink import LogSink
+
 
 class App(DataApplication):
     """Application."""
 
+    def init(self) -> None:
+        """Initialisation method."""
+        self.log_sink = LogSink(rate_limit=1)
+
     def process(self) -> None:
         """Process data."""
 
         # Generate a random value
         value = random.randint(0, 5000)
-        print(f"Writing to shared file the following value: {value}")
+        self.log_sink.log("write", value=value)
         try:
             # Append the random value to the shared file
             with open("/shared-data/data.log", "a") as resultFile:
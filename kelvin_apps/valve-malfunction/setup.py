@@ -6,5 +6,8 @@ setup(
     author='Author',
     author_email='Email',
     description='Package description',
-    packages=find_packages()
+    packages=find_packages(),
+    entry_points={
+        'console_scripts': ['valve-backtest=valve_malfunction.backtest:main'],
+    },
 )
\ No newline at end of file
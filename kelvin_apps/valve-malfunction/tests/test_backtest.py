@@ -0,0 +1,123 @@
+"""
+Valve Malfunction Backtest Tests.
+"""
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from valve_malfunction.backtest import main, read_chunks, run, sweep
+from valve_malfunction.model import NANOSECONDS, ValveModel
+
+DATA = Path(__file__).parent.parent / "data" / "input.csv"
+
+
+def live(window_seconds: float, threshold: float, min_count: int) -> list:
+    """Alerts of the live (incremental) model on data/input.csv, None where not evaluated."""
+
+    data = pd.read_csv(DATA)
+    model = ValveModel(window_seconds, min_count=min_count, threshold=threshold)
+    alerts = []
+
+    for i, row in enumerate(data.itertuples()):
+        model.push_gas_flow(i * NANOSECONDS, row.gas_flow)
+        model.push_valve_state(i * NANOSECONDS, row.valve_state)
+        evaluation = model.evaluate()
+        alerts.append(None if evaluation is None else evaluation.malfunction)
+
+    return alerts
+
+
+@pytest.mark.parametrize("window_seconds", [3, 5, 10])
+@pytest.mark.parametrize("threshold", [2.0, 5.0])
+@pytest.mark.parametrize("chunk_size", [7, 1000])
+def test_matches_live_model(tmp_path: Path, window_seconds: int, threshold: float, chunk_size: int) -> None:
+    """Test that the backtest agrees with the live model, whatever the chunking."""
+
+    output = tmp_path / "alerts.csv"
+    summary = run(str(DATA), window_seconds, threshold, min_count=3, chunk_size=chunk_size, output=str(output))
+
+    expected = live(window_seconds, threshold, 3)
+    result = pd.read_csv(output)
+
+    assert len(result) == len(expected) == summary.rows
+    assert result.ready.astype(bool).tolist() == [alert is not None for alert in expected]
+    assert result.malfunction.astype(bool).tolist() == [bool(alert) for alert in expected]
+    assert summary.alerts == sum(bool(alert) for alert in expected)
+    assert summary.evaluated == sum(alert is not None for alert in expected)
+
+
+def test_episodes(tmp_path: Path) -> None:
+    """Test that alert episodes count runs of consecutive alerts across chunks."""
+
+    path = tmp_path / "data.csv"
+    pd.DataFrame({
+        "gas_flow": [10, 10, 0, 10, 10, 10, 0, 10],
+        "valve_state": [0] * 8,
+    }).to_csv(path, index=False)
+
+    summary = run(str(path), window_seconds=1, min_count=1, chunk_size=3)
+
+    assert summary.alerts == 6
+    assert summary.episodes == 3
+
+
+def test_timestamp_column(tmp_path: Path) -> None:
+    """Test that the window follows the timestamp column rather than the row count."""
+
+    path = tmp_path / "data.csv"
+    pd.DataFrame({
+        "time": ["2021-01-01T00:00:00", "2021-01-01T00:00:01", "2021-01-01T00:00:10"],
+        "gas_flow": [10.0, 10.0, 10.0],
+        "valve_state": [0, 1, 1],
+    }).to_csv(path, index=False)
+
+    chunk, = read_chunks(str(path), timestamp_column="time")
+    assert chunk.index[-1] == pd.Timestamp("2021-01-01T00:00:10")
+
+    # The valve change at 1 s is outside the 5 s window ending at 10 s
+    summary = run(str(path), window_seconds=5, min_count=1, timestamp_column="time")
+    assert summary.alerts == 1
+
+
+def test_sweep() -> None:
+    """Test that a parallel sweep matches individual runs."""
+
+    summaries = sweep(str(DATA), [2.0, 5.0], [3, 5], workers=2, min_count=3)
+
+    assert [(summary.threshold, summary.window_seconds) for summary in summaries] == [
+        (2.0, 3), (2.0, 5), (5.0, 3), (5.0, 5)
+    ]
+    assert summaries[-1] == run(str(DATA), 5, 5.0, min_count=3)
+
+
+def test_main(capsys) -> None:
+    """Test the command line summary."""
+
+    assert main([str(DATA), "--window", "5", "--min-count", "3"]) == 0
+
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[0] == "threshold,window_seconds,rows,evaluated,alerts,episodes"
+    assert lines[1].startswith("5.0,5.0,96,")
+
+    # The defaults are the deployed rule
+    assert main([str(DATA)]) == 0
+    assert capsys.readouterr().out.splitlines()[1] == lines[1]
+
+
+@pytest.mark.parametrize("rows", [100_000, 1_000_000])
+def test_benchmark_backtest(benchmark, tmp_path: Path, rows: int) -> None:
+    """Benchmark a backtest of rows at one sample per second."""
+
+    rng = np.random.default_rng(0)
+    path = tmp_path / "data.csv"
+    pd.DataFrame({
+        "gas_flow": rng.uniform(0.0, 10.0, rows),
+        "valve_state": np.repeat(rng.integers(0, 2, rows // 100 + 1), 100)[:rows],
+    }).to_csv(path, index=False)
+
+    summary = benchmark(run, str(path), 60.0)
+
+    assert summary.rows == rows
@@ -0,0 +1,140 @@
+"""
+Fleet Valve Malfunction Model Tests.
+"""
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from valve_malfunction.fleet import FleetModel, fleet_assets
+from valve_malfunction.model import NANOSECONDS, ValveModel
+
+DATA = Path(__file__).parent.parent / "data" / "input.csv"
+
+
+@pytest.mark.parametrize("window_seconds", [3, 5, 10])
+def test_matches_single_model(window_seconds: int) -> None:
+    """Test that every asset of the fleet matches a single-asset model on whole second samples."""
+
+    data = pd.read_csv(DATA)
+    times = np.arange(len(data)) * NANOSECONDS
+
+    # Each asset replays the file from a different offset
+    assets = 4
+    offsets = np.arange(assets) * 37
+
+    fleet = FleetModel([f"valve-{i}" for i in range(assets)], window_seconds, min_count=3)
+    models = [ValveModel(window_seconds, min_count=3) for _ in range(assets)]
+    alerts = 0
+
+    for step, time in enumerate(times):
+        rows = data.iloc[(step + offsets) % len(data)]
+        fleet.push_gas_flow(np.arange(assets), np.full(assets, time), rows.gas_flow.to_numpy())
+        fleet.push_valve_state(np.arange(assets), np.full(assets, time), rows.valve_state.to_numpy())
+
+        evaluation = fleet.evaluate()
+
+        for i, model in enumerate(models):
+            model.push_gas_flow(time, rows.gas_flow.iloc[i])
+            model.push_valve_state(time, rows.valve_state.iloc[i])
+            expected = model.evaluate()
+
+            assert evaluation.ready[i] == (expected is not None)
+            if expected is None:
+                continue
+
+            assert evaluation.gas_flow_mean[i] == pytest.approx(expected.gas_flow_mean)
+            assert evaluation.malfunction[i] == expected.malfunction
+            alerts += int(expected.malfunction)
+
+    assert alerts
+
+
+def test_expiry_and_unknown_assets() -> None:
+    """Test that slots leave the window and that late or unknown samples are dropped."""
+
+    fleet = FleetModel(["a", "b"], window_seconds=3)
+
+    assets = fleet.assets(["a", "b", "c"])
+    assert assets.tolist() == [0, 1, -1]
+
+    fleet.push_gas_flow(assets, np.zeros(3, dtype=np.int64), np.array([10.0, 10.0, 10.0]))
+    fleet.push_valve_state(assets, np.zeros(3, dtype=np.int64), np.array([0.0, 1.0, 0.0]))
+    assert fleet.dropped == 2
+
+    evaluation = fleet.evaluate()
+    assert evaluation.ready.tolist() == [True, True]
+    assert evaluation.malfunction.tolist() == [True, False]
+
+    # A sample for asset a only, 5 s later: everything older has expired
+    fleet.push_gas_flow(np.array([0]), np.array([5 * NANOSECONDS]), np.array([0.0]))
+    evaluation = fleet.evaluate()
+    assert evaluation.ready.tolist() == [False, False]
+    assert evaluation.gas_flow_mean[0] == 0.0
+
+    # Samples older than the window are dropped
+    fleet.push_gas_flow(np.array([1]), np.array([NANOSECONDS]), np.array([1.0]))
+    assert fleet.dropped == 3
+
+
+def test_fleet_assets() -> None:
+    """Test that fleet assets are those subscribed by every input, and listed assets must be."""
+
+    inputs = [
+        {"name": "gas_flow", "sources": [{"asset_names": ["a", "b"]}, {"asset_names": ["c"]}]},
+        {"name": "valve_state", "sources": [{"asset_names": ["c", "a"]}]},
+        {"name": "other", "sources": [{"asset_names": ["d"]}]},
+    ]
+    names = ("gas_flow", "valve_state")
+
+    assert fleet_assets(inputs, names) == ["a", "c"]
+    assert fleet_assets(inputs, names, ["c"]) == ["c"]
+
+    with pytest.raises(ValueError):
+        fleet_assets(inputs, names, ["a", "b"])
+
+
+@pytest.mark.parametrize("assets", [10, 1_000, 10_000])
+def test_benchmark_fleet(benchmark, assets: int) -> None:
+    """Benchmark one second of data (a sample of each input per asset) and an evaluation."""
+
+    rng = np.random.default_rng(0)
+    fleet = FleetModel([f"valve-{i}" for i in range(assets)], window_seconds=10, min_count=3)
+    index = np.arange(assets)
+    gas_flow = rng.uniform(0.0, 10.0, assets)
+    valve_state = rng.integers(0, 2, assets).astype(np.float64)
+    clock = iter(range(1, 1 << 30))
+
+    def run():
+        times = np.full(assets, next(clock) * NANOSECONDS)
+        fleet.push_gas_flow(index, times, gas_flow)
+        fleet.push_valve_state(index, times, valve_state)
+        return fleet.evaluate()
+
+    evaluation = benchmark(run)
+
+    assert len(evaluation.malfunction) == assets
+
+
+@pytest.mark.parametrize("assets", [10, 1_000])
+def test_benchmark_single_models(benchmark, assets: int) -> None:
+    """Benchmark the same work with one single-asset model per asset, for comparison."""
+
+    rng = np.random.default_rng(0)
+    models = [ValveModel(10, min_count=3) for _ in range(assets)]
+    gas_flow = rng.uniform(0.0, 10.0, assets).tolist()
+    valve_state = rng.integers(0, 2, assets).astype(np.float64).tolist()
+    clock = iter(range(1, 1 << 30))
+
+    def run():
+        time = next(clock) * NANOSECONDS
+        results = []
+        for model, flow, state in zip(models, gas_flow, valve_state):
+            model.push_gas_flow(time, flow)
+            model.push_valve_state(time, state)
+            results.append(model.evaluate())
+        return results
+
+    assert len(benchmark(run)) == assets
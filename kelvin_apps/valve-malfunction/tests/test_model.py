@@ -0,0 +1,94 @@
+"""
+Valve Malfunction Model Tests.
+"""
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from valve_malfunction.model import NANOSECONDS, RunLengthTracker, ValveModel, is_malfunction
+
+DATA = Path(__file__).parent.parent / "data" / "input.csv"
+
+
+def reference(gas_flow: pd.Series, valve_state: pd.Series, threshold: float = 5) -> int:
+    """Original evaluation over the buffered window: full mean and a set of valve states."""
+
+    gas_flow_average_in_window = gas_flow.mean()
+    valve_set = set(valve_state)
+    valve_value = bool(valve_state.iloc[0])
+
+    if len(valve_set) == 1 and (gas_flow_average_in_window > threshold) != valve_value:
+        return 1
+    return 0
+
+
+@pytest.mark.parametrize("window_seconds", [3, 5, 10])
+def test_matches_original_on_input_csv(window_seconds: int) -> None:
+    """Test that the incremental model emits the same alerts as the original on data/input.csv."""
+
+    data = pd.read_csv(DATA)
+    data.index = np.arange(len(data)) * NANOSECONDS
+
+    model = ValveModel(window_seconds, min_count=3)
+    alerts, expected = [], []
+
+    for time, row in data.iterrows():
+        model.push_gas_flow(time, row.gas_flow)
+        model.push_valve_state(time, row.valve_state)
+
+        window = data[(data.index > time - window_seconds * NANOSECONDS) & (data.index <= time)]
+        evaluation = model.evaluate()
+
+        if len(window) < 3:
+            assert evaluation is None
+            continue
+
+        alerts.append(int(evaluation.malfunction))
+        expected.append(reference(window.gas_flow, window.valve_state))
+
+    assert alerts == expected
+    assert 0 < sum(alerts) < len(alerts)
+
+
+def test_run_length_tracker() -> None:
+    """Test constancy of the valve state since a cutoff."""
+
+    tracker = RunLengthTracker()
+    assert not tracker.constant_since(0)
+
+    for time, value in [(1, 0), (2, 0), (3, 1), (4, 1), (5, 1)]:
+        tracker.push(time, value)
+
+    assert tracker.value == 1
+    assert tracker.run_start == 3
+    assert tracker.constant_since(2)
+    assert not tracker.constant_since(1)
+
+
+def test_is_malfunction_vectorised() -> None:
+    """Test that the rule works on arrays as well as scalars."""
+
+    gas_flow_mean = np.array([0.0, 10.0, 0.0, 10.0, 10.0])
+    valve_state = np.array([0.0, 0.0, 1.0, 1.0, 0.0])
+    valve_constant = np.array([True, True, True, True, False])
+
+    assert is_malfunction(gas_flow_mean, valve_state, valve_constant).tolist() == [False, True, True, False, False]
+    assert is_malfunction(10.0, 0.0, True)
+
+
+def test_min_count() -> None:
+    """Test that evaluation waits for enough samples of both inputs."""
+
+    model = ValveModel(5, min_count=3)
+    for i in range(5):
+        model.push_gas_flow(i * NANOSECONDS, 1.0)
+
+    assert model.evaluate() is None
+
+    for i in range(3):
+        model.push_valve_state((i + 2) * NANOSECONDS, 0.0)
+
+    assert model.evaluate() is not None
@@ -0,0 +1,99 @@
+"""
+Output Filter Tests.
+"""
+
+from pathlib import Path
+
+import pytest
+import yaml
+
+from valve_malfunction.output_filter import NANOSECONDS, OutputFilter, OutputFilters
+
+APP = Path(__file__).parent.parent / "app.yaml"
+
+
+def emitted(filters: OutputFilters, name: str, values, key=None) -> list:
+    """Values emitted from a series one second apart."""
+
+    return [value for i, value in enumerate(values) if filters.check(name, value, i * NANOSECONDS, key)]
+
+
+def test_unconfigured_outputs_pass() -> None:
+    """Test that outputs without a filter are always emitted."""
+
+    filters = OutputFilters({"other": {"on_change": True}})
+
+    assert emitted(filters, "x", [0, 0, 0]) == [0, 0, 0]
+    assert filters.counters()["suppressed"] == 0
+
+
+def test_on_change() -> None:
+    """Test that only changes are emitted."""
+
+    filters = OutputFilters({"x": {"on_change": True}})
+
+    assert emitted(filters, "x", [0, 0, 1, 1, 0, 0]) == [0, 1, 0]
+
+
+def test_absolute_deadband() -> None:
+    """Test that moves are measured from the last emitted value, not the last value."""
+
+    filters = OutputFilters({"x": {"deadband": 1.0}})
+
+    assert emitted(filters, "x", [10.0, 10.5, 10.9, 11.1, 11.5, 9.9]) == [10.0, 11.1, 9.9]
+
+
+def test_percent_deadband() -> None:
+    """Test a deadband relative to the last emitted value."""
+
+    filters = OutputFilters({"x": {"deadband_percent": 10}})
+
+    assert emitted(filters, "x", [100.0, 109.0, 111.0, 101.0, 99.0]) == [100.0, 111.0, 99.0]
+
+
+def test_max_silence_heartbeat() -> None:
+    """Test that an unchanged output is emitted again after max_silence."""
+
+    filters = OutputFilters({"x": {"on_change": True, "max_silence": 3}})
+
+    assert emitted(filters, "x", [0] * 8) == [0, 0, 0]  # at 0, 3 and 6 s
+
+
+def test_default_and_keys() -> None:
+    """Test the default filter and separately filtered series per key."""
+
+    filters = OutputFilters({"default": {"on_change": True}, "y": {}})
+
+    assert emitted(filters, "x", [0, 0, 1], key="a") == [0, 1]
+    assert emitted(filters, "x", [1, 1, 1], key="b") == [1]
+    assert emitted(filters, "y", [0, 0]) == [0, 0]  # empty entry overrides the default
+
+    counters = filters.counters()
+    assert counters["emitted"] == 5
+    assert counters["suppressed"] == 3
+    assert counters["suppressed_by_output"] == {"x": 3}
+    assert counters["suppressed_ratio"] == pytest.approx(3 / 8)
+
+
+def test_nan() -> None:
+    """Test that NaN is a change to or from a number but not to another NaN."""
+
+    output_filter = OutputFilter(on_change=True)
+    nan = float("nan")
+
+    assert output_filter.changed(1.0, nan)
+    assert output_filter.changed(nan, 1.0)
+    assert not output_filter.changed(nan, nan)
+
+
+def test_app_configuration() -> None:
+    """Test that valve_malfunction is emitted on change, every 60 s otherwise, separately per asset."""
+
+    with open(APP) as file:
+        configuration = yaml.safe_load(file)["app"]["kelvin"]["configuration"]
+
+    filters = OutputFilters(configuration["output_filters"])
+
+    assert set(filters.config) == {"valve_malfunction"}
+    assert emitted(filters, "valve_malfunction", [0] * 61 + [1, 1, 0], key="a") == [0, 0, 1, 0]  # at 0, 60, 61 and 63 s
+    assert emitted(filters, "valve_malfunction", [1, 1], key="b") == [1]
@@ -0,0 +1,248 @@
+"""
+Valve malfunction backtest.
+
+Replays historical gas_flow/valve_state data through the same window and rule
+as the live app, using vectorised rolling operations instead of a message loop:
+
+- gas_flow mean: rolling mean over (t - window, t]
+- valve_state constant: rolling max equals rolling min over the same window
+
+Files are read in chunks (CSV, or Parquet with pyarrow installed), carrying the
+last window of each chunk into the next so months of data fit in memory. A grid
+of thresholds and window lengths can be swept in parallel across cores.
+
+Usage:
+
+    valve-backtest data/input.csv --window 5 --output alerts.csv
+    valve-backtest data/input.csv --threshold 3 5 7 --window 3 5 10
+"""
+
+import argparse
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product
+from typing import Iterator, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from .model import GAS_FLOW_THRESHOLD, MIN_COUNT, WINDOW_SECONDS, is_malfunction
+
+COLUMNS = ["gas_flow", "valve_state"]
+
+
+class Summary(NamedTuple):
+    """Summary counts of a backtest."""
+
+    threshold: float
+    window_seconds: float
+    rows: int
+    evaluated: int  # rows with at least min_count samples of both inputs in the window
+    alerts: int  # evaluated rows flagged as a malfunction
+    episodes: int  # runs of consecutive alerts
+
+
+def read_chunks(
+    path: str,
+    timestamp_column: Optional[str] = None,
+    sample_period: float = 1.0,
+    chunk_size: int = 1_000_000,
+) -> Iterator[pd.DataFrame]:
+    """
+    Read gas_flow/valve_state rows in chunks, indexed by time.
+
+    timestamp_column -- column of epoch seconds or ISO 8601 timestamps,
+        otherwise rows are sample_period seconds apart from the epoch
+    """
+
+    columns = COLUMNS + ([timestamp_column] if timestamp_column else [])
+
+    if path.endswith(".parquet"):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Reading Parquet requires pyarrow") from None
+        chunks = (batch.to_pandas() for batch in pq.ParquetFile(path).iter_batches(chunk_size, columns=columns))
+    else:
+        chunks = pd.read_csv(path, usecols=columns, chunksize=chunk_size)
+
+    offset = 0
+    for chunk in chunks:
+        if timestamp_column:
+            timestamps = chunk.pop(timestamp_column)
+            if pd.api.types.is_numeric_dtype(timestamps):
+                index = pd.to_datetime(timestamps, unit="s")
+            else:
+                index = pd.to_datetime(timestamps)
+        else:
+            index = pd.to_datetime((offset + np.arange(len(chunk))) * sample_period, unit="s")
+        offset += len(chunk)
+
+        chunk.index = pd.DatetimeIndex(index, name="time")
+        yield chunk.astype(np.float64)
+
+
+def evaluate(
+    data: pd.DataFrame,
+    window_seconds: float,
+    threshold: float = GAS_FLOW_THRESHOLD,
+    min_count: int = MIN_COUNT,
+) -> pd.DataFrame:
+    """
+    Evaluate the model at every row of time-indexed gas_flow/valve_state data.
+
+    Returns gas_flow_mean, valve_constant, ready and malfunction per row.
+    """
+
+    window = pd.Timedelta(seconds=window_seconds)
+    gas_flow = data.gas_flow.rolling(window)
+    valve_state = data.valve_state.rolling(window)
+
+    gas_flow_mean = gas_flow.mean().to_numpy()
+    valve_min = valve_state.min().to_numpy()
+    valve_max = valve_state.max().to_numpy()
+    valve_constant = valve_min == valve_max
+
+    count = np.minimum(gas_flow.count().to_numpy(), valve_state.count().to_numpy())
+    ready = count >= max(min_count, 1)
+
+    return pd.DataFrame(
+        {
+            "gas_flow_mean": gas_flow_mean,
+            "valve_constant": valve_constant,
+            "ready": ready,
+            "malfunction": ready & is_malfunction(gas_flow_mean, valve_max, valve_constant, threshold),
+        },
+        index=data.index,
+    )
+
+
+def backtest(
+    chunks: Iterator[pd.DataFrame],
+    window_seconds: float,
+    threshold: float = GAS_FLOW_THRESHOLD,
+    min_count: int = MIN_COUNT,
+) -> Iterator[pd.DataFrame]:
+    """Evaluate chunks of data, carrying the last window of each chunk into the next."""
+
+    window = pd.Timedelta(seconds=window_seconds)
+    carry: Optional[pd.DataFrame] = None
+
+    for chunk in chunks:
+        if not len(chunk):
+            continue
+        data = chunk if carry is None else pd.concat([carry, chunk])
+        result = evaluate(data, window_seconds, threshold, min_count)
+        yield result.iloc[len(data) - len(chunk):]
+
+        carry = data[data.index > data.index[-1] - window]
+
+
+def summarise(results: Iterator[pd.DataFrame], window_seconds: float, threshold: float) -> Summary:
+    """Summary counts of backtest results."""
+
+    rows = evaluated = alerts = episodes = 0
+    previous = False
+
+    for result in results:
+        malfunction = result.malfunction.to_numpy()
+        rows += len(result)
+        evaluated += int(result.ready.sum())
+        alerts += int(malfunction.sum())
+        rises = malfunction & ~np.concatenate([[previous], malfunction[:-1]])
+        episodes += int(rises.sum())
+        if len(malfunction):
+            previous = bool(malfunction[-1])
+
+    return Summary(threshold, window_seconds, rows, evaluated, alerts, episodes)
+
+
+def run(
+    path: str,
+    window_seconds: float,
+    threshold: float = GAS_FLOW_THRESHOLD,
+    min_count: int = MIN_COUNT,
+    timestamp_column: Optional[str] = None,
+    sample_period: float = 1.0,
+    chunk_size: int = 1_000_000,
+    output: Optional[str] = None,
+) -> Summary:
+    """Backtest a file, optionally writing the alert timeline to a CSV file."""
+
+    chunks = read_chunks(path, timestamp_column, sample_period, chunk_size)
+    results = backtest(chunks, window_seconds, threshold, min_count)
+
+    if output is not None:
+        results = _write(results, output)
+
+    return summarise(results, window_seconds, threshold)
+
+
+def _write(results: Iterator[pd.DataFrame], output: str) -> Iterator[pd.DataFrame]:
+    """Append results to a CSV file as they pass through."""
+
+    header = True
+    for result in results:
+        result.astype({"valve_constant": int, "ready": int, "malfunction": int}).to_csv(
+            output, mode="w" if header else "a", header=header
+        )
+        header = False
+        yield result
+
+
+def sweep(
+    path: str,
+    thresholds: Sequence[float],
+    windows: Sequence[float],
+    workers: Optional[int] = None,
+    **kwargs,
+) -> List[Summary]:
+    """Backtest every threshold/window combination in parallel."""
+
+    grid = list(product(thresholds, windows))
+
+    with ProcessPoolExecutor(max_workers=workers or min(len(grid), os.cpu_count() or 1)) as executor:
+        futures = [
+            executor.submit(run, path, window_seconds, threshold, **kwargs)
+            for threshold, window_seconds in grid
+        ]
+        return [future.result() for future in futures]
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Command line entry point."""
+
+    parser = argparse.ArgumentParser(description="Backtest the valve malfunction model on historical data")
+    parser.add_argument("path", help="CSV or Parquet file with gas_flow and valve_state columns")
+    parser.add_argument("--threshold", type=float, nargs="+", default=[GAS_FLOW_THRESHOLD], help="gas_flow threshold(s)")
+    parser.add_argument("--window", type=float, nargs="+", default=[WINDOW_SECONDS], help="window length(s) in seconds")
+    parser.add_argument("--min-count", type=int, default=MIN_COUNT, help="minimum samples of each input in the window")
+    parser.add_argument("--timestamp-column", help="column of epoch seconds or ISO 8601 timestamps")
+    parser.add_argument("--sample-period", type=float, default=1.0, help="seconds between rows without timestamps")
+    parser.add_argument("--chunk-size", type=int, default=1_000_000, help="rows read at once")
+    parser.add_argument("--output", help="CSV file for the alert timeline (single run only)")
+    parser.add_argument("--workers", type=int, help="processes for a sweep (default: one per core)")
+    args = parser.parse_args(argv)
+
+    options = dict(
+        min_count=args.min_count,
+        timestamp_column=args.timestamp_column,
+        sample_period=args.sample_period,
+        chunk_size=args.chunk_size,
+    )
+
+    if len(args.threshold) == 1 and len(args.window) == 1:
+        summaries = [run(args.path, args.window[0], args.threshold[0], output=args.output, **options)]
+    else:
+        if args.output:
+            parser.error("--output is only available for a single threshold and window")
+        summaries = sweep(args.path, args.threshold, args.window, args.workers, **options)
+
+    pd.DataFrame(summaries).to_csv(sys.stdout, index=False)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,183 @@
+"""
+Fleet valve malfunction model.
+
+Many valves are evaluated by one model: per-asset window state is held in 2D
+NumPy arrays (assets x time slots) and the malfunction rule is applied to every
+asset in one vectorised pass. The window is resolved to whole time slots.
+"""
+
+import math
+from typing import Any, Dict, Iterable, List, Mapping, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+from .model import GAS_FLOW_THRESHOLD, is_malfunction
+from .window import NANOSECONDS
+
+
+def fleet_assets(
+    inputs: Iterable[Mapping[str, Any]],
+    names: Sequence[str],
+    asset_names: Optional[Sequence[str]] = None,
+) -> List[str]:
+    """
+    Assets of the fleet: those subscribed through the sources of every named input.
+
+    inputs -- input definitions of the app configuration
+    names -- inputs every asset needs
+    asset_names -- assets to evaluate (default: every subscribed asset), all of
+        which must be subscribed
+    """
+
+    subscribed: Dict[str, List[str]] = {}
+    for item in inputs:
+        if item.get("name") in names:
+            assets = subscribed.setdefault(item["name"], [])
+            for source in item.get("sources") or []:
+                assets.extend(name for name in source.get("asset_names") or [] if name not in assets)
+
+    common = [name for name in subscribed.get(names[0], []) if all(name in subscribed.get(other, []) for other in names)]
+    if not asset_names:
+        return common
+
+    missing = [name for name in asset_names if name not in common]
+    if missing:
+        raise ValueError(f"Fleet assets {', '.join(missing)} are not in the sources of every input ({', '.join(names)})")
+
+    return list(asset_names)
+
+
+class FleetEvaluation(NamedTuple):
+    """Per-asset evaluation results, aligned with the fleet's asset names."""
+
+    gas_flow_mean: np.ndarray
+    valve_state: np.ndarray
+    valve_constant: np.ndarray
+    ready: np.ndarray  # enough samples of both inputs in the window
+    malfunction: np.ndarray
+
+
+class FleetModel:
+    """Valve malfunction model over a time window for many assets."""
+
+    def __init__(
+        self,
+        asset_names: Sequence[str],
+        window_seconds: float,
+        slot_seconds: float = 1.0,
+        min_count: int = 1,
+        threshold: float = GAS_FLOW_THRESHOLD,
+    ) -> None:
+        """
+        Create the model.
+
+        slot_seconds -- time resolution of the window
+        """
+
+        self.asset_names = list(asset_names)
+        self.index: Dict[str, int] = {name: i for i, name in enumerate(self.asset_names)}
+        self.min_count = min_count
+        self.threshold = threshold
+
+        self.slot_length = max(int(slot_seconds * NANOSECONDS), 1)
+        self.slots = max(math.ceil(window_seconds / slot_seconds), 1)
+
+        shape = (len(self.asset_names), self.slots)
+        self._keys = np.full(self.slots, np.iinfo(np.int64).min, dtype=np.int64)
+        self._gas_sum = np.zeros(shape)
+        self._gas_count = np.zeros(shape, dtype=np.int64)
+        self._valve_count = np.zeros(shape, dtype=np.int64)
+        self._valve_min = np.full(shape, np.inf)
+        self._valve_max = np.full(shape, -np.inf)
+
+        self.latest: Optional[int] = None
+        self.dropped = 0  # samples older than the window or for unknown assets
+
+    def assets(self, names: Iterable[str]) -> np.ndarray:
+        """Asset indices for names (-1 if unknown)."""
+
+        index = self.index
+
+        return np.fromiter((index.get(name, -1) for name in names), dtype=np.int64)
+
+    def _slots(self, assets: np.ndarray, times: np.ndarray) -> np.ndarray:
+        """Advance the clock and return the slot column of each sample (-1 to drop)."""
+
+        times = np.asarray(times, dtype=np.int64)
+        if not len(times):
+            return np.empty(0, dtype=np.int64)
+
+        latest = int(times.max())
+        if self.latest is None or latest > self.latest:
+            self.latest = latest
+            self._advance(latest // self.slot_length)
+
+        keys = times // self.slot_length
+        columns = keys % self.slots
+        valid = (assets >= 0) & (self._keys[columns] == keys)
+        self.dropped += int(np.count_nonzero(~valid))
+
+        return np.where(valid, columns, -1)
+
+    def _advance(self, current: int) -> None:
+        """Clear the slots that leave the window when the current slot is reached."""
+
+        first = current - self.slots + 1
+        for key in range(max(first, int(self._keys.max()) + 1), current + 1):
+            column = key % self.slots
+            self._keys[column] = key
+            self._gas_sum[:, column] = 0.0
+            self._gas_count[:, column] = 0
+            self._valve_count[:, column] = 0
+            self._valve_min[:, column] = np.inf
+            self._valve_max[:, column] = -np.inf
+
+    def push_gas_flow(self, assets: np.ndarray, times: np.ndarray, values: np.ndarray) -> None:
+        """Add a batch of gas_flow samples (asset indices, nanosecond times, values)."""
+
+        assets = np.asarray(assets, dtype=np.int64)
+        columns = self._slots(assets, times)
+        keep = columns >= 0
+        assets, columns, values = assets[keep], columns[keep], np.asarray(values, dtype=np.float64)[keep]
+
+        flat = assets * self.slots + columns
+        size = self._gas_sum.size
+        self._gas_sum += np.bincount(flat, weights=values, minlength=size).reshape(self._gas_sum.shape)
+        self._gas_count += np.bincount(flat, minlength=size).reshape(self._gas_count.shape)
+
+    def push_valve_state(self, assets: np.ndarray, times: np.ndarray, values: np.ndarray) -> None:
+        """Add a batch of valve_state samples (asset indices, nanosecond times, values)."""
+
+        assets = np.asarray(assets, dtype=np.int64)
+        columns = self._slots(assets, times)
+        keep = columns >= 0
+        assets, columns, values = assets[keep], columns[keep], np.asarray(values, dtype=np.float64)[keep]
+
+        flat = assets * self.slots + columns
+        self._valve_count += np.bincount(flat, minlength=self._valve_count.size).reshape(self._valve_count.shape)
+        np.minimum.at(self._valve_min, (assets, columns), values)
+        np.maximum.at(self._valve_max, (assets, columns), values)
+
+    def evaluate(self, now: Optional[int] = None) -> Optional[FleetEvaluation]:
+        """Evaluate every asset over the slots of the window ending at now (default: latest sample)."""
+
+        now = self.latest if now is None else now
+        if now is None:
+            return None
+
+        self._advance(now // self.slot_length)
+
+        gas_count = self._gas_count.sum(axis=1)
+        valve_count = self._valve_count.sum(axis=1)
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            gas_flow_mean = self._gas_sum.sum(axis=1) / gas_count
+
+        valve_min = self._valve_min.min(axis=1)
+        valve_max = self._valve_max.max(axis=1)
+        valve_constant = valve_min == valve_max
+
+        ready = (gas_count >= max(self.min_count, 1)) & (valve_count >= max(self.min_count, 1))
+        malfunction = ready & is_malfunction(gas_flow_mean, valve_max, valve_constant, self.threshold)
+
+        return FleetEvaluation(gas_flow_mean, valve_max, valve_constant, ready, malfunction)
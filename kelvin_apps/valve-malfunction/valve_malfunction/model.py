@@ -0,0 +1,133 @@
+"""
+Valve malfunction model.
+
+The model keeps running state per input instead of re-reading its windows:
+a windowed sum/count for gas_flow and a run-length tracker for valve_state,
+so each evaluation costs O(1) regardless of the window length.
+
+A malfunction is flagged when valve_state has been constant for the whole
+window but the average gas_flow does not match it:
+
+- valve_state = 0: no flow expected
+- valve_state = 1: flow above the threshold expected
+"""
+
+from typing import NamedTuple, Optional
+
+from .window import NANOSECONDS, RollingWindow
+
+# Defaults of the rule, as deployed in app.yaml
+GAS_FLOW_THRESHOLD = 5.0  # units: MCF
+WINDOW_SECONDS = 5.0
+MIN_COUNT = 3
+
+
+def is_malfunction(gas_flow_mean, valve_state, valve_constant, threshold=GAS_FLOW_THRESHOLD):
+    """
+    Malfunction rule, for scalars or NumPy arrays.
+
+    gas_flow_mean -- average gas flow over the window
+    valve_state -- valve state (truthy when open)
+    valve_constant -- whether the valve state was constant over the window
+    """
+
+    return valve_constant & ((gas_flow_mean > threshold) != (valve_state != 0))
+
+
+class RunLengthTracker:
+    """Track the current value of a signal and when its current run started."""
+
+    def __init__(self) -> None:
+        self.value: Optional[float] = None
+        self.run_start: Optional[int] = None  # time of the first sample of the current run
+        self.previous_end: Optional[int] = None  # time of the last sample of the previous run
+        self.latest: Optional[int] = None
+
+    def push(self, time_of_validity: int, value: float) -> None:
+        """Add a sample."""
+
+        if value != self.value:
+            self.previous_end = self.latest
+            self.run_start = time_of_validity
+            self.value = value
+
+        self.latest = time_of_validity
+
+    def constant_since(self, cutoff: int) -> bool:
+        """Whether every sample after cutoff belongs to the current run."""
+
+        return self.value is not None and (self.previous_end is None or self.previous_end <= cutoff)
+
+
+class Evaluation(NamedTuple):
+    """Result of evaluating the model."""
+
+    gas_flow_mean: float
+    gas_flow_count: int
+    valve_state: float
+    valve_count: int
+    valve_constant: bool
+    malfunction: bool
+
+
+class ValveModel:
+    """Incremental valve malfunction model over a time window."""
+
+    def __init__(self, window_seconds: float, min_count: int = 1, threshold: float = GAS_FLOW_THRESHOLD) -> None:
+        self.window = int(window_seconds * NANOSECONDS)
+        self.min_count = min_count
+        self.threshold = threshold
+
+        self.gas_flow = RollingWindow(window_seconds)
+        self.valve_state = RollingWindow(window_seconds)  # for the sample count
+        self.valve_run = RunLengthTracker()
+
+    def push_gas_flow(self, time_of_validity: int, value: float) -> None:
+        """Add a gas_flow sample."""
+
+        self.gas_flow.push(time_of_validity, value)
+
+    def push_valve_state(self, time_of_validity: int, value: float) -> None:
+        """Add a valve_state sample."""
+
+        self.valve_state.push(time_of_validity, value)
+        self.valve_run.push(time_of_validity, value)
+
+    @property
+    def latest(self) -> Optional[int]:
+        """Latest sample time across both inputs."""
+
+        times = [time for time in (self.gas_flow.latest, self.valve_state.latest) if time is not None]
+
+        return max(times) if times else None
+
+    def evaluate(self, now: Optional[int] = None) -> Optional[Evaluation]:
+        """
+        Evaluate the window (now - window, now], now defaulting to the latest sample.
+
+        Returns None if either input has fewer than min_count samples in the window.
+        """
+
+        now = self.latest if now is None else now
+        if now is None:
+            return None
+
+        self.gas_flow.evict(now)
+        self.valve_state.evict(now)
+
+        gas_flow_count, valve_count = self.gas_flow.count, self.valve_state.count
+        if gas_flow_count < self.min_count or valve_count < self.min_count or not valve_count:
+            return None
+
+        gas_flow_mean = self.gas_flow.mean
+        valve_state = self.valve_run.value
+        valve_constant = self.valve_run.constant_since(now - self.window)
+
+        return Evaluation(
+            gas_flow_mean,
+            gas_flow_count,
+            valve_state,
+            valve_count,
+            valve_constant,
+            bool(is_malfunction(gas_flow_mean, valve_state, valve_constant, self.threshold)),
+        )
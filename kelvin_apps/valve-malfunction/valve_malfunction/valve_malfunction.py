@@ -1,56 +1,172 @@
-from kelvin.app import Application
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+from kelvin.app import DataApplication
+from kelvin.icd import Message
+
+from .fleet import FleetModel, fleet_assets
+from .model import GAS_FLOW_THRESHOLD, ValveModel
+from .output_filter import OutputFilters
 
 """
 Valve malfunction model
 
 Two inputs: gas_flow and valve_state
 
-gas_flow is somewhat noisy, so we average the last 30 seconds of flow data to determine flow rate 
+gas_flow is somewhat noisy, so we average the last window of flow data to determine flow rate
 
-We'll flag a valve malfunction if valve_state is consistent for an entire 30 second period, but flow rate doesn't match
+We'll flag a valve malfunction if valve_state is consistent for an entire window, but flow rate doesn't match
 
 if valve_state = 0, we expect no flow
 if valve_state = 1, we expect gas_flow
 
-gas_flow threshold is defined in app.yaml
+The window, minimum sample counts and gas_flow threshold are defined in app.yaml
+
+The backtest module replays historical data through the same rule offline
+
+In fleet mode the valves of every asset in the inputs' sources (or of
+fleet.asset_names, which must be among them) are evaluated together and one
+valve_malfunction message is emitted per asset
 """
 
 
-class App(Application):
+class App(DataApplication):
+
+    def init(self) -> None:
+        """
+        Set up the incremental model from the configuration
+        """
+        threshold = self.config.gas_flow_threshold
+        self.threshold = GAS_FLOW_THRESHOLD if threshold is None else threshold
+
+        self.model = ValveModel(
+            window_seconds=self.config.window_seconds,
+            min_count=self.config.min_count,
+            threshold=self.threshold,
+        )
+
+        # Report by exception: unchanged outputs are suppressed (see output_filters)
+        self.output_filters = OutputFilters(self.config.output_filters)
+
+        fleet = self.config.fleet
+        self.fleet = None
+        if fleet is not None and fleet.get('enabled', False):
+            app = (self.app_configuration or {}).get('app') or {}
+            inputs = (app.get('kelvin') or {}).get('inputs') or []
+            self.fleet = FleetModel(
+                asset_names=fleet_assets(inputs, ('gas_flow', 'valve_state'), fleet.get('asset_names', None)),
+                window_seconds=self.config.window_seconds,
+                slot_seconds=fleet.get('slot_seconds', 1.0),
+                min_count=self.config.min_count,
+                threshold=self.threshold,
+            )
+
+    def process_data(self, data: Sequence[Message]) -> None:
+        """
+        Update the model with incoming gas_flow and valve_state samples
+        """
+        if self.fleet is not None:
+            self.process_fleet_data(data)
+            return
+
+        model = self.model
+
+        for msg in data:
+            name = msg._.name
+            if name == 'gas_flow':
+                model.push_gas_flow(msg._.time_of_validity, msg.value)
+            elif name == 'valve_state':
+                model.push_valve_state(msg._.time_of_validity, msg.value)
+
+    def process_fleet_data(self, data: Sequence[Message]) -> None:
+        """
+        Update the fleet model with one batch per input
+        """
+        batches: Dict[str, Tuple[List[str], List[int], List[float]]] = {
+            'gas_flow': ([], [], []),
+            'valve_state': ([], [], []),
+        }
+
+        for msg in data:
+            batch = batches.get(msg._.name)
+            if batch is None:
+                continue
+            assets, times, values = batch
+            assets.append(msg._.source.asset_name)
+            times.append(msg._.time_of_validity)
+            values.append(msg.value)
+
+        fleet = self.fleet
+        for name, push in (('gas_flow', fleet.push_gas_flow), ('valve_state', fleet.push_valve_state)):
+            assets, times, values = batches[name]
+            if assets:
+                push(fleet.assets(assets), np.array(times, dtype=np.int64), np.array(values))
+
+    def process_fleet(self) -> None:
+        """
+        Evaluate every asset at once and emit one result per asset
+        """
+        fleet = self.fleet
+        evaluation = fleet.evaluate()
+        if evaluation is None:
+            return
+
+        ready = np.flatnonzero(evaluation.ready)
+        malfunction = evaluation.malfunction
+
+        for i in ready.tolist():
+            msg = self.make_message("raw.float32", name='valve_malfunction', value=int(malfunction[i]))
+            msg._.target.asset_name = fleet.asset_names[i]
+            self.emit_filtered(msg, key=fleet.asset_names[i])
+
+        self.logger.info(
+            "fleet check",
+            assets=len(fleet.asset_names),
+            ready=len(ready),
+            alerts=int(malfunction.sum()),
+            dropped=fleet.dropped,
+        )
+        self.logger.info("output filters", **self.output_filters.counters())
 
     def process(self) -> None:
         """
         Process Incoming Data for Valve Malfunction Model
         """
-        if self.data_status != {}:
-            self.logger.warning(f"DATA STATUS ERROR : {self.data_status}")
+        if self.fleet is not None:
+            self.process_fleet()
             return
 
-        # compute gas_flow time period average
-        gas_flow = self.data.gas_flow.series()
-        gas_flow_average_in_window = gas_flow.mean()
-
-        # valve_state array, to ensure that it's consistent for entire period
-        valve_values_in_window = self.data.valve_state.series()
-        valve_set = set(valve_values_in_window)
-        valve_value = bool(valve_values_in_window[0])
-        gas_flow_threshold = 5  # units: MCF
+        evaluation = self.model.evaluate()
+        if evaluation is None:
+            self.logger.warning(
+                "DATA STATUS ERROR : not enough samples in window",
+                len_gf=self.model.gas_flow.count,
+                len_vs=self.model.valve_state.count,
+            )
+            return
 
         self.logger.info(  # everything we want to log goes here
             "check",
-            n_valve=len(valve_set),
-            is_valve=valve_value,
-            is_gas_above=gas_flow_average_in_window > gas_flow_threshold,
-            len_gf=len(self.data.gas_flow)
+            is_valve_constant=evaluation.valve_constant,
+            is_valve=bool(evaluation.valve_state),
+            is_gas_above=evaluation.gas_flow_mean > self.model.threshold,
+            len_gf=evaluation.gas_flow_count
         )
+        self.logger.info("output filters", **self.output_filters.counters())
 
         # Model Logic
-        if len(valve_set) == 1:  # Only one valve state in last 30s
-            if (gas_flow_average_in_window > gas_flow_threshold) != valve_value:
-                self.logger.info(f'EMITTING ALERT: valve_malfunction')
-                msg = self.make_message("raw.float32", name='valve_malfunction', value=1)
-                self.emit(msg)
-                return
+        if evaluation.malfunction:
+            self.logger.info(f'EMITTING ALERT: valve_malfunction')
+            msg = self.make_message("raw.float32", name='valve_malfunction', value=1)
+            self.emit_filtered(msg)
+            return
         self.logger.info(f'Emitting null value: valve_malfunction')
         msg = self.make_message("raw.float32", name='valve_malfunction', value=0)
-        self.emit(msg)
+        self.emit_filtered(msg)
+
+    def emit_filtered(self, msg: Message, key=None) -> None:
+        """
+        Emit a message unless its output filter suppresses it
+        """
+        if self.output_filters.check(msg._.name, msg.value, msg._.time_of_validity, key):
+            self.emit(msg)
@@ -0,0 +1,131 @@
+"""
+Incremental time windows.
+
+Each metric keeps its samples in a NumPy ring buffer along with a running sum
+and count, so adding a sample, evicting expired samples and reading the mean
+are all (amortised) constant time regardless of the window length.
+"""
+
+from typing import Optional
+
+import numpy as np
+
+NANOSECONDS = 1_000_000_000
+
+
+class RollingWindow:
+    """
+    Time window over the samples of one metric, covering (latest - seconds, latest].
+
+    Samples are expected to arrive in time order.
+    """
+
+    def __init__(self, seconds: float, capacity: int = 1024) -> None:
+        """
+        Create the window.
+
+        capacity -- initial ring buffer size, doubled when full
+        """
+
+        self.length = int(seconds * NANOSECONDS)
+
+        self._times = np.empty(capacity, dtype=np.int64)
+        self._values = np.empty(capacity, dtype=np.float64)
+        self._head = 0  # index of the oldest sample
+        self._count = 0
+
+        self._sum = 0.0
+        self._updates = 0  # since the running sum was last recomputed
+
+        self.latest: Optional[int] = None
+
+    @property
+    def count(self) -> int:
+        """Number of samples in the window."""
+
+        return self._count
+
+    @property
+    def mean(self) -> float:
+        """Mean of the samples in the window (NaN if empty)."""
+
+        return self._sum / self._count if self._count else float("nan")
+
+    def values(self) -> np.ndarray:
+        """Copy of the samples in the window, oldest first."""
+
+        return self._ordered(self._values)
+
+    def times(self) -> np.ndarray:
+        """Copy of the sample times in the window, oldest first."""
+
+        return self._ordered(self._times)
+
+    def _ordered(self, data: np.ndarray) -> np.ndarray:
+        end = self._head + self._count
+        if end <= len(data):
+            return data[self._head:end].copy()
+
+        return np.concatenate([data[self._head:], data[: end - len(data)]])
+
+    def push(self, time_of_validity: int, value: float) -> None:
+        """Add a sample (nanoseconds since the epoch) and evict expired samples."""
+
+        if self._count == len(self._values):
+            self._grow()
+
+        index = (self._head + self._count) % len(self._values)
+        self._times[index] = time_of_validity
+        self._values[index] = value
+        self._count += 1
+        self._sum += value
+
+        if self.latest is None or time_of_validity > self.latest:
+            self.latest = time_of_validity
+
+        self._updated()
+        self.evict()
+
+    def evict(self, now: Optional[int] = None) -> None:
+        """Drop samples at or before (now - seconds), now defaulting to the latest sample time."""
+
+        now = self.latest if now is None else now
+        if now is None:
+            return
+
+        cutoff = now - self.length
+
+        while self._count and self._times[self._head] <= cutoff:
+            self._pop()
+
+    def _pop(self) -> None:
+        """Drop the oldest sample."""
+
+        self._sum -= float(self._values[self._head])
+        self._head = (self._head + 1) % len(self._values)
+        self._count -= 1
+
+        if not self._count:
+            self._sum = 0.0
+            self._head = 0
+
+        self._updated()
+
+    def _updated(self) -> None:
+        """Recompute the running sum periodically to bound floating point drift."""
+
+        self._updates += 1
+        if self._updates >= len(self._values):
+            self._sum = float(self.values().sum())
+            self._updates = 0
+
+    def _grow(self) -> None:
+        """Double the ring buffer, unrolling it so the oldest sample is first."""
+
+        size = 2 * len(self._values)
+        times, values = np.empty(size, dtype=np.int64), np.empty(size, dtype=np.float64)
+        times[: self._count] = self.times()
+        values[: self._count] = self.values()
+
+        self._times, self._values = times, values
+        self._head = 0
@@ -0,0 +1,53 @@
+"""
+Output Filter Tests.
+"""
+
+from pathlib import Path
+
+import pytest
+import yaml
+
+from weather.output_filter import NANOSECONDS, OutputFilters
+
+APP = Path(__file__).parent.parent / "app.yaml"
+
+
+@pytest.fixture
+def kelvin() -> dict:
+    """Kelvin section of app.yaml."""
+
+    with open(APP) as file:
+        return yaml.safe_load(file)["app"]["kelvin"]
+
+
+def emitted(filters: OutputFilters, name: str, values) -> list:
+    """Values emitted from a series one second apart."""
+
+    return [value for i, value in enumerate(values) if filters.check(name, value, i * NANOSECONDS)]
+
+
+def test_configured_outputs(kelvin: dict) -> None:
+    """Test that the filtered outputs are statistics the app emits, each with a 60 s heartbeat."""
+
+    configuration = kelvin["configuration"]
+    filters = OutputFilters(configuration["output_filters"])
+
+    outputs = {output["name"] for output in kelvin["outputs"]}
+    statistics = {
+        f"{name}_{statistic}" for name, names in configuration["statistics"].items() for statistic in names
+    }
+
+    assert set(filters.config) - {"default"} <= statistics <= outputs
+    for name in statistics:
+        assert filters.get(name).max_silence == 60 * NANOSECONDS
+
+
+def test_deadbands(kelvin: dict) -> None:
+    """Test the absolute deadbands of the means and the 0.5% default of the other statistics."""
+
+    filters = OutputFilters(kelvin["configuration"]["output_filters"])
+
+    assert emitted(filters, "temperature_mean", [20.0, 20.05, 20.15, 20.2]) == [20.0, 20.15]
+    assert emitted(filters, "humidity_mean", [50.0, 50.4, 50.6]) == [50.0, 50.6]
+    assert emitted(filters, "humidity_p95", [50.0, 50.2, 50.3]) == [50.0, 50.3]
+    assert emitted(filters, "temperature_std", [0.2] * 61) == [0.2, 0.2]  # at 0 and 60 s
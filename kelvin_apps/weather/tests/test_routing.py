@@ -0,0 +1,26 @@
+"""
+Topic Routing Tests.
+"""
+
+from weather.routing import TopicIndex
+
+
+def test_exact_names() -> None:
+    """Test that only declared names are routed."""
+
+    index = TopicIndex({"temperature": 1, "humidity": 2})
+
+    assert [index.get(name) for name in ["temperature", "pressure", "humidity", "temperature_2"]] == [1, None, 2, None]
+    assert index.counters() == {"accepted": 2, "discarded": 2, "captured": 0}
+
+
+def test_capture() -> None:
+    """Test that undeclared names are captured when enabled, up to a limit."""
+
+    index = TopicIndex({"temperature": "temperature"}, capture=str.upper, max_captured=2)
+
+    assert [index.get(name) for name in ["pressure", "temperature", "pressure", "flow", "level"]] == [
+        "PRESSURE", "temperature", "PRESSURE", "FLOW", None
+    ]
+    assert index.counters() == {"accepted": 4, "discarded": 1, "captured": 2}
+    assert list(index) == ["temperature", "pressure", "flow"]
@@ -0,0 +1,138 @@
+"""
+Window Statistics Tests.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from weather.statistics import QuantileSketch, WindowStatistics, parse_statistic
+from weather.window import NANOSECONDS
+
+
+def samples(count: int, rate: float, seed: int = 0) -> pd.Series:
+    """Irregularly spaced samples at roughly the given rate (per second)."""
+
+    rng = np.random.default_rng(seed)
+    times = np.cumsum(rng.exponential(NANOSECONDS / rate, count)).astype(np.int64) + 1_600_000_000 * NANOSECONDS
+
+    return pd.Series(rng.normal(20.0, 5.0, count), index=pd.to_datetime(times))
+
+
+def test_parse_statistic() -> None:
+    """Test statistic names."""
+
+    assert parse_statistic("mean") is None
+    assert parse_statistic("p95") == 0.95
+    assert parse_statistic("p99.9") == pytest.approx(0.999)
+    with pytest.raises(ValueError):
+        parse_statistic("median")
+
+
+def test_statistics_match_pandas() -> None:
+    """Test that min/max/std match pandas rolling results after every sample."""
+
+    series = samples(20000, rate=100.0)
+    rolling = series.rolling("10s")
+    expected = pd.DataFrame({"min": rolling.min(), "max": rolling.max(), "std": rolling.std()})
+
+    window = WindowStatistics(10, capacity=16)
+    result = []
+    for time, value in zip(series.index.asi8, series.values):
+        window.push(time, value)
+        result.append((window.min, window.max, window.std))
+    result = pd.DataFrame(result, columns=["min", "max", "std"], index=series.index)
+
+    assert (result["min"] == expected["min"]).all()
+    assert (result["max"] == expected["max"]).all()
+    assert result["std"].iloc[1:].values == pytest.approx(expected["std"].iloc[1:].values, rel=1e-6)
+
+
+@pytest.mark.parametrize("q", [0.5, 0.95, 0.99])
+def test_percentiles_match_pandas(q: float) -> None:
+    """Test that sketched percentiles are within the relative accuracy of exact ones."""
+
+    series = samples(50000, rate=1000.0)
+    window = WindowStatistics(10, percentiles=[q], panes=50)
+    for time, value in zip(series.index.asi8, series.values):
+        window.push(time, value)
+
+    # Exact percentile over the window (the sketch may also hold up to one older pane)
+    expected = series[series.index > series.index[-1] - pd.Timedelta("10s")].quantile(q)
+
+    (result,) = window.quantiles([q])
+    assert result == pytest.approx(expected, rel=0.03)
+
+
+def test_sketch() -> None:
+    """Test sketch accuracy, merging and bounded size."""
+
+    values = np.random.default_rng(0).lognormal(0, 2, 100000) * np.where(np.arange(100000) % 10, 1, -1)
+
+    first, second = QuantileSketch(), QuantileSketch()
+    first.add_many(values[:50000])
+    for value in values[50000:1000 + 50000]:
+        second.add(value)
+    second.add_many(values[51000:])
+    first.merge(second)
+
+    assert first.count == len(values)
+    for q in [0.01, 0.05, 0.25, 0.5, 0.75, 0.99]:
+        assert first.quantile(q) == pytest.approx(np.quantile(values, q), rel=0.03)
+
+    small = QuantileSketch(max_buckets=512)
+    small.add_many(values)
+    assert small.buckets <= 2 * 512 + 1
+    assert small.quantile(0.99) == pytest.approx(np.quantile(values, 0.99), rel=0.03)
+
+
+def test_statistics() -> None:
+    """Test named statistics."""
+
+    window = WindowStatistics(10, percentiles=[0.5])
+    for i, value in enumerate([1.0, 2.0, 3.0, 4.0]):
+        window.push(i * NANOSECONDS, value)
+
+    result = window.statistics(["count", "mean", "min", "max", "std", "p50"])
+
+    assert result == pytest.approx({"count": 4, "mean": 2.5, "min": 1.0, "max": 4.0, "std": np.std([1, 2, 3, 4], ddof=1), "p50": 2.0}, rel=0.02)
+
+
+STATISTICS = ["mean", "min", "max", "std", "p50", "p95", "p99"]
+
+
+@pytest.mark.parametrize("size", [1000, 10000, 100000])
+def test_benchmark_streaming(benchmark, size: int) -> None:
+    """Benchmark a tick (one new sample, then read every statistic) with streaming statistics."""
+
+    series = samples(size, rate=size / 10)
+    window = WindowStatistics(10, percentiles=[0.5, 0.95, 0.99])
+    for time, value in zip(series.index.asi8, series.values):
+        window.push(time, value)
+
+    state = {"time": int(series.index.asi8[-1])}
+
+    def tick() -> dict:
+        state["time"] += NANOSECONDS * 10 // size
+        window.push(state["time"], 20.0)
+        return window.statistics(STATISTICS)
+
+    benchmark(tick)
+
+
+@pytest.mark.parametrize("size", [1000, 10000, 100000])
+def test_benchmark_pandas(benchmark, size: int) -> None:
+    """Benchmark the same tick computing every statistic exactly over the window with pandas."""
+
+    values = pd.Series(samples(size, rate=size / 10).values)
+
+    def tick() -> dict:
+        return {
+            "mean": values.mean(),
+            "min": values.min(),
+            "max": values.max(),
+            "std": values.std(),
+            **dict(zip(["p50", "p95", "p99"], values.quantile([0.5, 0.95, 0.99]))),
+        }
+
+    benchmark(tick)
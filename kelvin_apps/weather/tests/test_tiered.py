@@ -0,0 +1,82 @@
+"""
+Tiered Window Tests.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from weather.tiered import TieredWindow, parse_bytes
+from weather.window import NANOSECONDS
+
+
+def test_parse_bytes() -> None:
+    """Test byte sizes."""
+
+    assert parse_bytes(1024) == 1024
+    assert parse_bytes("256Mi") == 256 * 2 ** 20
+    assert parse_bytes("1.5K") == 1500
+    with pytest.raises(ValueError):
+        parse_bytes("lots")
+
+
+def test_matches_exact_window() -> None:
+    """Test that the tiered statistics match exact statistics over the bucket-aligned window."""
+
+    rng = np.random.default_rng(0)
+    times = np.arange(0, 120 * NANOSECONDS, NANOSECONDS // 10, dtype=np.int64) + 1_600_000_000 * NANOSECONDS
+    values = rng.normal(20.0, 5.0, len(times))
+
+    window = TieredWindow(60, recent_seconds=5, bucket_seconds=1)
+    bucket = NANOSECONDS
+
+    for i, (time, value) in enumerate(zip(times, values)):
+        window.push(int(time), float(value))
+        if i % 97:
+            continue
+
+        # Samples in buckets not entirely before the window start
+        first = (time - 60 * NANOSECONDS + 1) // bucket
+        expected = pd.Series(values[: i + 1][times[: i + 1] // bucket >= first])
+
+        assert window.count == len(expected)
+        assert window.mean == pytest.approx(expected.mean(), rel=1e-9)
+        assert window.min == expected.min()
+        assert window.max == expected.max()
+        if len(expected) > 1:
+            assert window.std == pytest.approx(expected.std(), rel=1e-6)
+
+
+@pytest.mark.parametrize("slope", [0.0, 1.0, -1.0])
+def test_memory_budget(slope: float) -> None:
+    """Test that an hour at 100 Hz stays within the memory budget, including monotonic input filling a min/max deque."""
+
+    window = TieredWindow(3600, recent_seconds=600, bucket_seconds=1, memory_budget="256Ki")
+
+    step = NANOSECONDS // 100
+    for i in range(100 * 3600):
+        window.push(i * step, 1.0 + slope * i)
+
+    assert window.count == 100 * 3600
+    assert window.mean == pytest.approx(1.0 + slope * (100 * 3600 - 1) / 2)
+    assert len(window.values()) < 100 * 600  # recent tier was folded early
+    assert window.nbytes <= parse_bytes("256Ki")
+
+
+def test_bucket_coarsening() -> None:
+    """Test that buckets are coarsened to fit half the budget."""
+
+    window = TieredWindow(86400, recent_seconds=60, bucket_seconds=1, memory_budget="64Ki")
+
+    assert len(window._keys) * 48 <= 32 * 1024
+    assert window.bucket_length > NANOSECONDS
+
+
+def test_percentiles_unavailable() -> None:
+    """Test that percentiles are rejected."""
+
+    window = TieredWindow(60, recent_seconds=5)
+    window.push(0, 1.0)
+
+    with pytest.raises(ValueError):
+        window.statistics(["p50"])
@@ -0,0 +1,90 @@
+"""
+Rolling Window Tests.
+"""
+
+from collections import deque
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from weather.window import NANOSECONDS, RollingWindow
+
+
+def samples(count: int, rate: float, seed: int = 0) -> pd.Series:
+    """Irregularly spaced samples at roughly the given rate (per second)."""
+
+    rng = np.random.default_rng(seed)
+    times = np.cumsum(rng.exponential(NANOSECONDS / rate, count)).astype(np.int64) + 1_600_000_000 * NANOSECONDS
+
+    return pd.Series(rng.normal(20.0, 5.0, count), index=pd.to_datetime(times))
+
+
+def test_mean_matches_pandas() -> None:
+    """Test that the incremental mean matches a pandas rolling mean after every sample."""
+
+    series = samples(20000, rate=100.0)
+    expected = series.rolling("10s").mean()
+
+    window = RollingWindow(10, capacity=16)
+    result = []
+    for time, value in zip(series.index.asi8, series.values):
+        window.push(time, value)
+        result.append(window.mean)
+
+    assert result == pytest.approx(expected.values.tolist(), rel=1e-9)
+    assert window.values().tolist() == series[series.index > series.index[-1] - pd.Timedelta("10s")].tolist()
+
+
+def test_evict() -> None:
+    """Test eviction against an explicit time."""
+
+    window = RollingWindow(1)
+    for i in range(10):
+        window.push(i * NANOSECONDS // 10, float(i))
+
+    assert window.count == 10
+    assert window.mean == 4.5
+
+    window.evict(15 * NANOSECONDS // 10)
+    assert window.times().tolist() == [6 * NANOSECONDS // 10, 7 * NANOSECONDS // 10, 8 * NANOSECONDS // 10, 9 * NANOSECONDS // 10]
+    assert window.mean == 7.5
+
+    window.evict(10 * NANOSECONDS)
+    assert window.count == 0
+    assert np.isnan(window.mean)
+
+
+@pytest.mark.parametrize("size", [1000, 10000, 100000])
+def test_benchmark_incremental(benchmark, size: int) -> None:
+    """Benchmark a tick (one new sample, then read the mean) with the incremental window."""
+
+    series = samples(size, rate=size / 10)
+    window = RollingWindow(10)
+    for time, value in zip(series.index.asi8, series.values):
+        window.push(time, value)
+
+    state = {"time": int(series.index.asi8[-1])}
+
+    def tick() -> float:
+        state["time"] += NANOSECONDS * 10 // size
+        window.push(state["time"], 20.0)
+        return window.mean
+
+    benchmark(tick)
+    assert window.count == pytest.approx(size, rel=0.1)
+
+
+@pytest.mark.parametrize("size", [1000, 10000, 100000])
+def test_benchmark_pandas(benchmark, size: int) -> None:
+    """Benchmark the same tick rebuilding a pandas frame from the buffered window."""
+
+    series = samples(size, rate=size / 10)
+    buffer = deque(zip(series.index.asi8, series.values), maxlen=size)
+
+    def tick() -> float:
+        buffer.append((buffer[-1][0] + NANOSECONDS * 10 // size, 20.0))
+        frame = pd.DataFrame({"temperature": [value for _, value in buffer]})
+        return frame["temperature"].mean()
+
+    benchmark(tick)
@@ -0,0 +1,69 @@
+"""
+Topic routing.
+
+Messages are routed by exact metric name through a dictionary compiled from
+the declared inputs, instead of buffering every metric matching a wildcard.
+Wildcard capture of undeclared metrics is opt-in.
+"""
+
+from typing import Callable, Dict, Generic, Iterator, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class TopicIndex(Generic[T]):
+    """Exact-name index from metric name to its target."""
+
+    def __init__(
+        self,
+        targets: Dict[str, T],
+        capture: Optional[Callable[[str], T]] = None,
+        max_captured: int = 1000,
+    ) -> None:
+        """
+        Create the index.
+
+        capture -- factory for targets of undeclared names (wildcard capture),
+            None discards them
+        max_captured -- maximum number of undeclared names captured
+        """
+
+        self.targets = dict(targets)
+        self.capture = capture
+        self.max_captured = max_captured
+
+        self.declared = frozenset(self.targets)
+        self.accepted = 0
+        self.discarded = 0
+        self.captured = 0
+
+    def get(self, name: str) -> Optional[T]:
+        """Target for a message name, counting it as accepted or discarded."""
+
+        target = self.targets.get(name)
+        if target is not None:
+            self.accepted += 1
+            return target
+
+        if self.capture is not None and len(self.targets) - len(self.declared) < self.max_captured:
+            target = self.targets[name] = self.capture(name)
+            self.accepted += 1
+            self.captured += 1
+            return target
+
+        self.discarded += 1
+
+        return None
+
+    def counters(self) -> Dict[str, int]:
+        """Accepted, discarded and captured counts."""
+
+        return {"accepted": self.accepted, "discarded": self.discarded, "captured": self.captured}
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.targets)
+
+    def items(self):
+        """Names and targets, declared and captured."""
+
+        return self.targets.items()
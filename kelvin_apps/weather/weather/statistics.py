@@ -0,0 +1,302 @@
+"""
+Streaming window statistics.
+
+Statistics are maintained as samples enter and leave the window rather than
+recomputed from the whole window:
+
+- min/max: monotonic deques
+- std: Welford's algorithm, with removal
+- percentiles: mergeable relative-error quantile sketches, one per pane of the
+  window, merged when read and dropped a whole pane at a time
+"""
+
+import math
+import re
+from collections import deque
+from typing import Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from .window import NANOSECONDS, RollingWindow
+
+PERCENTILE = re.compile(r"^p(\d{1,2}(?:\.\d+)?)$")
+
+STATISTICS = ("count", "mean", "min", "max", "std")
+
+# Approximate sizes used for memory reporting
+DEQUE_ENTRY_BYTES = 120  # (time, value) tuple and deque slot
+SKETCH_BUCKET_BYTES = 100  # dict entry and int objects
+
+
+def parse_statistic(name: str) -> Optional[float]:
+    """Validate a statistic name, returning the quantile for percentiles (e.g. p95 -> 0.95)."""
+
+    match = PERCENTILE.match(name)
+    if match:
+        return float(match.group(1)) / 100.0
+    if name not in STATISTICS:
+        raise ValueError(f"Unknown statistic {name!r}")
+
+    return None
+
+
+class QuantileSketch:
+    """
+    Relative-error quantile sketch with logarithmic buckets (as in DDSketch).
+
+    Quantiles are accurate to within the relative accuracy of the true value,
+    sketches can be merged, and memory is bounded by collapsing the lowest
+    buckets beyond max_buckets.
+    """
+
+    def __init__(self, relative_accuracy: float = 0.01, max_buckets: int = 2048) -> None:
+        self.relative_accuracy = relative_accuracy
+        self.max_buckets = max_buckets
+
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+
+        self.positive: Dict[int, int] = {}
+        self.negative: Dict[int, int] = {}
+        self.zero = 0
+        self.count = 0
+
+    def add(self, value: float) -> None:
+        """Add a value."""
+
+        self.count += 1
+        if value > 0:
+            store, key = self.positive, math.ceil(math.log(value) / self._log_gamma)
+        elif value < 0:
+            store, key = self.negative, math.ceil(math.log(-value) / self._log_gamma)
+        else:
+            self.zero += 1
+            return
+
+        store[key] = store.get(key, 0) + 1
+        if len(store) > self.max_buckets:
+            self._collapse()
+
+    def add_many(self, values: np.ndarray) -> None:
+        """Add a batch of values."""
+
+        values = np.asarray(values, dtype=np.float64)
+        self.count += len(values)
+        self.zero += int(np.count_nonzero(values == 0))
+
+        for store, selected in ((self.positive, values[values > 0]), (self.negative, -values[values < 0])):
+            if len(selected):
+                keys, counts = np.unique(np.ceil(np.log(selected) / self._log_gamma).astype(np.int64), return_counts=True)
+                for key, count in zip(keys.tolist(), counts.tolist()):
+                    store[key] = store.get(key, 0) + count
+
+        self._collapse()
+
+    def merge(self, other: "QuantileSketch") -> None:
+        """Merge another sketch (with the same accuracy) into this one."""
+
+        for store, other_store in ((self.positive, other.positive), (self.negative, other.negative)):
+            for key, count in other_store.items():
+                store[key] = store.get(key, 0) + count
+        self.zero += other.zero
+        self.count += other.count
+
+        self._collapse()
+
+    def _collapse(self) -> None:
+        """Fold the lowest magnitude buckets together to respect max_buckets."""
+
+        for store in (self.positive, self.negative):
+            if len(store) <= self.max_buckets:
+                continue
+            keys = sorted(store)
+            excess = keys[: len(keys) - self.max_buckets + 1]
+            store[excess[-1]] = sum(store.pop(key) for key in excess[:-1]) + store[excess[-1]]
+
+    def quantile(self, q: float) -> float:
+        """Approximate value at quantile q (0 to 1), NaN if empty."""
+
+        if not self.count:
+            return float("nan")
+
+        rank = q * (self.count - 1)
+        seen = 0
+
+        for key in sorted(self.negative, reverse=True):
+            seen += self.negative[key]
+            if seen > rank:
+                return -self._value(key)
+
+        seen += self.zero
+        if seen > rank:
+            return 0.0
+
+        for key in sorted(self.positive):
+            seen += self.positive[key]
+            if seen > rank:
+                return self._value(key)
+
+        return self._value(max(self.positive)) if self.positive else 0.0
+
+    def _value(self, key: int) -> float:
+        """Representative magnitude of a bucket."""
+
+        return 2.0 * self.gamma ** key / (self.gamma + 1.0)
+
+    @property
+    def buckets(self) -> int:
+        """Number of buckets in use."""
+
+        return len(self.positive) + len(self.negative) + (1 if self.zero else 0)
+
+
+class WindowStatistics(RollingWindow):
+    """Rolling window maintaining min/max/std and percentile sketches as samples come and go."""
+
+    def __init__(
+        self,
+        seconds: float,
+        percentiles: Iterable[float] = (),
+        panes: int = 10,
+        relative_accuracy: float = 0.01,
+        capacity: int = 1024,
+    ) -> None:
+        """
+        Create the window.
+
+        percentiles -- quantiles (0 to 1) to sketch, none disables the sketches
+        panes -- number of sketch panes per window (percentiles may include up to
+            one pane of samples older than the window)
+        """
+
+        self.percentiles = list(percentiles)
+        self.relative_accuracy = relative_accuracy
+        self.pane_length = max(int(seconds * NANOSECONDS) // panes, 1)
+
+        # Monotonic deques of (time, value): increasing for min, decreasing for max
+        self._min: Deque[Tuple[int, float]] = deque()
+        self._max: Deque[Tuple[int, float]] = deque()
+
+        # Welford state
+        self._n = 0
+        self._mean = 0.0
+        self._m2 = 0.0
+
+        # Percentile sketches per pane, (pane start, sketch)
+        self._panes: Deque[Tuple[int, QuantileSketch]] = deque()
+
+        super().__init__(seconds, capacity)
+
+    def _added(self, time_of_validity: int, value: float) -> None:
+        minimum, maximum = self._min, self._max
+        while minimum and minimum[-1][1] >= value:
+            minimum.pop()
+        minimum.append((time_of_validity, value))
+        while maximum and maximum[-1][1] <= value:
+            maximum.pop()
+        maximum.append((time_of_validity, value))
+
+        self._n += 1
+        delta = value - self._mean
+        self._mean += delta / self._n
+        self._m2 += delta * (value - self._mean)
+
+        if self.percentiles:
+            start = time_of_validity - time_of_validity % self.pane_length
+            if not self._panes or self._panes[-1][0] != start:
+                self._panes.append((start, QuantileSketch(self.relative_accuracy)))
+            self._panes[-1][1].add(value)
+
+    def _removed(self, time_of_validity: int, value: float) -> None:
+        self._n -= 1
+        if not self._n:
+            self._mean = self._m2 = 0.0
+            return
+        delta = value - self._mean
+        self._mean -= delta / self._n
+        self._m2 = max(self._m2 - delta * (value - self._mean), 0.0)
+
+    def _evicted(self, cutoff: int) -> None:
+        for extrema in (self._min, self._max):
+            while extrema and extrema[0][0] <= cutoff:
+                extrema.popleft()
+
+        while self._panes and self._panes[0][0] + self.pane_length <= cutoff:
+            self._panes.popleft()
+
+    def _resync(self) -> None:
+        super()._resync()
+        values = self.values()
+        self._n = len(values)
+        self._mean = float(values.mean()) if self._n else 0.0
+        self._m2 = float(((values - self._mean) ** 2).sum()) if self._n else 0.0
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory used by the window."""
+
+        extrema = (len(self._min) + len(self._max)) * DEQUE_ENTRY_BYTES
+        sketches = sum(sketch.buckets for _, sketch in self._panes) * SKETCH_BUCKET_BYTES
+
+        return super().nbytes + extrema + sketches
+
+    @property
+    def min(self) -> float:
+        """Minimum in the window (NaN if empty)."""
+
+        return self._min[0][1] if self._min else float("nan")
+
+    @property
+    def max(self) -> float:
+        """Maximum in the window (NaN if empty)."""
+
+        return self._max[0][1] if self._max else float("nan")
+
+    @property
+    def variance(self) -> float:
+        """Sample variance in the window (NaN if fewer than two samples)."""
+
+        return self._m2 / (self._n - 1) if self._n > 1 else float("nan")
+
+    @property
+    def std(self) -> float:
+        """Sample standard deviation in the window (NaN if fewer than two samples)."""
+
+        return math.sqrt(self.variance) if self._n > 1 else float("nan")
+
+    def sketch(self) -> QuantileSketch:
+        """Merged sketch of the panes in the window."""
+
+        merged = QuantileSketch(self.relative_accuracy)
+        for _, sketch in self._panes:
+            merged.merge(sketch)
+
+        return merged
+
+    def quantiles(self, qs: Iterable[float]) -> List[float]:
+        """Approximate quantiles (0 to 1) in the window."""
+
+        sketch = self.sketch()
+
+        return [sketch.quantile(q) for q in qs]
+
+    def statistics(self, names: Iterable[str]) -> Dict[str, float]:
+        """Named statistics (count, mean, min, max, std, pNN) in the window."""
+
+        names = list(names)
+        getters: Dict[str, Callable[[], float]] = {
+            "count": lambda: float(self.count),
+            "mean": lambda: self.mean,
+            "min": lambda: self.min,
+            "max": lambda: self.max,
+            "std": lambda: self.std,
+        }
+
+        result = {name: getters[name]() for name in names if name in getters}
+
+        percentiles = [(name, parse_statistic(name)) for name in names if name not in getters]
+        if percentiles:
+            values = self.quantiles(q for _, q in percentiles)
+            result.update((name, value) for (name, _), value in zip(percentiles, values))
+
+        return result
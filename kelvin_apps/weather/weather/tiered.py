@@ -0,0 +1,269 @@
+"""
+Tiered time windows.
+
+Long windows keep only their most recent samples at full resolution. Older
+samples are folded into fixed-size buckets of count/sum/sum of squares/min/max,
+so memory is bounded by the bucket count rather than by the window length and
+sample rate. A memory budget caps both tiers.
+"""
+
+import math
+import re
+from typing import Iterable, List, Optional, Union
+
+import numpy as np
+
+from .statistics import DEQUE_ENTRY_BYTES, WindowStatistics
+from .window import NANOSECONDS
+
+UNITS = {"": 1, "K": 10 ** 3, "M": 10 ** 6, "G": 10 ** 9, "Ki": 2 ** 10, "Mi": 2 ** 20, "Gi": 2 ** 30}
+
+BYTES = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*([KMG]i?)?\s*$")
+
+# Bytes per bucket: key, count, sum, sum of squares, min, max
+BUCKET_BYTES = 6 * 8
+
+
+def parse_bytes(value: Union[int, float, str]) -> int:
+    """Parse a byte size such as 1048576, "512Ki" or "4Mi"."""
+
+    if isinstance(value, (int, float)):
+        return int(value)
+
+    match = BYTES.match(value)
+    if not match:
+        raise ValueError(f"Invalid byte size {value!r}")
+
+    number, unit = match.groups()
+
+    return int(float(number) * UNITS[unit or ""])
+
+
+class TieredWindow(WindowStatistics):
+    """
+    Window over (latest - seconds, latest] with full resolution for (latest - recent_seconds, latest].
+
+    Supports count, mean, min, max and std (percentiles need the raw samples).
+    The oldest bucket is dropped once it is entirely outside the window, so the
+    window start is accurate to one bucket.
+    """
+
+    def __init__(
+        self,
+        seconds: float,
+        recent_seconds: float,
+        bucket_seconds: float = 1.0,
+        memory_budget: Optional[Union[int, str]] = None,
+        capacity: int = 1024,
+    ) -> None:
+        """
+        Create the window.
+
+        recent_seconds -- length of the full resolution tier
+        bucket_seconds -- resolution of the aggregated tier (coarsened to fit the budget)
+        memory_budget -- maximum bytes for the buckets and the recent tier (its
+            ring buffer and min/max deques): the buckets take at most half, and
+            the oldest recent samples are folded early rather than growing the
+            recent tier beyond the rest
+        """
+
+        if recent_seconds >= seconds:
+            raise ValueError("recent_seconds must be shorter than seconds")
+
+        self.span = int(seconds * NANOSECONDS)
+        self.memory_budget = None if memory_budget is None else parse_bytes(memory_budget)
+
+        # Samples may be folded early to stay within budget, so buckets cover the whole window
+        buckets = math.ceil(seconds / bucket_seconds) + 1
+        if self.memory_budget is not None and buckets * BUCKET_BYTES > self.memory_budget // 2:
+            buckets = max(self.memory_budget // 2 // BUCKET_BYTES, 2)
+            bucket_seconds = seconds / (buckets - 1)
+
+        self.bucket_length = max(int(bucket_seconds * NANOSECONDS), 1)
+        self._keys = np.full(buckets, -1, dtype=np.int64)
+        self._bucket_count = np.zeros(buckets, dtype=np.int64)
+        self._bucket_sum = np.zeros(buckets)
+        self._bucket_sumsq = np.zeros(buckets)
+        self._bucket_min = np.zeros(buckets)
+        self._bucket_max = np.zeros(buckets)
+
+        # Totals over the aggregated tier
+        self._older_count = 0
+        self._older_sum = 0.0
+        self._older_sumsq = 0.0
+        self._oldest_key: Optional[int] = None
+
+        # Largest ring buffer the recent tier may grow to
+        self._max_capacity = None
+        if self.memory_budget is not None:
+            # Time and value per sample, and a min/max deque entry per sample
+            # in the worst case (monotonic input): the deques share samples only
+            # at their ends, so they hold at most one entry more than the ring
+            remaining = self.memory_budget - self._buckets_nbytes - DEQUE_ENTRY_BYTES
+            self._max_capacity = max(remaining // (16 + DEQUE_ENTRY_BYTES), 1)
+            capacity = min(capacity, self._max_capacity)
+
+        super().__init__(recent_seconds, capacity=capacity)
+
+    @property
+    def _buckets_nbytes(self) -> int:
+        return len(self._keys) * BUCKET_BYTES
+
+    @property
+    def buckets(self) -> int:
+        """Number of buckets in use."""
+
+        return int(np.count_nonzero(self._keys >= 0))
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory used by the window."""
+
+        return super().nbytes + self._buckets_nbytes
+
+    def __len__(self) -> int:
+        return self.count
+
+    @property
+    def count(self) -> int:
+        """Number of samples in the window."""
+
+        return self._count + self._older_count
+
+    @property
+    def sum(self) -> float:
+        """Sum of the samples in the window."""
+
+        return self._sum + self._older_sum
+
+    @property
+    def mean(self) -> float:
+        """Mean of the samples in the window (NaN if empty)."""
+
+        count = self.count
+
+        return self.sum / count if count else float("nan")
+
+    @property
+    def min(self) -> float:
+        """Minimum in the window (NaN if empty)."""
+
+        used = self._keys >= 0
+        older = self._bucket_min[used].min() if used.any() else np.inf
+        recent = self._min[0][1] if self._min else np.inf
+        minimum = min(older, recent)
+
+        return float(minimum) if minimum != np.inf else float("nan")
+
+    @property
+    def max(self) -> float:
+        """Maximum in the window (NaN if empty)."""
+
+        used = self._keys >= 0
+        older = self._bucket_max[used].max() if used.any() else -np.inf
+        recent = self._max[0][1] if self._max else -np.inf
+        maximum = max(older, recent)
+
+        return float(maximum) if maximum != -np.inf else float("nan")
+
+    @property
+    def variance(self) -> float:
+        """Sample variance in the window (NaN if fewer than two samples)."""
+
+        count = self.count
+        if count < 2:
+            return float("nan")
+
+        # Recent tier sum of squares from its Welford state
+        sumsq = self._older_sumsq + self._m2 + self._n * self._mean ** 2
+        total = self.sum
+
+        return max((sumsq - total * total / count) / (count - 1), 0.0)
+
+    @property
+    def std(self) -> float:
+        """Sample standard deviation in the window (NaN if fewer than two samples)."""
+
+        variance = self.variance
+
+        return math.sqrt(variance) if variance == variance else variance
+
+    def quantiles(self, qs: Iterable[float]) -> List[float]:
+        """Not available: percentiles need the raw samples."""
+
+        raise ValueError("Percentiles are not available for tiered windows")
+
+    def _removed(self, time_of_validity: int, value: float) -> None:
+        """Fold a sample leaving the recent tier into its bucket."""
+
+        super()._removed(time_of_validity, value)
+
+        key = time_of_validity // self.bucket_length
+        if self._oldest_key is not None and key < self._oldest_key:
+            return  # already outside the window
+        i = key % len(self._keys)
+
+        if self._keys[i] != key:
+            if self._keys[i] >= 0:
+                self._drop_bucket(i)
+            self._keys[i] = key
+            self._bucket_count[i] = 0
+            self._bucket_sum[i] = self._bucket_sumsq[i] = 0.0
+            self._bucket_min[i] = self._bucket_max[i] = value
+            if self._oldest_key is None:
+                self._oldest_key = key
+
+        self._bucket_count[i] += 1
+        self._bucket_sum[i] += value
+        self._bucket_sumsq[i] += value * value
+        if value < self._bucket_min[i]:
+            self._bucket_min[i] = value
+        if value > self._bucket_max[i]:
+            self._bucket_max[i] = value
+
+        self._older_count += 1
+        self._older_sum += value
+        self._older_sumsq += value * value
+
+    def _drop_bucket(self, i: int) -> None:
+        """Remove a bucket from the aggregated tier."""
+
+        self._older_count -= int(self._bucket_count[i])
+        self._older_sum -= float(self._bucket_sum[i])
+        self._older_sumsq -= float(self._bucket_sumsq[i])
+        self._keys[i] = -1
+
+        if not self._older_count:
+            self._older_sum = self._older_sumsq = 0.0
+
+    def evict(self, now: Optional[int] = None) -> None:
+        """Fold samples older than the recent tier into buckets and drop buckets older than the window."""
+
+        super().evict(now)
+
+        now = self.latest if now is None else now
+        if now is None or self._oldest_key is None:
+            return
+
+        # Buckets entirely at or before the cutoff
+        last = (now - self.span + 1) // self.bucket_length - 1
+        if last < self._oldest_key:
+            return
+
+        size = len(self._keys)
+        for key in range(max(self._oldest_key, last - size + 1), last + 1):
+            i = key % size
+            if self._keys[i] == key:
+                self._drop_bucket(i)
+        self._oldest_key = last + 1
+
+    def _grow(self) -> None:
+        """Fold the oldest recent sample early instead of growing beyond the budget."""
+
+        if self._max_capacity is not None and 2 * len(self._values) > self._max_capacity:
+            time_of_validity = int(self._times[self._head])
+            self._pop()
+            self._evicted(time_of_validity)
+            return
+
+        super()._grow()
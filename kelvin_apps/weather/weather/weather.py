@@ -2,49 +2,106 @@
 Data Application.
 """
 
+from typing import Sequence
+
 from kelvin.app import DataApplication
+from kelvin.icd import Message
+
+from .output_filter import OutputFilters
+from .statistics import WindowStatistics, parse_statistic
+from .routing import TopicIndex
+from .tiered import TieredWindow
 
 
 class App(DataApplication):
     """Application."""
 
-    TOPICS = {
+    # Messages are routed to the windows by exact input name rather than buffered by
+    # the framework under a 'raw.float32.#' wildcard
+    WINDOW_SECONDS = 10
+
+    # Subscription for undeclared metrics when capture_undeclared is enabled (the
+    # framework buffer is kept short, the windows keep the history)
+    CAPTURE_TOPICS = {
         'raw.float32.#': {
             'target': '{name}',
             'storage_type': 'buffer',
-            'storage_config': {'window': {'seconds': 10}, 'getter': 'value'},
+            'storage_config': {'window': {'seconds': 1}, 'getter': 'value'},
         }
     }
 
+    DEFAULT_STATISTICS = ['mean']
+
+    def init(self) -> None:
+        """Initialisation method."""
+        # Statistics to emit per declared input, as '{input}_{statistic}' outputs
+        configured = self.config.statistics or {}
+        self.statistics = {
+            name: list(configured.get(name, None) or self.DEFAULT_STATISTICS) for name in self.interface.inputs
+        }
+
+        # Incremental window per declared input, undeclared metrics only if capture is enabled
+        if self.config.capture_undeclared:
+            self.TOPICS = self.CAPTURE_TOPICS
+        self.windows = TopicIndex(
+            {name: self.make_window(name) for name in self.interface.inputs},
+            capture=self.make_window if self.config.capture_undeclared else None,
+        )
+
+        # Report by exception: statistics that have not moved are suppressed
+        self.output_filters = OutputFilters(self.config.output_filters)
+
+    def make_window(self, name: str) -> WindowStatistics:
+        """Create the window of a metric, tiered if only its recent samples are kept."""
+        statistics = self.statistics.setdefault(name, list(self.DEFAULT_STATISTICS))
+        percentiles = [q for q in map(parse_statistic, statistics) if q is not None]
+
+        window = (self.config.windows or {}).get(name, None) or {}
+        seconds = window.get('seconds', None) or self.WINDOW_SECONDS
+        recent_seconds = window.get('recent_seconds', None)
+
+        if recent_seconds is None:
+            return WindowStatistics(seconds, percentiles=percentiles)
+        if percentiles:
+            raise ValueError(f'Percentiles are not available for tiered window {name!r}')
+
+        return TieredWindow(
+            seconds,
+            recent_seconds,
+            bucket_seconds=window.get('bucket_seconds', None) or 1.0,
+            memory_budget=window.get('memory_budget', None),
+        )
+
+    def process_data(self, data: Sequence[Message]) -> None:
+        """Update the windows with the incoming messages."""
+        windows = self.windows
+
+        for msg in data:
+            window = windows.get(msg._.name)
+            if window is not None:
+                window.push(msg._.time_of_validity, msg.value)
+
     def process(self) -> None:
         """Process data."""
         # self.logger.info("config", config=self.config)
-        # self.logger.info("frame", frame=frame)
-        temperature = self.data.get("temperature", None)
-        humidity = self.data.get("temperature", None)
-
-        self.logger.info("temperature", data=temperature)
-        self.logger.info("humidity", data=humidity)
-
-        frame = self.frame
-
-        if not frame.empty:
-            temperature_mean = frame['temperature'].mean()
-            humidity_mean = frame['humidity'].mean()
-
-            temperature_message = self.make_message(
-                'raw.float32',
-                'temperature_mean',
-                value=temperature_mean,
-                time_of_validity=self.last_time_of_validity,
-                emit=True
-            )
-            self.logger.info("temperature_mean", message=temperature_message)
-            humidity_message = self.make_message(
-                'raw.float32',
-                'humidity_mean',
-                value=humidity_mean,
-                time_of_validity=self.last_time_of_validity,
-                emit=True
-            )
-            self.logger.info("humidity_men", message=humidity_message)
+        self.logger.info("routing", **self.windows.counters())
+        self.logger.info("output filters", **self.output_filters.counters())
+
+        for name, window in self.windows.items():
+            self.logger.info(name, count=window.count, latest=window.latest, nbytes=window.nbytes)
+
+            if not window.count:
+                continue
+
+            for statistic, value in window.statistics(self.statistics[name]).items():
+                output = f'{name}_{statistic}'
+                if not self.output_filters.check(output, value, self.last_time_of_validity):
+                    continue
+                message = self.make_message(
+                    'raw.float32',
+                    output,
+                    value=value,
+                    time_of_validity=self.last_time_of_validity,
+                    emit=True
+                )
+                self.logger.info(output, message=message)